@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from relab.codec import available_codecs, decode, encode
+
+#------------------------------------------------------
+# CODEC BENCHMARK - size and dump/parse time per codec and format
+#------------------------------------------------------
+# python benchmarks/bench_codec.py [--procedures 5000] [--repeat 5] [--json]
+
+def synthetic_procedures(count):
+    procedures = []
+    for i in range(count):
+        if i % 3 == 0:
+            link = {"type": "file", "path": f"C:\\Lab\\RE_LAB_PROCEDURE\\TestProcedures\\Test_{i}_procedure.pdf",
+                    "name": f"Test_{i}_procedure.pdf",
+                    "url": f"https://sharedspace-my.sharepoint.com/Documents/RE_LAB_PROCEDURE/TestProcedures/Test_{i}_procedure.pdf"}
+        else:
+            link = f"https://wiki.example.com/relab/procedure/{i}"
+        procedures.append({"text": f"Step {i}: verify fixture torque and record readings for chamber run {i % 40}", "link": link})
+    return procedures
+
+def best_of(repeat, fn):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run(count, repeat):
+    data = synthetic_procedures(count)
+    results = []
+    for codec in available_codecs():
+        for label, pretty, compress in (("pretty", True, False), ("compact", False, False), ("compact+gzip", False, True)):
+            raw = encode(data, pretty=pretty, compress=compress, codec=codec)
+            results.append({
+                "codec": codec,
+                "format": label,
+                "procedures": count,
+                "bytes": len(raw),
+                "dump_ms": round(best_of(repeat, lambda: encode(data, pretty=pretty, compress=compress, codec=codec)) * 1000, 3),
+                "parse_ms": round(best_of(repeat, lambda: decode(raw, codec=codec)) * 1000, 3),
+            })
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare JSON codecs on a synthetic procedures file.")
+    parser.add_argument("--procedures", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.procedures, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'codec':<8} {'format':<13} {'bytes':>10} {'dump ms':>9} {'parse ms':>9}")
+    for r in results:
+        print(f"{r['codec']:<8} {r['format']:<13} {r['bytes']:>10} {r['dump_ms']:>9} {r['parse_ms']:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from relab import config, github_store
+from relab.backends import build_backend
+from datasets import populate
+from fake_github import FakeGitHub
+
+#------------------------------------------------------
+# GITHUB API CALLS PER RERUN / WRITE - against the local fake server
+#------------------------------------------------------
+# python benchmarks/bench_github_calls.py --tests 20 --procedures 50 --latency 0.05
+#
+# A "rerun" is what the 5.0 dashboard does on every autorefresh: list tests,
+# load the selected test's procedures twice (edit + delete expanders) and
+# once more for the main table.
+
+def rerun(backend, test_name):
+    backend.list_tests()
+    for _ in range(3):
+        backend.get_procedures(test_name)
+
+def measure(fake, label, fn, repeat):
+    fake.reset_calls()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    seconds = time.perf_counter() - start
+    calls = list(fake.calls)
+    return {"scenario": label, "repeat": repeat, "api_calls": len(calls) / repeat,
+            "ms": round(seconds * 1000 / repeat, 3),
+            "by_method": {m: sum(1 for c in calls if c["method"] == m) / repeat for m in sorted({c["method"] for c in calls})}}
+
+def run(tests, procedures, latency, repeat, cache_ttl):
+    results = []
+    with FakeGitHub(files={"tests.json": b"[]"}, latency=latency) as fake:
+        config.GITHUB_API_URL = fake.base_url
+        github_store.configure("fake-token", fake.repo.full_name, "TestProcedures")
+        seed = build_backend("github", cache_ttl=0, batch_delay=0)
+        names = populate(seed, tests, procedures, batch_tests=max(1, tests))
+        backend = build_backend("github", cache_ttl=cache_ttl, batch_delay=0)
+        target = names[0]
+        results.append(measure(fake, "rerun", lambda: rerun(backend, target), repeat))
+        results.append(measure(fake, "add_procedure", lambda: backend.add_procedure(target, "bench", "https://example.com"), repeat))
+        results.append(measure(fake, "edit_procedure", lambda: backend.edit_procedure(target, 0, "bench (edited)", None), repeat))
+        results.append(measure(fake, "delete_procedure", lambda: backend.delete_procedure(target, 0), repeat))
+        results.append(measure(fake, "versions (overview)", backend.versions, repeat))
+        results.append({"scenario": "rate_limit_remaining", "value": fake.remaining})
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count GitHub API calls per dashboard rerun and write.")
+    parser.add_argument("--tests", type=int, default=20)
+    parser.add_argument("--procedures", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per API request")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cache-ttl", type=float, default=0.0, help="caching layer TTL (0 = uncached)")
+    args = parser.parse_args(argv)
+    warnings.simplefilter("ignore", DeprecationWarning)
+    print(json.dumps(run(args.tests, args.procedures, args.latency, args.repeat, args.cache_ttl), indent=2))
+
+if __name__ == "__main__":
+    main()
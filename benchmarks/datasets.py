@@ -0,0 +1,46 @@
+import os
+import random
+
+from relab.backends import add_procedure_op, add_test_op
+
+#------------------------------------------------------
+# SYNTHETIC LAB CATALOGS
+#------------------------------------------------------
+# Deterministic for a given seed so results are comparable between runs.
+
+STAGES = ["Setup", "Calibration", "Burn-in", "HAST", "Thermal cycling", "Shock", "Vibration", "Teardown"]
+EQUIPMENT = ["Chamber A", "Chamber B", "Shaker 2", "Oven 3", "Tester 7", "Scope 1"]
+
+def test_names(count):
+    width = len(str(count))
+    return [f"TEST_{i:0{width}d}" for i in range(count)]
+
+def procedure_rows(test_name, count, attachments=False, attachment_dir=None, rng=None):
+    rng = rng or random.Random(0)
+    for i in range(count):
+        text = f"{rng.choice(STAGES)} step {i}: {rng.choice(EQUIPMENT)} - record readings every {rng.randint(1, 60)} min"
+        if attachments and i % 4 == 0:
+            name = f"{test_name}_proc_{i}.pdf"
+            path = os.path.join(attachment_dir, name) if attachment_dir else name
+            link = {"type": "file", "path": path, "name": name, "url": ""}
+        else:
+            link = f"https://wiki.example.com/relab/{test_name}/{i}"
+        yield text, link
+
+def populate(backend, tests, procedures, attachments=False, attachment_dir=None, seed=0, batch_tests=50):
+    # Writes the catalog through backend.apply in batches of whole tests
+    rng = random.Random(seed)
+    names = test_names(tests)
+    if attachments and attachment_dir:
+        os.makedirs(attachment_dir, exist_ok=True)
+    for start in range(0, len(names), batch_tests):
+        mutations = []
+        for test_name in names[start:start + batch_tests]:
+            mutations.append(add_test_op(test_name))
+            for text, link in procedure_rows(test_name, procedures, attachments, attachment_dir, rng):
+                mutations.append(add_procedure_op(test_name, text, link))
+                if attachments and isinstance(link, dict) and attachment_dir:
+                    with open(link["path"], "wb") as f:
+                        f.write(b"%PDF-1.4 synthetic attachment\n" * 8)
+        backend.apply(mutations, "Synthetic dataset")
+    return names
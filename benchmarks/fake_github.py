@@ -0,0 +1,371 @@
+import argparse
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+#------------------------------------------------------
+# FAKE GITHUB API - local stand-in for the 5.0 GitHub backend
+#------------------------------------------------------
+# Implements the REST endpoints PyGithub uses for the procedures repo:
+# repos, contents (GET/PUT/DELETE), git refs/commits/trees/blobs and
+# rate_limit. Every response carries X-RateLimit-* headers and an ETag;
+# If-None-Match answers 304 without spending rate limit, like GitHub.
+# Every call is recorded so benchmarks can count API calls per rerun/write.
+#
+#   with FakeGitHub(latency=0.05, files={"tests.json": b"[]"}) as fake:
+#       config.GITHUB_API_URL = fake.base_url
+#       ...
+#       fake.call_count("GET", "/contents/")
+#
+#   python benchmarks/fake_github.py --port 8765 --latency 0.05
+#   (then RELAB_GITHUB_API_URL=http://127.0.0.1:8765; GET /__calls shows the log)
+
+def git_blob_sha(data):
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def _sha(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class FakeRepo:
+    # Minimal git object store: flat trees (full path -> blob sha)
+    def __init__(self, full_name="PNRELAB/RE_LAB_PROCEDURE", branch="main", files=None):
+        self.full_name = full_name
+        self.branch = branch
+        self.lock = threading.Lock()
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.refs = {}
+        self._counter = 0
+        tree = self.put_tree({path: self.put_blob(data) for path, data in (files or {}).items()})
+        self.refs[f"heads/{branch}"] = self.put_commit(tree, [], "Initial commit")
+
+    def put_blob(self, data):
+        sha = git_blob_sha(data)
+        self.blobs[sha] = data
+        return sha
+
+    def put_tree(self, entries):
+        sha = _sha("tree", sorted(entries.items()))
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def put_commit(self, tree, parents, message):
+        self._counter += 1
+        sha = _sha("commit", tree, parents, message, self._counter)
+        self.commits[sha] = {"tree": tree, "parents": list(parents), "message": message, "date": time.time()}
+        return sha
+
+    def head(self):
+        return self.refs[f"heads/{self.branch}"]
+
+    def head_tree(self):
+        return self.trees[self.commits[self.head()]["tree"]]
+
+    def commit_change(self, message, put=None, delete=()):
+        entries = dict(self.head_tree())
+        entries.update(put or {})
+        for path in delete:
+            entries.pop(path, None)
+        commit = self.put_commit(self.put_tree(entries), [self.head()], message)
+        self.refs[f"heads/{self.branch}"] = commit
+        return commit
+
+class FakeGitHub:
+    def __init__(self, files=None, full_name="PNRELAB/RE_LAB_PROCEDURE", branch="main", latency=0.0,
+                 jitter=0.0, rate_limit=5000, host="127.0.0.1", port=0):
+        files = {p: (d if isinstance(d, bytes) else json.dumps(d).encode("utf-8")) for p, d in (files or {}).items()}
+        self.repo = FakeRepo(full_name, branch, files)
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.remaining = rate_limit
+        self.reset_at = int(time.time()) + 3600
+        self.calls = []
+        self._calls_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-github", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    #---------------- call log ----------------
+    def record(self, method, path, status, seconds):
+        with self._calls_lock:
+            self.calls.append({"method": method, "path": path, "status": status, "ms": round(seconds * 1000, 3), "at": time.time()})
+
+    def reset_calls(self):
+        with self._calls_lock:
+            self.calls.clear()
+
+    def call_count(self, method=None, contains=None, status=None):
+        with self._calls_lock:
+            return sum(1 for c in self.calls
+                       if (method is None or c["method"] == method)
+                       and (contains is None or contains in c["path"])
+                       and (status is None or c["status"] == status))
+
+    def files(self):
+        # Current content of the default branch: {path: bytes}
+        with self.repo.lock:
+            return {path: self.repo.blobs[sha] for path, sha in self.repo.head_tree().items()}
+
+#------------------------------------------------------
+# REQUEST HANDLING
+#------------------------------------------------------
+def _handler_for(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+        def log_message(self, *args):
+            pass
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            return json.loads(raw) if raw else {}
+
+        def _send(self, status, payload=None, etag=True):
+            body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+            tag = '"%s"' % hashlib.sha1(body).hexdigest()
+            if etag and self.command == "GET" and status == 200 and self.headers.get("If-None-Match") == tag:
+                status, body = 304, b""
+            elif not self.path.startswith(("/rate_limit", "/__")):
+                fake.remaining = max(0, fake.remaining - 1)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            if etag and self.command == "GET":
+                self.send_header("ETag", tag)
+            self.send_header("X-RateLimit-Limit", str(fake.rate_limit))
+            self.send_header("X-RateLimit-Remaining", str(fake.remaining))
+            self.send_header("X-RateLimit-Used", str(fake.rate_limit - fake.remaining))
+            self.send_header("X-RateLimit-Reset", str(fake.reset_at))
+            self.end_headers()
+            self.wfile.write(body)
+            return status
+
+        def _handle(self):
+            start = time.perf_counter()
+            if fake.latency or fake.jitter:
+                time.sleep(fake.latency + random.uniform(0, fake.jitter))
+            path = unquote(urlsplit(self.path).path)
+            status = 500
+            try:
+                if path == "/__calls":
+                    with fake._calls_lock:
+                        return self._send(200, list(fake.calls), etag=False)
+                if path == "/__reset":
+                    fake.reset_calls()
+                    fake.remaining = fake.rate_limit
+                    return self._send(200, {"ok": True}, etag=False)
+                if fake.remaining <= 0 and path != "/rate_limit":
+                    status = self._send(403, {"message": "API rate limit exceeded",
+                                              "documentation_url": "https://docs.github.com/rest/rate-limit"}, etag=False)
+                    return status
+                status = self._route(path)
+                return status
+            except Exception as e:
+                status = self._send(500, {"message": f"fake github error: {e}"}, etag=False)
+                return status
+            finally:
+                if not path.startswith("/__"):
+                    fake.record(self.command, path, status, time.perf_counter() - start)
+
+        do_GET = do_PUT = do_POST = do_PATCH = do_DELETE = _handle
+
+        #---------------- routes ----------------
+        def _route(self, path):
+            repo = fake.repo
+            base = fake.base_url
+            repo_prefix = f"/repos/{repo.full_name}"
+            repo_url = base + repo_prefix
+            if path == "/rate_limit":
+                core = {"limit": fake.rate_limit, "remaining": fake.remaining,
+                        "reset": fake.reset_at, "used": fake.rate_limit - fake.remaining}
+                return self._send(200, {"resources": {"core": core, "search": core, "graphql": core}, "rate": core})
+            if path == "/user":
+                return self._send(200, {"login": "fake-user", "id": 1, "url": base + "/users/fake-user"})
+            if not path.startswith(repo_prefix):
+                return self._send(404, {"message": "Not Found"})
+            rest = path[len(repo_prefix):]
+            with repo.lock:
+                if rest in ("", "/"):
+                    return self._send(200, {"id": 1, "name": repo.full_name.split("/")[1], "full_name": repo.full_name,
+                                            "default_branch": repo.branch, "url": repo_url, "private": True,
+                                            "owner": {"login": repo.full_name.split("/")[0]}})
+                if rest.startswith("/contents"):
+                    return self._contents(rest[len("/contents"):].strip("/"), repo, repo_url)
+                if rest.startswith("/git/"):
+                    return self._git(rest[len("/git/"):], repo, repo_url)
+            return self._send(404, {"message": "Not Found"})
+
+        def _content_json(self, repo, repo_url, path, sha, with_content=True):
+            data = repo.blobs[sha]
+            entry = {"type": "file", "name": path.rsplit("/", 1)[-1], "path": path, "sha": sha, "size": len(data),
+                     "url": f"{repo_url}/contents/{path}", "git_url": f"{repo_url}/git/blobs/{sha}",
+                     "html_url": f"https://github.com/{repo.full_name}/blob/{repo.branch}/{path}",
+                     "download_url": None}
+            if with_content:
+                entry.update(encoding="base64", content=base64.b64encode(data).decode("ascii"))
+            return entry
+
+        def _contents(self, path, repo, repo_url):
+            tree = repo.head_tree()
+            ref = parse_qs(urlsplit(self.path).query).get("ref", [None])[0]
+            if ref and self.command == "GET":
+                commit = repo.refs.get(f"heads/{ref}", ref)
+                if commit not in repo.commits:
+                    return self._send(404, {"message": f"No commit found for the ref {ref}"})
+                tree = repo.trees[repo.commits[commit]["tree"]]
+            if self.command == "GET":
+                if path in tree:
+                    return self._send(200, self._content_json(repo, repo_url, path, tree[path]))
+                prefix = path + "/" if path else ""
+                children = {}
+                for p, sha in tree.items():
+                    if p.startswith(prefix):
+                        child = p[len(prefix):]
+                        if "/" in child:
+                            name = child.split("/", 1)[0]
+                            children[name] = {"type": "dir", "name": name, "path": prefix + name, "sha": _sha("dir", prefix + name),
+                                              "size": 0, "url": f"{repo_url}/contents/{prefix}{name}"}
+                        else:
+                            children[child] = self._content_json(repo, repo_url, p, sha, with_content=False)
+                if not children:
+                    return self._send(404, {"message": "Not Found"})
+                return self._send(200, [children[k] for k in sorted(children)])
+            body = self._body()
+            if self.command == "PUT":
+                if path in tree and body.get("sha") != tree[path]:
+                    return self._send(409 if body.get("sha") else 422, {"message": f"{path} does not match {body.get('sha')}"})
+                blob = repo.put_blob(base64.b64decode(body.get("content", "")))
+                commit = repo.commit_change(body.get("message", ""), put={path: blob})
+                status = 200 if path in tree else 201
+                return self._send(status, {"content": self._content_json(repo, repo_url, path, blob, with_content=False),
+                                           "commit": self._commit_json(repo, repo_url, commit)})
+            if self.command == "DELETE":
+                if path not in tree:
+                    return self._send(404, {"message": "Not Found"})
+                if body.get("sha") != tree[path]:
+                    return self._send(409, {"message": f"{path} does not match {body.get('sha')}"})
+                commit = repo.commit_change(body.get("message", ""), delete=[path])
+                return self._send(200, {"content": None, "commit": self._commit_json(repo, repo_url, commit)})
+            return self._send(405, {"message": "Method Not Allowed"})
+
+        def _commit_json(self, repo, repo_url, sha):
+            c = repo.commits[sha]
+            who = {"name": "fake", "email": "fake@example.com", "date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(c["date"]))}
+            return {"sha": sha, "url": f"{repo_url}/git/commits/{sha}", "html_url": f"https://github.com/{repo.full_name}/commit/{sha}",
+                    "message": c["message"], "author": who, "committer": who,
+                    "tree": {"sha": c["tree"], "url": f"{repo_url}/git/trees/{c['tree']}"},
+                    "parents": [{"sha": p, "url": f"{repo_url}/git/commits/{p}"} for p in c["parents"]]}
+
+        def _tree_json(self, repo, repo_url, sha):
+            entries = [{"path": p, "mode": "100644", "type": "blob", "sha": b, "size": len(repo.blobs[b]),
+                        "url": f"{repo_url}/git/blobs/{b}"} for p, b in sorted(repo.trees[sha].items())]
+            return {"sha": sha, "url": f"{repo_url}/git/trees/{sha}", "tree": entries, "truncated": False}
+
+        def _ref_json(self, repo_url, ref, sha):
+            return {"ref": f"refs/{ref}", "url": f"{repo_url}/git/refs/{ref}",
+                    "object": {"sha": sha, "type": "commit", "url": f"{repo_url}/git/commits/{sha}"}}
+
+        def _git(self, rest, repo, repo_url):
+            kind, _, name = rest.partition("/")
+            if kind in ("ref", "refs"):
+                if name not in repo.refs:
+                    return self._send(404, {"message": "Not Found"})
+                if self.command == "PATCH":
+                    body = self._body()
+                    new = body.get("sha")
+                    if new not in repo.commits:
+                        return self._send(422, {"message": "Object does not exist"})
+                    if not body.get("force") and repo.refs[name] not in repo.commits[new]["parents"]:
+                        return self._send(422, {"message": "Update is not a fast forward"})
+                    repo.refs[name] = new
+                return self._send(200, self._ref_json(repo_url, name, repo.refs[name]))
+            if kind == "commits":
+                if self.command == "POST":
+                    body = self._body()
+                    sha = repo.put_commit(body["tree"], body.get("parents", []), body.get("message", ""))
+                    return self._send(201, self._commit_json(repo, repo_url, sha))
+                if name not in repo.commits:
+                    return self._send(404, {"message": "Not Found"})
+                return self._send(200, self._commit_json(repo, repo_url, name))
+            if kind == "trees":
+                if self.command == "POST":
+                    body = self._body()
+                    entries = dict(repo.trees.get(body.get("base_tree"), {})) if body.get("base_tree") else {}
+                    for element in body.get("tree", []):
+                        if "content" in element:
+                            entries[element["path"]] = repo.put_blob(element["content"].encode("utf-8"))
+                        elif element.get("sha") is None:
+                            entries.pop(element["path"], None)
+                        else:
+                            entries[element["path"]] = element["sha"]
+                    return self._send(201, self._tree_json(repo, repo_url, repo.put_tree(entries)))
+                if name not in repo.trees:
+                    return self._send(404, {"message": "Not Found"})
+                return self._send(200, self._tree_json(repo, repo_url, name))
+            if kind == "blobs":
+                if self.command == "POST":
+                    body = self._body()
+                    data = body.get("content", "")
+                    data = base64.b64decode(data) if body.get("encoding") == "base64" else data.encode("utf-8")
+                    sha = repo.put_blob(data)
+                    return self._send(201, {"sha": sha, "url": f"{repo_url}/git/blobs/{sha}"})
+                if name not in repo.blobs:
+                    return self._send(404, {"message": "Not Found"})
+                data = repo.blobs[name]
+                return self._send(200, {"sha": name, "size": len(data), "encoding": "base64",
+                                        "content": base64.b64encode(data).decode("ascii"),
+                                        "url": f"{repo_url}/git/blobs/{name}"})
+            return self._send(404, {"message": "Not Found"})
+
+    return Handler
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local fake GitHub API for the procedures repo.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--repo", default="PNRELAB/RE_LAB_PROCEDURE")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    parser.add_argument("--rate-limit", type=int, default=5000)
+    args = parser.parse_args(argv)
+    fake = FakeGitHub(files={"tests.json": b"[]"}, full_name=args.repo, latency=args.latency, jitter=args.jitter,
+                      rate_limit=args.rate_limit, host=args.host, port=args.port)
+    print(f"fake GitHub API for {args.repo} on {fake.base_url} (RELAB_GITHUB_API_URL={fake.base_url})")
+    fake.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+if __name__ == "__main__":
+    main()
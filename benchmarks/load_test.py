@@ -0,0 +1,266 @@
+import argparse
+import importlib.util
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from relab import backends, config, instrument
+from relab.backends import build_backend, get_backend
+from relab.journal import set_actor
+from relab.scrubber import get_scrubber, stop_scrubbers
+from datasets import populate
+from run_benchmarks import DASHBOARD, percentile
+
+#------------------------------------------------------
+# CONCURRENT-SESSION LOAD TEST
+#------------------------------------------------------
+# python benchmarks/load_test.py --sessions 1,5,10,25,50,100 --duration 30
+# python benchmarks/load_test.py --mode app --sessions 1,5,10     (needs streamlit)
+#
+# Every simulated session reruns on the autorefresh period (--refresh, 5 s
+# like the dashboards) and now and then adds a procedure or edits the one it
+# added last. All sessions share one server process, as they would behind a
+# single `streamlit run`:
+#   --mode backend  a rerun is the dashboard's storage calls (list tests, load
+#                   the selected test for the edit/delete expanders and the
+#                   table, attachment status from the scrubber) on the
+#                   process-wide backend
+#   --mode app      a rerun is a full headless run of the 4.0 script (AppTest)
+#
+# For each N it reports rerun latency percentiles, process CPU (cores) and
+# RSS, storage operations per second, and lost updates: writes a session
+# made that are not in the store when the step ends. A step is "saturated"
+# when the reruns fall behind the autorefresh schedule.
+#
+# The served backend runs without the warm-start cache and scheduled
+# snapshots (nothing to keep from a throwaway dataset, and no files outside
+# the temporary work folder); the scrubbers it starts are stopped at the end.
+
+def rss_mb():
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+class OpCounter:
+    # Counts every instrumented storage op while a step runs
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.active = False
+
+    def __call__(self, kind, ms, session=None):
+        if not self.active or kind == "rerun" or kind.startswith("backend."):
+            return
+        with self.lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def start(self):
+        with self.lock:
+            self.counts = {}
+        self.active = True
+
+    def stop(self):
+        self.active = False
+        with self.lock:
+            return dict(self.counts)
+
+#------------------------------------------------------
+# SESSIONS
+#------------------------------------------------------
+def backend_rerun(backend, test_name):
+    tests = backend.load_tests()
+    for _ in range(3):
+        procedures = backend.load_procedures(test_name) if test_name in tests else []
+    scrubber = get_scrubber(backend)
+    for proc in procedures:
+        if proc.attachment is not None:
+            scrubber.exists(proc.attachment.path)
+
+def app_rerun_factory():
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(DASHBOARD, default_timeout=120)
+    return at.run
+
+class Session(threading.Thread):
+    def __init__(self, index, names, args, stop_at, rerun):
+        super().__init__(name=f"load-session-{index}", daemon=True)
+        self.index = index
+        self.rng = random.Random(index)
+        self.test_name = self.rng.choice(names)
+        self.args = args
+        self.stop_at = stop_at
+        self.rerun = rerun
+        self.latencies = []
+        self.expected = {}  # text -> test
+        self.errors = 0
+        self.writes = 0
+
+    def write(self, backend):
+        last = next(reversed(self.expected), None)
+        if last is not None and self.rng.random() < 0.3:
+            procs = backend.load_procedures(self.expected[last])
+            texts = [p.text for p in procs]
+            if last in texts:
+                edited = last + " (edited)"
+                backend.edit_procedure(self.expected[last], texts.index(last), edited, None)
+                self.expected[edited] = self.expected.pop(last)
+                self.writes += 1
+                return
+        text = f"load s{self.index} w{self.writes} {time.time_ns()}"
+        backend.add_procedure(self.test_name, text, "https://example.com/load")
+        self.expected[text] = self.test_name
+        self.writes += 1
+
+    def run(self):
+        set_actor(f"load-session-{self.index}")  # the write rate limit is per session
+        backend = get_backend("local")
+        # Spread the first reruns over one period like real browsers
+        next_run = time.monotonic() + self.rng.random() * self.args.refresh
+        while True:
+            delay = next_run - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            if time.monotonic() >= self.stop_at:
+                return
+            next_run += self.args.refresh
+            trace = instrument.begin_rerun(f"load-{self.index}")
+            start = time.perf_counter()
+            try:
+                self.rerun(backend, self.test_name)
+                if self.rng.random() < self.args.write_prob:
+                    self.write(backend)
+            except Exception:
+                self.errors += 1
+            self.latencies.append((time.perf_counter() - start) * 1000)
+            instrument.end_rerun(trace)
+
+#------------------------------------------------------
+# DRIVER
+#------------------------------------------------------
+def run_step(n, names, args, counter):
+    if args.mode == "app":
+        reruns = [app_rerun_factory() for _ in range(n)]
+        rerun_for = lambda i: (lambda backend, test_name: reruns[i]())
+    else:
+        rerun_for = lambda i: backend_rerun
+    stop_at = time.monotonic() + args.duration
+    sessions = [Session(i, names, args, stop_at, rerun_for(i)) for i in range(n)]
+    counter.start()
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for s in sessions:
+        s.start()
+    peak_rss = rss_mb()
+    while any(s.is_alive() for s in sessions):
+        time.sleep(0.5)
+        peak_rss = max(peak_rss, rss_mb())
+    wall = time.perf_counter() - wall0
+    cpu = time.process_time() - cpu0
+    ops = counter.stop()
+
+    latencies = [ms for s in sessions for ms in s.latencies]
+    reruns = len(latencies)
+    scheduled = n * args.duration / args.refresh
+    check = build_backend("local", shared_folder=args.workdir, cache_ttl=0, batch_delay=0, instrument=False)
+    stored = {}
+    lost = 0
+    for s in sessions:
+        for text, test_name in s.expected.items():
+            if test_name not in stored:
+                stored[test_name] = {p.text for p in check.get_procedures(test_name)}
+            lost += text not in stored[test_name]
+    result = {
+        "sessions": n, "reruns": reruns, "reruns_per_s": round(reruns / wall, 2),
+        "scheduled_reruns": round(scheduled), "errors": sum(s.errors for s in sessions),
+        "cpu_cores": round(cpu / wall, 3), "peak_rss_mb": round(peak_rss, 1),
+        "storage_ops_per_s": round(sum(ops.values()) / wall, 1), "storage_ops": ops,
+        "writes": sum(s.writes for s in sessions), "lost_updates": lost,
+    }
+    if latencies:
+        result.update(p50_ms=round(statistics.median(latencies), 2), p95_ms=round(percentile(latencies, 95), 2),
+                      p99_ms=round(percentile(latencies, 99), 2), max_ms=round(max(latencies), 2))
+    # Behind schedule: fewer reruns than the autorefresh asks for, or reruns
+    # slower than the period itself
+    result["saturated"] = reruns < 0.9 * scheduled or result.get("p95_ms", 0) > args.refresh * 1000
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate N concurrent dashboard sessions against one server process.")
+    parser.add_argument("--sessions", default="1,2,5,10,20,50,100", help="comma separated session counts")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per session count")
+    parser.add_argument("--refresh", type=float, default=5.0, help="autorefresh period in seconds")
+    parser.add_argument("--write-prob", type=float, default=0.05, help="chance a rerun also adds/edits a procedure")
+    parser.add_argument("--tests", type=int, default=50)
+    parser.add_argument("--procedures", type=int, default=100)
+    parser.add_argument("--mode", choices=["backend", "app"], default="backend")
+    parser.add_argument("--cache-ttl", type=float, default=None, help="override RELAB_CACHE_TTL for the served backend")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args(argv)
+    if args.mode == "app" and importlib.util.find_spec("streamlit") is None:
+        parser.error("--mode app needs streamlit installed")
+
+    args.workdir = tempfile.mkdtemp(prefix="relab-load-")
+    config.set_shared_folder(args.workdir)
+    config.METRICS_PORT = 0
+    config.WARM_CACHE = False
+    config.SNAPSHOT_INTERVAL = 0
+    if args.cache_ttl is not None:
+        config.CACHE_TTL["local"] = args.cache_ttl
+        config.SHARED_CACHE_TTL = 0  # the override applies with shared invalidation on too
+    backends.reset_backends()
+    counter = OpCounter()
+    instrument.add_observer(counter)
+    results = []
+    try:
+        names = populate(build_backend("local", shared_folder=args.workdir, cache_ttl=0, batch_delay=0),
+                         args.tests, args.procedures, attachments=True, attachment_dir=config.PROCEDURES_FOLDER)
+        print(f"{'N':>4} {'reruns/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'cpu':>6} {'rss MB':>7} {'ops/s':>8} {'writes':>7} {'lost':>5}",
+              file=sys.stderr)
+        for n in [int(x) for x in args.sessions.split(",")]:
+            r = run_step(n, names, args, counter)
+            results.append(r)
+            print(f"{n:>4} {r['reruns_per_s']:>9} {r.get('p50_ms', '-'):>8} {r.get('p95_ms', '-'):>8} {r.get('p99_ms', '-'):>8} "
+                  f"{r['cpu_cores']:>6} {r['peak_rss_mb']:>7} {r['storage_ops_per_s']:>8} {r['writes']:>7} {r['lost_updates']:>5}"
+                  f"{'  SATURATED' if r['saturated'] else ''}", file=sys.stderr)
+    finally:
+        stop_scrubbers()
+        backends.reset_backends()
+        shutil.rmtree(args.workdir, ignore_errors=True)
+    saturated = next((r["sessions"] for r in results if r["saturated"]), None)
+    report = {"meta": {"mode": args.mode, "refresh_s": args.refresh, "duration_s": args.duration,
+                       "tests": args.tests, "procedures": args.procedures, "write_prob": args.write_prob},
+              "saturates_at": saturated, "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
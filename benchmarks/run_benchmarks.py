@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from relab import backends, config
+from relab.backends import build_backend
+from datasets import populate
+
+#------------------------------------------------------
+# DASHBOARD BENCHMARK SUITE
+#------------------------------------------------------
+# python benchmarks/run_benchmarks.py --tests 10,1000 --procedures 10,500 --output results.json
+# python benchmarks/run_benchmarks.py --compare results.json      (regressions vs. a saved run)
+#
+# For every catalog size (tests x procedures, with and without attachments)
+# and backend it measures load_tests, load_procedures (raw and cached),
+# add/edit/delete latency, backup/restore (local only) and, when Streamlit
+# is installed, a full rerun of the dashboard script through AppTest.
+
+DASHBOARD = os.path.join(ROOT, "enhanced streamlit procedure dashboard 4.0.py")
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def summary(metric, samples, **tags):
+    return dict(tags, metric=metric, n=len(samples),
+                median_ms=round(statistics.median(samples), 3),
+                p95_ms=round(percentile(samples, 95), 3),
+                max_ms=round(max(samples), 3))
+
+#------------------------------------------------------
+# SCENARIOS
+#------------------------------------------------------
+def bench_backend(backend, cached, names, repeat, tags):
+    results = [summary("load_tests", timed(backend.list_tests, repeat), **tags)]
+    sample = names[:: max(1, len(names) // 20)][:20]
+    samples = []
+    for test_name in sample:
+        samples += timed(lambda: backend.get_procedures(test_name), max(1, repeat // 4))
+    results.append(summary("load_procedures", samples, **tags))
+    for test_name in sample:
+        cached.get_procedures(test_name)
+    samples = []
+    for test_name in sample:
+        samples += timed(lambda: cached.get_procedures(test_name), max(1, repeat // 4))
+    results.append(summary("load_procedures_cached", samples, **tags))
+
+    target = names[0]
+    add, edit, delete = [], [], []
+    for i in range(repeat):
+        add += timed(lambda: backend.add_procedure(target, f"bench procedure {i}", "https://example.com"), 1)
+        index = len(backend.get_procedures(target)) - 1
+        edit += timed(lambda: backend.edit_procedure(target, index, f"bench procedure {i} (edited)", None), 1)
+        delete += timed(lambda: backend.delete_procedure(target, index), 1)
+    results += [summary("add_procedure", add, **tags), summary("edit_procedure", edit, **tags),
+                summary("delete_procedure", delete, **tags)]
+    return results
+
+def bench_backup(shared_folder, repeat, tags):
+    from relab.backup import create_backup, restore_backup
+
+    zip_path = os.path.join(tempfile.mkdtemp(prefix="relab-bench-zip-"), "backup.zip")
+    results = [summary("backup", timed(lambda: create_backup(zip_path), max(1, repeat // 5)), **tags)]
+    results.append(summary("restore", timed(lambda: restore_backup(zip_path), max(1, repeat // 5)), **tags))
+    shutil.rmtree(os.path.dirname(zip_path), ignore_errors=True)
+    return results
+
+def bench_rerun(repeat, tags):
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return [dict(tags, metric="rerun", skipped="streamlit not installed")]
+    backends.reset_backends()
+    at = AppTest.from_file(DASHBOARD, default_timeout=120)
+    at.run()
+    if at.exception:
+        return [dict(tags, metric="rerun", skipped=f"script error: {at.exception[0].message}")]
+    return [summary("rerun", timed(at.run, max(1, repeat // 2)), **tags)]
+
+#------------------------------------------------------
+# DRIVER
+#------------------------------------------------------
+def run(sizes, backend_names, repeat, attachment_modes):
+    results = []
+    for tests, procedures in sizes:
+        for attachments in attachment_modes:
+            for name in backend_names:
+                tags = {"backend": name, "tests": tests, "procedures": procedures, "attachments": attachments}
+                print(f"  {name:<7} {tests:>6} tests x {procedures:>5} procedures{' + files' if attachments else ''}", file=sys.stderr)
+                workdir = tempfile.mkdtemp(prefix="relab-bench-")
+                try:
+                    if name == "local":
+                        config.set_shared_folder(workdir)
+                        backend = build_backend("local", shared_folder=workdir, cache_ttl=0, batch_delay=0)
+                        cached = build_backend("local", shared_folder=workdir, cache_ttl=60, batch_delay=0)
+                        attachment_dir = config.PROCEDURES_FOLDER
+                    else:
+                        backend = build_backend("memory", cache_ttl=0, batch_delay=0)
+                        cached = backends.CachingBackend(backend, ttl=60)
+                        attachment_dir = None
+                    start = time.perf_counter()
+                    names = populate(backend, tests, procedures, attachments, attachment_dir)
+                    results.append(dict(tags, metric="populate", seconds=round(time.perf_counter() - start, 3)))
+                    results += bench_backend(backend, cached, names, repeat, tags)
+                    if name == "local":
+                        results += bench_backup(workdir, repeat, tags)
+                        results += bench_rerun(repeat, tags)
+                finally:
+                    shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    key = lambda r: (r["backend"], r["tests"], r["procedures"], r["attachments"], r["metric"])
+    old = {key(r): r for r in baseline if "median_ms" in r}
+    regressions = 0
+    print(f"{'metric':<24} {'backend':<7} {'size':>14} {'before ms':>10} {'after ms':>10} {'change':>8}")
+    for r in results:
+        before = old.get(key(r))
+        if before is None or "median_ms" not in r:
+            continue
+        change = (r["median_ms"] - before["median_ms"]) / before["median_ms"] if before["median_ms"] else 0.0
+        flag = " !" if change > threshold else ""
+        regressions += bool(flag)
+        size = f"{r['tests']}x{r['procedures']}{'+f' if r['attachments'] else ''}"
+        print(f"{r['metric']:<24} {r['backend']:<7} {size:>14} {before['median_ms']:>10} {r['median_ms']:>10} {change:>+8.0%}{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the procedure dashboard storage paths on synthetic catalogs.")
+    parser.add_argument("--tests", default="10,1000", help="comma separated test counts (e.g. 10,1000,10000)")
+    parser.add_argument("--procedures", default="10,500", help="comma separated procedures per test (e.g. 10,500,5000)")
+    parser.add_argument("--backends", default="memory,local", help="comma separated: memory, local")
+    parser.add_argument("--attachments", choices=["no", "yes", "both"], default="both")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="flag metrics slower by more than this fraction")
+    args = parser.parse_args(argv)
+
+    sizes = [(int(t), int(p)) for t in args.tests.split(",") for p in args.procedures.split(",")]
+    modes = {"no": [False], "yes": [True], "both": [False, True]}[args.attachments]
+    results = run(sizes, args.backends.split(","), args.repeat, modes)
+    report = {
+        "meta": {"revision": git_revision(), "python": platform.python_version(), "platform": platform.platform(),
+                 "repeat": args.repeat, "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,105 +1,59 @@
 import streamlit as st
 import os
-import json
-from pathlib import Path
 from streamlit_autorefresh import st_autorefresh
 from datetime import datetime
-import zipfile
+from relab import config
+from relab.backends import get_backend, action_nonce, action_done, WriteRateLimited
+from relab.locking import LockTimeout, WriteConflict
+from relab.storage import ensure_folders, save_upload
+from relab.sharepoint import attachment_url
+from relab.overview import backend_overview, filter_rows, sort_rows, format_change, SORT_OPTIONS
+from relab.tags import get_tag_index
+from relab.scrubber import get_scrubber
+from relab.snapshots import get_snapshotter
+from relab.jobs import get_job_runner, FINISHED
+from relab.instrument import timed
+from relab.debug_panel import begin_rerun, end_rerun, render_debug_panel
+from relab.metrics import start_metrics_server
+from relab.journal import set_actor, streamlit_actor
+
+rerun_trace = begin_rerun()
+set_actor(streamlit_actor())  # recorded in the change journal with every edit
 
 #-------------------------------------------------------
-# CONFIGURATION - update these paths to match your PC
+# CONFIGURATION - paths live in relab/config.py (or set RELAB_SHARED_FOLDER)
 #------------------------------------------------------
-SHARED_FOLDER = r"C:\Users\1000329829\OneDrive - Western Digital\RE_LAB_PROCEDURE"
-TESTS_FILE = os.path.join(SHARED_FOLDER, "tests.json")
-PROCEDURES_FOLDER = os.path.join(SHARED_FOLDER, "TestProcedures")
-os.makedirs(PROCEDURES_FOLDER, exist_ok=True)
+PROCEDURES_FOLDER = config.PROCEDURES_FOLDER
+ensure_folders()
+backend = get_backend("local")
+start_metrics_server()  # once per process, see RELAB_METRICS_PORT
+tag_index = get_tag_index(backend)  # tag -> procedures, indexed per test and re-checked against its version
 
-#------------------------------------------------------
-# HELPER FUNCTION: Convert local path -> SharePoint URL
-#------------------------------------------------------
-def local_to_sharepoint(local_path):
-    base_local = r"C:\Users\1000329829\OneDrive - Western Digital"
-    base_sharepoint = "https://sharedspace-my.sharepoint.com/:f:/r/personal/deveepria_sankaran_wdc_com/Documents/RE_LAB_PROCEDURE?csf=1&web=1&e=OymaqI"
-    norm_local = os.path.normpath(local_path)
-    norm_base_local = os.path.normpath(base_local)
-    if norm_local.startswith(norm_base_local):
-        rel = norm_local[len(norm_base_local):].lstrip(r"\\/") 
-        url = base_sharepoint.rstrip("/") + "/" + rel.replace("\\", "/")
-        return url
-    return local_path
-
-#--------------------------------------------------------
-# JSON READ/WRITE
-#------------------------------------------------------
-def read_json(file_path):
-    if not os.path.exists(file_path):
-        return []
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
-    
-def write_json(file_path, data):
-    temp_file = file_path + ".tmp"
-    with open(temp_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4)
-    os.replace(temp_file, file_path)
-
-#-----------------------------------------------------
-# TEST MANAGEMENT
-#-----------------------------------------------------
-def load_tests():
-    return read_json(TESTS_FILE)
-
-def add_test(test_name):
-    if not test_name:
-        return
-    tests = load_tests()
-    if test_name not in tests:
-        tests.append(test_name)
-        write_json(TESTS_FILE, tests)
-        proc_file = os.path.join(PROCEDURES_FOLDER, f"{test_name}_procedures.json")
-        write_json(proc_file, [])
-
-def delete_test(test_name):
-    tests = load_tests()
-    if test_name in tests:
-        tests.remove(test_name)
-        write_json(TESTS_FILE, tests)
-        proc_file = os.path.join(PROCEDURES_FOLDER, f"{test_name}_procedures.json")
-        if os.path.exists(proc_file):
-            os.remove(proc_file)
+#-------------------------------------------------
+# ATTACHMENT STATUS CACHE (background scrubber, one per server process)
+#-------------------------------------------------
+scrubber = get_scrubber(backend)
+snapshotter = get_snapshotter(backend)  # deduplicated snapshots, see RELAB_SNAPSHOT_INTERVAL
+job_runner = get_job_runner(backend)  # backup/restore/maintenance off the rerun, see RELAB_JOB_WORKERS
 
-#------------------------------------------------------
-# PROCEDURE MANAGEMENT
-#--------------------------------------------------------
-
-def load_procedures(test_name):
-    proc_file = os.path.join(PROCEDURES_FOLDER, f"{test_name}_procedures.json")
-    return read_json(proc_file)
-
-def add_procedure(test_name, procedure_text, procedure_link=""):
-    if not test_name or not procedure_text:
-        return
-    proc_file = os.path.join(PROCEDURES_FOLDER, f"{test_name}_procedures.json")
-    procedures = read_json(proc_file) or []
-    procedures.append({"text": procedure_text, "link": procedure_link})
-    write_json(proc_file, procedures)
-
-def delete_procedure(test_name, index):
-    proc_file = os.path.join(PROCEDURES_FOLDER, f"{test_name}_procedures.json")
-    procedures = read_json(proc_file) or []
-    if 0 <= index < len(procedures):
-        procedures.pop(index)
-        write_json(proc_file, procedures)
-
-def edit_procedure(test_name, index, new_text=None, new_link=None):
-    proc_file = os.path.join(PROCEDURES_FOLDER, f"{test_name}_procedures.json")
-    procedures = read_json(proc_file) or []
-    if 0 <= index < len(procedures):
-        if new_text is not None:
-            procedures[index]["text"] = new_text
-        if new_link is not None:
-            procedures[index]["link"] = new_link
-        write_json(proc_file, procedures)
+#-------------------------------------------------
+# BUTTON WRITES - idempotent per user action, rate limited per session
+#-------------------------------------------------
+def run_write(action, *args):
+    # Each click gets a nonce kept in the session until its write commits: a
+    # retry or a replayed rerun of it is applied once, the next click again
+    pending = st.session_state.setdefault("pending_writes", {})
+    try:
+        getattr(backend, action)(*args, key=action_nonce(pending, action, *args))
+        action_done(pending, action, *args)
+        return True
+    except WriteRateLimited as e:
+        st.warning(f"⏳ {e}")
+        return False
+    except (WriteConflict, LockTimeout):
+        # Lock held too long or the file kept changing under us: nothing was written
+        st.warning("✋ Someone else was editing at the same time, please retry.")
+        return False
 
 #-------------------------------------------------
 # STREAMLIT DASHBOARD
@@ -117,14 +71,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 st.markdown('<div class="header-bar">RE Lab Test Procedures</div>', unsafe_allow_html=True)
 
-# Track last procedures for highlights
-if "last_procs" not in st.session_state:
-    st.session_state.last_procs = {}
-
 #------------------SIDEBAR-----------------
 with st.sidebar:
+    view = st.radio("View", ["📋 Procedures", "📊 Lab Overview"], horizontal=True, key="view")
+
     st.subheader("🔹 Tests Management")
-    tests = load_tests()
+    tests = backend.load_tests()
     selected_test = st.selectbox("Select Test", options=tests if tests else ["<No tests yet>"])
     if selected_test == "<No tests yet>":
         selected_test = None
@@ -133,15 +85,15 @@ with st.sidebar:
     with st.expander("➕ Add New Test"):
         new_test_name = st.text_input("Test Name")
         if st.button("Add Test", key="add_test"):
-            add_test(new_test_name)
-            st.session_state["refresh_needed"] = True
+            if run_write("add_test", new_test_name):
+                st.session_state["refresh_needed"] = True
 
     # Delete Test
     with st.expander("🗑️ Delete Test"):
         if selected_test:
             if st.button(f"Delete '{selected_test}' Test", key="del_test"):
-                delete_test(selected_test)
-                st.session_state["refresh_needed"] = True
+                if run_write("delete_test", selected_test):
+                    st.session_state["refresh_needed"] = True
 
     st.markdown("---")
     st.subheader("🔹 Procedure Actions")
@@ -150,134 +102,214 @@ with st.sidebar:
     with st.expander("➕ Add Procedure"):
         new_proc = st.text_input("Procedure Description")
         new_link = st.text_input("Procedure Link (URL, SharePoint, etc.)")
+        new_tags = st.text_input("Tags (optional)", placeholder="equipment:HAST-01, stage:qual, rev:B", key="add_tags")
         uploaded_file = st.file_uploader("Or upload a file", type=["pdf","docx","doc"], key="add_upload")
 
         if st.button("Add Procedure", key="add_proc") and selected_test and new_proc:
             link_to_save = new_link
             if uploaded_file is not None:
-                save_path = os.path.join(PROCEDURES_FOLDER, f"{selected_test}_{uploaded_file.name}")
-                with open(save_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-                link_to_save = {"type":"file","path":save_path,"name":uploaded_file.name,"url":local_to_sharepoint(save_path)}
-            add_procedure(selected_test, new_proc, link_to_save)
-            st.session_state["refresh_needed"] = True
+                link_to_save = save_upload(selected_test, uploaded_file)
+                scrubber.check(link_to_save["path"])
+            if run_write("add_procedure", selected_test, new_proc, link_to_save, new_tags):
+                st.session_state["refresh_needed"] = True
 
     # Edit Procedure
     with st.expander("✏️ Edit Procedure"):
-        procedures = load_procedures(selected_test) if selected_test else []
+        procedures = backend.load_procedures(selected_test) if selected_test else []
         if procedures:
-            proc_options = [p["text"] if isinstance(p, dict) else str(p) for p in procedures]
+            proc_options = [p.text for p in procedures]
             proc_to_edit = st.selectbox("Select procedure to edit", proc_options, key="proc_to_edit")
             if proc_to_edit:
                 idx = proc_options.index(proc_to_edit)
                 current_proc = procedures[idx]
-                current_text = current_proc.get("text","") if isinstance(current_proc, dict) else current_proc
-                current_link = ""
-                if isinstance(current_proc, dict):
-                    if isinstance(current_proc.get("link"), dict):
-                        current_link = current_proc["link"].get("url","") or current_proc["link"].get("path","")
-                    elif isinstance(current_proc.get("link"), str):
-                        current_link = current_proc["link"]
+                current_text = current_proc.text
+                current_link = current_proc.link_text
 
                 new_text = st.text_input("Update Description", value=current_text)
                 new_link = st.text_input("Update Link (URL, SharePoint, etc.)", value=current_link)
+                new_tags = st.text_input("Update Tags", value=", ".join(current_proc.tags), key="edit_tags")
                 uploaded_file = st.file_uploader("Or upload new file", type=["pdf","docx","doc"], key="edit_file")
 
                 if st.button("Save Changes", key="save_edit"):
                     link_to_save = new_link
                     if uploaded_file is not None:
-                        save_path = os.path.join(PROCEDURES_FOLDER, f"{selected_test}_{uploaded_file.name}")
-                        with open(save_path,"wb") as f:
-                            f.write(uploaded_file.getbuffer())
-                        link_to_save = {"type":"file","path":save_path,"name":uploaded_file.name,"url":local_to_sharepoint(save_path)}
-                    edit_procedure(selected_test, idx, new_text, link_to_save)
-                    st.success("Procedure updated successfully ✅")
-                    st.session_state["refresh_needed"] = True
+                        link_to_save = save_upload(selected_test, uploaded_file)
+                        scrubber.check(link_to_save["path"])
+                    if run_write("edit_procedure", selected_test, idx, new_text, link_to_save, new_tags):
+                        st.success("Procedure updated successfully ✅")
+                        st.session_state["refresh_needed"] = True
 
     # Delete Procedure
     with st.expander("🗑️ Delete Procedure"):
-        procedures = load_procedures(selected_test) if selected_test else []
+        procedures = backend.load_procedures(selected_test) if selected_test else []
         if procedures:
-            proc_options = [p["text"] if isinstance(p, dict) else str(p) for p in procedures]
+            proc_options = [p.text for p in procedures]
             del_proc = st.selectbox("Select procedure to delete", proc_options, key="del_proc")
             idx_del = proc_options.index(del_proc) if del_proc else None
             if st.button("Delete Procedure", key="del_proc_btn") and idx_del is not None:
-                delete_procedure(selected_test, idx_del)
-                st.session_state["refresh_needed"] = True
+                if run_write("delete_procedure", selected_test, idx_del):
+                    st.session_state["refresh_needed"] = True
 
     st.markdown("---")
     st.subheader("💾 Backup & Restore")
 
-    # Backup
-    if st.button("Download Backup"):
-        backup_zip_path = os.path.join(SHARED_FOLDER, "RE_LAB_Backup.zip")
-        with zipfile.ZipFile(backup_zip_path, "w") as zipf:
-            if os.path.exists(TESTS_FILE):
-                zipf.write(TESTS_FILE, arcname="tests.json")
-            for root, dirs, files in os.walk(PROCEDURES_FOLDER):
-                for file in files:
-                    zipf.write(os.path.join(root,file), arcname=os.path.join("TestProcedures", file))
-        with open(backup_zip_path, "rb") as f:
-            st.download_button("⬇️ Download Backup", f, file_name="RE_LAB_Backup.zip")
+    # Backup and restore run as background jobs; the list below polls them
+    if st.button("Create Backup", key="backup_btn"):
+        job_runner.submit("backup")
 
     # Restore Backup
     uploaded_backup = st.file_uploader("Upload Backup ZIP", type=["zip"], key="restore_backup")
     if uploaded_backup is not None:
         if st.button("Restore Backup", key="restore_backup_btn"):
-            try:
-                with zipfile.ZipFile(uploaded_backup) as zipf:
-                    for member in zipf.namelist():
-                        if member == "tests.json":
-                            dest_path = TESTS_FILE
-                        else:
-                            dest_path = os.path.join(SHARED_FOLDER, member)
-                            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                        with open(dest_path, "wb") as f:
-                            f.write(zipf.read(member))
-                st.success("Backup restored successfully! ✅")
-                st.session_state["refresh_needed"] = True
-            except Exception as e:
-                st.error(f"Failed to restore backup: {e}")
+            job_runner.submit("restore", {"path": job_runner.save_upload(uploaded_backup), "name": uploaded_backup.name})
+
+    # Maintenance
+    with st.expander("🛠️ Maintenance"):
+        m1, m2, m3 = st.columns(3)
+        if m1.button("Re-index", key="job_reindex"):
+            job_runner.submit("reindex")
+        if m2.button("Scrub files", key="job_scrub"):
+            job_runner.submit("scrub")
+        if m3.button("Migrate", key="job_migrate"):
+            job_runner.submit("migrate")
+
+    # Jobs (any user, any server)
+    for job in job_runner.list(limit=5):
+        progress = job["progress"]
+        label = f"{job['kind'].replace('_', ' ').capitalize()} · {job['status']} · {datetime.fromtimestamp(job['created']):%H:%M}"
+        if job["status"] not in FINISHED:
+            fraction = progress["bytes_done"] / progress["bytes_total"] if progress["bytes_total"] else \
+                       progress["files_done"] / progress["files_total"] if progress["files_total"] else 0.0
+            st.progress(min(fraction, 1.0), text=f"{label} · {progress['files_done']}/{progress['files_total'] or '?'} files")
+            if st.button("Cancel", key=f"cancel_{job['id']}"):
+                job_runner.cancel(job["id"])
+        elif job["status"] == "done":
+            st.caption(f"✅ {label}")
+            zip_path = (job["result"] or {}).get("zip")
+            if zip_path and os.path.exists(zip_path):
+                with open(zip_path, "rb") as f:
+                    st.download_button("⬇️ Download Backup", f, file_name="RE_LAB_Backup.zip", key=f"download_{job['id']}")
+        else:
+            st.caption(f"⚠️ {label} {job['error'] or ''}")
+
+    # Point-in-time snapshots (taken automatically, shared chunks); manual
+    # snapshots and restores are jobs too and show up in the list above
+    with st.expander("🕒 Snapshots"):
+        snapshots = snapshotter.store.list()
+        if st.button("Take snapshot now", key="snapshot_now"):
+            job_runner.submit("snapshot", {"note": "manual"})
+        if snapshots:
+            labels = {s["id"]: f"{datetime.fromtimestamp(s['created']):%Y-%m-%d %H:%M} · {len(s['tests'])} tests · {s['note']}"
+                      for s in snapshots}
+            snapshot_id = st.selectbox("Snapshot", list(labels), format_func=labels.get, key="snapshot_id")
+            c1, c2 = st.columns(2)
+            if selected_test and c1.button("Restore this test", key="snapshot_restore_test"):
+                job_runner.submit("snapshot_restore", {"snapshot": snapshot_id, "test": selected_test})
+            if c2.button("Restore all tests", key="snapshot_restore_all"):
+                job_runner.submit("snapshot_restore", {"snapshot": snapshot_id})
+        else:
+            st.caption("No snapshots yet.")
+
+#-------MAIN AREA: Lab Overview-----------------
+if view == "📊 Lab Overview":
+    st.subheader("Lab Overview")
+    overview_rows = backend_overview(backend, tests, file_exists=scrubber.exists)
+    missing_counts = scrubber.missing_by_test()
+    overview_rows = [dict(r, missing_files=missing_counts.get(r["test"], r["missing_files"])) for r in overview_rows]
+    f1, f2, f3, f4 = st.columns([3,2,1,1])
+    name_filter = f1.text_input("Filter tests", key="ov_filter")
+    sort_by = f2.selectbox("Sort by", list(SORT_OPTIONS), key="ov_sort")
+    missing_only = f3.checkbox("Missing files only", key="ov_missing")
+    changed_only = f4.checkbox("Changed only", key="ov_changed")
+    overview_rows = sort_rows(filter_rows(overview_rows, name_filter, missing_only, changed_only), sort_by)
+    if overview_rows:
+        st.dataframe([{
+            "Test": r["test"],
+            "Procedures": r["procedures"],
+            "Attachments": r["attachments"],
+            "Missing files": r["missing_files"],
+            "Last changed": datetime.fromtimestamp(r["last_changed"]).strftime("%Y-%m-%d %H:%M") if r["last_changed"] else "",
+            "Recent changes": format_change(r),
+        } for r in overview_rows], use_container_width=True, hide_index=True)
+    else:
+        st.info("No tests match the current filters.")
+
+    with st.expander("🧹 Attachment integrity report"):
+        report = scrubber.report()
+        if report["last_scrub"]:
+            st.caption(f"Last scrub: {datetime.fromtimestamp(report['last_scrub']).strftime('%Y-%m-%d %H:%M:%S')}")
+        else:
+            st.caption("First scrub still running...")
+        st.markdown(f"**Dangling links** ({len(report['dangling'])})")
+        if report["dangling"]:
+            st.dataframe(report["dangling"], use_container_width=True, hide_index=True)
+        st.markdown(f"**Orphaned files** ({len(report['orphaned'])})")
+        if report["orphaned"]:
+            st.dataframe([{"path": p} for p in report["orphaned"]], use_container_width=True, hide_index=True)
+        if st.button("Re-scan now", key="scrub_now"):
+            scrubber.wake()
 
 #-------MAIN AREA: Procedures Table------------
-st.subheader(f"Procedures for: {selected_test if selected_test else 'None'}")
-procedures = load_procedures(selected_test) if selected_test else []
-old_procs = st.session_state.last_procs.get(selected_test, [])
-
-if procedures:
-    for idx, proc in enumerate(procedures):
-        col1, col2 = st.columns([4,2])
-        row_class = "proc-row"
-        text = proc.get("text","") if isinstance(proc, dict) else proc
-        link = proc.get("link","") if isinstance(proc, dict) else ""
-
-        if proc not in old_procs:
-            col1.markdown(f"<span style='background-color: #fff176; padding:2px; border-radius:4px;'>{text} 🔔</span>", unsafe_allow_html=True)
-        else:
-            col1.markdown(f"<div class='{row_class}'>{text}</div>", unsafe_allow_html=True)
-
-        if isinstance(link, dict) and link.get("type") == "file":
-            file_path = link.get("path")
-            file_name = link.get("name","file")
-            share_url = link.get("url")
-            if file_path and os.path.exists(file_path):
-                with open(file_path,"rb") as f:
-                    col2.download_button(label=f"⬇️ Download {file_name}", data=f, file_name=file_name)
-                if share_url:
+else:
+    st.subheader(f"Procedures for: {selected_test if selected_test else 'None'}")
+    procedures = backend.load_procedures(selected_test) if selected_test else []
+    # Highlight what anyone added or edited recently, from the change journal
+    recent_texts = backend.journal.recent_texts(selected_test, config.HIGHLIGHT_HOURS * 3600) if selected_test else set()
+
+    # Facet filter: values of one facet OR-ed, facets AND-ed ("all") or OR-ed ("any")
+    facet_counts = tag_index.counts(selected_test) if selected_test else {}
+    shown = None
+    if facet_counts:
+        with st.expander("🏷️ Filter by tags"):
+            facet_cols = st.columns(min(len(facet_counts), 4))
+            selected_facets = {}
+            for i, (facet, values) in enumerate(facet_counts.items()):
+                selected_facets[facet] = set(facet_cols[i % len(facet_cols)].multiselect(
+                    facet.capitalize(), list(values), format_func=lambda v, c=values: f"{v} ({c[v]})", key=f"facet_{facet}"))
+            match_mode = st.radio("Match", ["all", "any"], horizontal=True, key="facet_mode",
+                                  format_func={"all": "All selected facets", "any": "Any selected facet"}.get)
+        shown = tag_index.match(selected_facets, match_mode, selected_test)
+
+    if procedures:
+        for idx, proc in enumerate(procedures):
+            if shown is not None and (selected_test, idx) not in shown:
+                continue
+            col1, col2 = st.columns([4,2])
+            row_class = "proc-row"
+            text = proc.text
+            attachment = proc.attachment
+
+            if proc.text in recent_texts:
+                col1.markdown(f"<span style='background-color: #fff176; padding:2px; border-radius:4px;'>{text} 🔔</span>", unsafe_allow_html=True)
+            else:
+                col1.markdown(f"<div class='{row_class}'>{text}</div>", unsafe_allow_html=True)
+            if proc.tags:
+                col1.caption(" · ".join(proc.tags))
+
+            if attachment is not None:
+                file_path = attachment.path
+                file_name = attachment.name
+                share_url = attachment_url(attachment)  # mapped now, not the URL frozen at upload
+                f = scrubber.open(file_path)
+                if f is not None:
+                    with timed("attachment_read", file_path, selected_test), f:
+                        col2.download_button(label=f"⬇️ Download {file_name}", data=f, file_name=file_name)
+                    if share_url:
+                        col2.markdown(f"[🔗 Open in SharePoint]({share_url})", unsafe_allow_html=True)
+                elif share_url:
                     col2.markdown(f"[🔗 Open in SharePoint]({share_url})", unsafe_allow_html=True)
-            elif share_url:
-                col2.markdown(f"[🔗 Open in SharePoint]({share_url})", unsafe_allow_html=True)
+                else:
+                    col2.write("⚠️ File missing")
+            elif proc.url:
+                col2.markdown(f"[📎 Open Link]({proc.url})", unsafe_allow_html=True)
             else:
-                col2.write("⚠️ File missing")
-        elif isinstance(link,str) and link:
-            col2.markdown(f"[📎 Open Link]({link})", unsafe_allow_html=True)
-        else:
-            col2.write("N/A")
-else:
-    st.info("No procedures available for this test.")
+                col2.write("N/A")
+    else:
+        st.info("No procedures available for this test.")
 
-if selected_test:
-    st.session_state.last_procs[selected_test] = procedures
+#--------Debug panel (?debug=1, ?profile=1)---------
+render_debug_panel(rerun_trace)
+end_rerun(rerun_trace)
 
 #--------Auto-refresh every 5s---------------------
 st_autorefresh(interval=5000, key="refresh")
\ No newline at end of file
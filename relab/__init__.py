@@ -0,0 +1 @@
+# RE Lab procedure dashboard - shared helpers used by the Streamlit dashboards
@@ -0,0 +1,192 @@
+import argparse
+import gzip
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from relab import config, github_store
+from relab.backends import build_backend
+from relab.codec import encode
+
+#------------------------------------------------------
+# READ-ONLY JSON API - for kiosks and the MES integration
+#------------------------------------------------------
+# python -m relab.api --shared-folder "<SHARED_FOLDER>" --port 8502
+# python -m relab.api --github-repo PNRELAB/RE_LAB_PROCEDURE    (token in $GITHUB_TOKEN)
+#
+#   GET /tests                          {"items": ["HAST", ...], "page": 1, "per_page": 100, "total": 2}
+#   GET /tests/<name>/procedures        {"items": [{"text": ..., "link": ...}], ...}
+#
+# Pages with ?page=N&per_page=M (max 1000), next/prev in the Link header.
+# Reads go through the same cached backend stack as the dashboards. Every
+# response has a strong ETag of its body, so polling clients sending
+# If-None-Match get a bodiless 304; bodies over 1 KiB are gzipped when the
+# client accepts it, and that variant has its own tag ("<sha1>-gzip").
+
+DEFAULT_PER_PAGE = 100
+MAX_PER_PAGE = 1000
+GZIP_MIN_BYTES = 1024
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def paginate(items, query):
+    try:
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("per_page", [str(DEFAULT_PER_PAGE)])[0])
+    except ValueError:
+        raise ApiError(400, "page and per_page must be integers")
+    if page < 1 or not 1 <= per_page <= MAX_PER_PAGE:
+        raise ApiError(400, f"page must be >= 1 and per_page between 1 and {MAX_PER_PAGE}")
+    start = (page - 1) * per_page
+    return {"items": items[start:start + per_page], "page": page, "per_page": per_page, "total": len(items)}
+
+def route(backend, path, query):
+    # -> JSON-able payload for a GET
+    parts = [unquote(p) for p in path.strip("/").split("/")]
+    if parts == ["tests"]:
+        return paginate(backend.list_tests(), query)
+    if len(parts) == 3 and parts[0] == "tests" and parts[2] == "procedures":
+        test_name = parts[1]
+        if test_name not in backend.list_tests():
+            raise ApiError(404, f"unknown test {test_name!r}")
+        return paginate([p.to_dict() for p in backend.get_procedures(test_name)], query)
+    raise ApiError(404, "not found")
+
+def _links(path, page):
+    # path as received (already percent-encoded): normalize each segment to one encoding
+    links = []
+    base = "/".join(quote(unquote(segment), safe="") for segment in path.split("/"))
+    if page["page"] * page["per_page"] < page["total"]:
+        links.append(f'<{base}?page={page["page"] + 1}&per_page={page["per_page"]}>; rel="next"')
+    if page["page"] > 1:
+        links.append(f'<{base}?page={page["page"] - 1}&per_page={page["per_page"]}>; rel="prev"')
+    return ", ".join(links)
+
+def _matches(if_none_match, etag):
+    # Weak comparison, as If-None-Match asks for, against the tag of the
+    # variant (identity or gzip) this request would get
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+_gzipped = OrderedDict()  # etag -> compressed body
+_gzipped_lock = threading.Lock()
+
+def _gzip(etag, body):
+    with _gzipped_lock:
+        if etag in _gzipped:
+            _gzipped.move_to_end(etag)
+            return _gzipped[etag]
+    data = gzip.compress(body, compresslevel=6, mtime=0)
+    with _gzipped_lock:
+        _gzipped[etag] = data
+        while len(_gzipped) > 256:
+            _gzipped.popitem(last=False)
+    return data
+
+#------------------------------------------------------
+# HTTP SERVER
+#------------------------------------------------------
+def make_server(backend, host="127.0.0.1", port=8502):
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status, payload, head=False):
+            url = urlsplit(self.path)
+            body = encode(payload, compress=False)
+            digest = hashlib.sha1(body).hexdigest()
+            gzipped = len(body) >= GZIP_MIN_BYTES and "gzip" in self.headers.get("Accept-Encoding", "")
+            etag = f'"{digest}-gzip"' if gzipped else f'"{digest}"'
+            if status == 200 and _matches(self.headers.get("If-None-Match"), etag):
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Vary", "Accept-Encoding")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            headers = {"Content-Type": "application/json; charset=utf-8", "Cache-Control": "no-cache",
+                       "Vary": "Accept-Encoding"}
+            if status == 200:
+                headers["ETag"] = etag
+                if isinstance(payload, dict) and "items" in payload:
+                    links = _links(url.path, payload)
+                    if links:
+                        headers["Link"] = links
+            if gzipped:
+                body = _gzip(etag, body)
+                headers["Content-Encoding"] = "gzip"
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head:
+                self.wfile.write(body)
+
+        def _get(self, head=False):
+            url = urlsplit(self.path)
+            try:
+                payload = route(backend, url.path, parse_qs(url.query))
+                self._reply(200, payload, head)
+            except ApiError as e:
+                self._reply(e.status, {"message": str(e)}, head)
+            except Exception as e:
+                self._reply(500, {"message": f"storage error: {e}"}, head)
+
+        def do_GET(self):
+            self._get()
+
+        def do_HEAD(self):
+            self._get(head=True)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Read-only JSON API over the lab procedures.")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--shared-folder", help="local folder containing tests.json and TestProcedures/ (default: RELAB_SHARED_FOLDER)")
+    where.add_argument("--github-repo", help="owner/name of the GitHub procedures repo")
+    parser.add_argument("--procedures-folder", default="TestProcedures", help="procedures folder inside the GitHub repo")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args(argv)
+
+    if args.github_repo:
+        if not os.environ.get("GITHUB_TOKEN"):
+            sys.exit("GITHUB_TOKEN is not set")
+        github_store.configure(os.environ["GITHUB_TOKEN"], args.github_repo, args.procedures_folder)
+        backend = build_backend("github", batch_delay=0)
+    else:
+        backend = build_backend("local", shared_folder=args.shared_folder or config.SHARED_FOLDER, batch_delay=0)
+    server = make_server(backend, args.host, args.port)
+    print(f"serving read-only API on http://{args.host}:{args.port}/tests", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,893 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+from relab import config, github_store
+from relab.instrument import timed
+from relab.invalidation import VERSIONS_NAME, VersionChannel
+from relab.journal import LocalJournal, MemoryJournal, RepoJournal, current_actor
+from relab.locking import WRITE_LOCK_NAME, FileLock, WriteConflict
+from relab.records import Procedure, dump_procedures, normalize_tags, parse_procedures
+from relab.storage import read_json, write_json
+
+#------------------------------------------------------
+# STORAGE BACKENDS
+#------------------------------------------------------
+# Every dashboard talks to one backend object:
+#   list_tests()                    -> [test_name, ...]
+#   get_procedures(test_name)       -> [Procedure, ...]
+#   apply(mutations, message=None)  -> applies a whole batch of mutations
+#   get_version(test_name=None)     -> opaque key that changes when the test's
+#                                      procedures (or, for None, tests.json) change
+#   versions()                      -> {test_name: version} for every test file
+#
+# apply() reads tests.json and each touched procedures file once, applies the
+# mutations in order and writes every changed file once (one commit on
+# GitHub). Caching and write batching are layers wrapped around a backend,
+# so they work the same for every store.
+#
+# The read-modify-write runs inside write_context(): a lock file for a local
+# folder, the branch head for GitHub. _commit() re-checks what was read and
+# raises WriteConflict if another writer got there first; batches made only
+# of COMMUTATIVE_OPS are then re-applied to the fresh data (a merge), others
+# surface the conflict instead of overwriting by index.
+#
+# _commit() also appends what actually changed to the backend's journal
+# (relab/journal.py) in the same locked write / the same GitHub commit.
+
+#------------------------------------------------------
+# MUTATIONS - plain dicts so they can be queued, logged and replayed
+#------------------------------------------------------
+# The actor is stamped when the op is made, in the caller's session, since
+# the batching layer applies it from its own thread. key is an optional
+# idempotency key: a mutation whose key was already applied within
+# IDEMPOTENCY_WINDOW seconds is dropped (double-clicks, replayed reruns).
+# The dashboards key each user action with a fresh nonce (action_nonce) that
+# is kept until the write is confirmed, so retrying a failed or interrupted
+# write is applied once while doing the same thing again on purpose (delete
+# the first row twice, re-add a test just deleted) is applied every time.
+def _op(op, test_name, key=None, **fields):
+    m = {"op": op, "test": test_name, **fields, "actor": current_actor()}
+    if key:
+        m["key"] = key
+    return m
+
+def add_test_op(test_name, key=None):
+    return _op("add_test", test_name, key)
+
+def delete_test_op(test_name, key=None):
+    return _op("delete_test", test_name, key)
+
+def add_procedure_op(test_name, procedure_text, procedure_link="", tags=None, key=None):
+    m = _op("add_procedure", test_name, key, text=procedure_text, link=procedure_link)
+    if tags:
+        m["tags"] = list(normalize_tags(tags))
+    return m
+
+def edit_procedure_op(test_name, index, new_text=None, new_link=None, new_tags=None, key=None):
+    # new_tags=None keeps the tags, [] clears them
+    m = _op("edit_procedure", test_name, key, index=index, text=new_text, link=new_link)
+    if new_tags is not None:
+        m["tags"] = list(normalize_tags(new_tags))
+    return m
+
+def delete_procedure_op(test_name, index, key=None):
+    return _op("delete_procedure", test_name, key, index=index)
+
+def mutation_key(*parts):
+    # Stable hash of an action and its values, e.g. mutation_key("add_procedure", test, text, link)
+    raw = json.dumps(parts, default=str, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+def action_nonce(pending, action, *args):
+    # Idempotency key for one user action; pending (e.g. st.session_state)
+    # keeps it, so retries of the same action + values reuse it until action_done()
+    slot = f"nonce:{mutation_key(action, *args)}"
+    if slot not in pending:
+        pending[slot] = uuid.uuid4().hex[:20]
+    return pending[slot]
+
+def action_done(pending, action, *args):
+    # The write committed: the next identical action is a new one
+    pending.pop(f"nonce:{mutation_key(action, *args)}", None)
+
+COMMUTATIVE_OPS = {"add_test", "delete_test", "add_procedure"}
+
+def apply_mutations(tests, load_procedures, mutations, seen_keys=()):
+    # Returns (new tests list or None if unchanged, {test: procedures} to
+    # write, {tests} whose file should be removed, [journal entries] for the
+    # mutations that changed something). Only files that actually changed
+    # are returned, and mutations whose key is in seen_keys are skipped.
+    tests = list(tests)
+    tests_changed = False
+    procedures = {}
+    dirty = set()
+    deleted = set()
+    changes = []
+
+    def procs(test_name):
+        if test_name not in procedures:
+            procedures[test_name] = [] if test_name in deleted else load_procedures(test_name)
+        return procedures[test_name]
+
+    for m in mutations:
+        op, test_name = m["op"], m.get("test")
+        if not test_name or (m.get("key") and m["key"] in seen_keys):
+            continue
+        change = {"op": op, "test": test_name, "actor": m.get("actor") or current_actor()}
+        if m.get("key"):
+            change["key"] = m["key"]
+        if op == "add_test":
+            if test_name not in tests:
+                tests.append(test_name)
+                tests_changed = True
+                deleted.discard(test_name)
+                procedures[test_name] = []
+                dirty.add(test_name)
+                changes.append(change)
+        elif op == "delete_test":
+            if test_name in tests:
+                tests.remove(test_name)
+                tests_changed = True
+                deleted.add(test_name)
+                procedures.pop(test_name, None)
+                dirty.discard(test_name)
+                changes.append(change)
+        elif op == "add_procedure":
+            if m.get("text"):
+                current = procs(test_name)
+                current.append(Procedure.from_link(m["text"], m.get("link", ""), m.get("tags")))
+                dirty.add(test_name)
+                changes.append(dict(change, index=len(current) - 1, **current[-1].to_dict()))
+        elif op == "edit_procedure":
+            current = procs(test_name)
+            if 0 <= m["index"] < len(current):
+                old = current[m["index"]]
+                current[m["index"]] = old.replace(m.get("text"), m.get("link"), m.get("tags"))
+                if current[m["index"]] != old:
+                    dirty.add(test_name)
+                    changes.append(dict(change, index=m["index"], old_text=old.text, **current[m["index"]].to_dict()))
+        elif op == "delete_procedure":
+            current = procs(test_name)
+            if 0 <= m["index"] < len(current):
+                dirty.add(test_name)
+                changes.append(dict(change, index=m["index"], text=current.pop(m["index"]).text))
+        else:
+            raise ValueError(f"unknown mutation {op!r}")
+    return (tests if tests_changed else None), {t: procedures[t] for t in dirty}, deleted, changes
+
+#------------------------------------------------------
+# BASE CLASS
+#------------------------------------------------------
+class Backend:
+    name = "base"
+
+    def list_tests(self):
+        raise NotImplementedError
+
+    def get_procedures(self, test_name):
+        raise NotImplementedError
+
+    def get_version(self, test_name=None):
+        raise NotImplementedError
+
+    def versions(self):
+        return {t: self.get_version(t) for t in self.list_tests()}
+
+    def changed_at(self, version):
+        # Timestamp for a version key when the store knows it, else None
+        return None
+
+    def attachment_checker(self):
+        # -> exists(attachment path) for the store the attachments live in
+        return os.path.exists
+
+    def write_context(self):
+        return nullcontext()
+
+    def applied_keys(self, keys):
+        # Which of keys the journal shows as applied within IDEMPOTENCY_WINDOW
+        # (other processes / replicas); called inside write_context()
+        journal = getattr(self, "journal", None)
+        if not keys or journal is None or config.IDEMPOTENCY_WINDOW <= 0:
+            return set()
+        recent = journal.since_time(time.time() - config.IDEMPOTENCY_WINDOW, fresh=True)
+        return {e["key"] for e in recent if e.get("key") in keys}
+
+    def apply(self, mutations, message=None):
+        mutations = list(mutations)
+        if not mutations:
+            return None
+        message = message or _describe(mutations)
+        retry = all(m["op"] in COMMUTATIVE_OPS for m in mutations)
+        keys = {m["key"] for m in mutations if m.get("key")}
+        for attempt in range(max(1, config.WRITE_RETRIES)):
+            try:
+                with self.write_context():
+                    seen = self.applied_keys(keys)
+                    tests, procedures, deleted, changes = apply_mutations(self.list_tests(), self.get_procedures, mutations, seen)
+                    if tests is None and not procedures and not deleted:
+                        return None  # nothing changed: no rewrite, no commit
+                    return self._commit(tests, procedures, deleted, message, changes)
+            except WriteConflict:
+                if not retry or attempt + 1 >= config.WRITE_RETRIES:
+                    raise
+                time.sleep(random.uniform(0, 0.01 * 2 ** attempt))
+
+    def _commit(self, tests, procedures, deleted, message, changes=()):
+        raise NotImplementedError
+
+    # Same call signatures as the dashboards' original helpers
+    def load_tests(self):
+        return self.list_tests()
+
+    def load_procedures(self, test_name):
+        return self.get_procedures(test_name)
+
+    def add_test(self, test_name, key=None):
+        return self.apply([add_test_op(test_name, key)])
+
+    def delete_test(self, test_name, key=None):
+        return self.apply([delete_test_op(test_name, key)])
+
+    def add_procedure(self, test_name, procedure_text, procedure_link="", tags=None, key=None):
+        if not test_name or not procedure_text:
+            return None
+        return self.apply([add_procedure_op(test_name, procedure_text, procedure_link, tags, key)])
+
+    def edit_procedure(self, test_name, index, new_text=None, new_link=None, new_tags=None, key=None):
+        return self.apply([edit_procedure_op(test_name, index, new_text, new_link, new_tags, key)])
+
+    def delete_procedure(self, test_name, index, key=None):
+        return self.apply([delete_procedure_op(test_name, index, key)])
+
+def _describe(mutations):
+    if len(mutations) == 1:
+        return f"{mutations[0]['op'].replace('_', ' ').capitalize()}: {mutations[0].get('test')}"
+    return f"Batch of {len(mutations)} changes"
+
+#------------------------------------------------------
+# LOCAL FOLDER (OneDrive / SMB share)
+#------------------------------------------------------
+class LocalBackend(Backend):
+    name = "local"
+
+    def __init__(self, shared_folder=None, channel=None):
+        shared_folder = shared_folder or config.SHARED_FOLDER
+        self.shared_folder = shared_folder
+        self.tests_file = os.path.join(shared_folder, "tests.json")
+        self.procedures_folder = os.path.join(shared_folder, "TestProcedures")
+        self.lock_file = os.path.join(shared_folder, WRITE_LOCK_NAME)
+        self.channel = channel  # VersionChannel other replicas listen on
+        self.journal = LocalJournal(shared_folder)
+        self._local = threading.local()
+
+    def proc_file(self, test_name):
+        return os.path.join(self.procedures_folder, f"{test_name}{config.PROC_SUFFIX}")
+
+    def _read(self, path):
+        # Inside a write, remember the version each file had when it was read
+        reads = getattr(self._local, "reads", None)
+        if reads is not None and path not in reads:
+            reads[path] = _file_version(path)
+        return read_json(path)
+
+    def list_tests(self):
+        return self._read(self.tests_file)
+
+    def get_procedures(self, test_name):
+        return parse_procedures(self._read(self.proc_file(test_name)))
+
+    @contextmanager
+    def write_context(self):
+        with FileLock(self.lock_file):
+            self._local.reads = {}
+            try:
+                yield
+            finally:
+                self._local.reads = None
+
+    def get_version(self, test_name=None):
+        path = self.tests_file if test_name is None else self.proc_file(test_name)
+        with timed("stat", path, test_name):
+            return _file_version(path)
+
+    def folder_version(self):
+        # write_json renames into place, which bumps the folder mtime
+        try:
+            return os.stat(self.procedures_folder).st_mtime_ns
+        except OSError:
+            return None
+
+    def versions(self):
+        suffix = config.PROC_SUFFIX
+        result = {}
+        try:
+            with timed("scandir", self.procedures_folder), os.scandir(self.procedures_folder) as entries:
+                for entry in entries:
+                    if entry.name.endswith(suffix) and entry.is_file():
+                        info = entry.stat()
+                        result[entry.name[:-len(suffix)]] = (info.st_mtime_ns, info.st_size)
+        except FileNotFoundError:
+            pass
+        return result
+
+    def changed_at(self, version):
+        return version[0] / 1e9 if version else None
+
+    def _commit(self, tests, procedures, deleted, message, changes=()):
+        # Writers that don't take the lock (older dashboards, another PC
+        # syncing the share) show up as a changed mtime/size
+        for path, version in (getattr(self._local, "reads", None) or {}).items():
+            if _file_version(path) != version:
+                raise WriteConflict(f"{os.path.basename(path)} changed while writing")
+        os.makedirs(self.procedures_folder, exist_ok=True)
+        for test_name, procs in procedures.items():
+            write_json(self.proc_file(test_name), dump_procedures(procs))
+        # tests.json after new files exist, and before removed files go away
+        if tests is not None:
+            write_json(self.tests_file, tests)
+        for test_name in deleted:
+            if os.path.exists(self.proc_file(test_name)):
+                os.remove(self.proc_file(test_name))
+        self.journal.append(list(changes))
+        if self.channel is not None:
+            self.channel.bump(set(procedures) | set(deleted), tests_list=tests is not None)
+        return None
+
+def _file_version(path):
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+#------------------------------------------------------
+# GITHUB REPO (5.0)
+#------------------------------------------------------
+_github_write_lock = threading.RLock()
+
+class GitHubBackend(Backend):
+    name = "github"
+
+    def __init__(self, repo=None, procedures_folder=None):
+        self._repo = repo
+        self.procedures_folder = procedures_folder or github_store.procedures_folder()
+        self.journal = RepoJournal(self)
+        self._local = threading.local()
+        self._staged_lock = threading.Lock()
+        self._staged = {}       # repo path -> BlobRef or pointer text, until a commit uses it
+        self._known_blobs = {}  # git blob sha -> repo path already holding that content
+
+    @property
+    def repo(self):
+        return self._repo if self._repo is not None else github_store.get_repo()
+
+    def proc_file(self, test_name):
+        return f"{self.procedures_folder}/{test_name}{config.PROC_SUFFIX}"
+
+    def _base_ref(self):
+        return getattr(self._local, "ref", None)
+
+    def list_tests(self):
+        ref = self._base_ref()
+        return github_store.read_json(self.repo, "tests.json", ref.object.sha if ref else None)
+
+    def get_procedures(self, test_name):
+        ref = self._base_ref()
+        return parse_procedures(github_store.read_json(self.repo, self.proc_file(test_name), ref.object.sha if ref else None))
+
+    @contextmanager
+    def write_context(self):
+        # Reads come from the branch head as of now and the commit is only
+        # accepted as a fast-forward of it (compare-and-swap on the ref).
+        # Threads of this process take turns so only other servers conflict.
+        repo = self.repo
+        with _github_write_lock:
+            with timed("github.get_ref"):
+                self._local.ref = repo.get_git_ref(f"heads/{repo.default_branch}")
+            try:
+                yield
+            finally:
+                self._local.ref = None
+
+    def get_version(self, test_name=None):
+        path = "tests.json" if test_name is None else self.proc_file(test_name)
+        try:
+            with timed("github.get_contents", path, test_name):
+                return self.repo.get_contents(path).sha
+        except:
+            return None
+
+    def versions(self):
+        suffix = config.PROC_SUFFIX
+        return {name[:-len(suffix)]: sha for name, sha in self._folder_shas().items() if name.endswith(suffix)}
+
+    def stage_attachment(self, test_name, uploaded_file):
+        # Uploads the file (or reuses identical content) and returns the link
+        # to save; the next commit referencing it adds it to the tree
+        repo = self.repo
+        size, blob_sha, sha256 = github_store.file_digests(uploaded_file)
+        path = f"{self.procedures_folder}/{test_name}_{uploaded_file.name}"
+        url = f"{repo.html_url or 'https://github.com/' + repo.full_name}/blob/{repo.default_branch}/{path}"
+        if size > config.GITHUB_ATTACHMENT_MAX_MB * 1024 * 1024:
+            _, url = github_store.store_external(uploaded_file, sha256)
+            staged = github_store.lfs_pointer(sha256, size)
+        else:
+            if not self._known_blobs:
+                self._known_blobs.update((sha, f"{self.procedures_folder}/{name}") for name, sha in self._folder_shas().items())
+            if blob_sha not in self._known_blobs:
+                github_store.upload_blob(repo, uploaded_file, blob_sha)
+                self._known_blobs[blob_sha] = path
+            staged = github_store.BlobRef(blob_sha)
+        with self._staged_lock:
+            self._staged[path] = staged
+        return {"type": "file", "path": path, "name": uploaded_file.name, "url": url}
+
+    def discard_attachment(self, link):
+        # Forgets a staged upload whose write failed; the blob itself is left
+        # for GitHub to collect
+        with self._staged_lock:
+            self._staged.pop(link.get("path"), None)
+
+    def attachment_checker(self):
+        # Attachment paths are repo paths in the procedures folder; it is
+        # listed once, on the first check
+        listing = {}
+
+        def exists(path):
+            if "names" not in listing:
+                listing["names"] = set(self._folder_shas())
+            folder, _, name = path.rpartition("/")
+            return folder == self.procedures_folder and name in listing["names"]
+        return exists
+
+    def _folder_shas(self):
+        try:
+            with timed("github.get_contents", self.procedures_folder):
+                return {c.name: c.sha for c in self.repo.get_contents(self.procedures_folder)}
+        except:
+            return {}
+
+    def _commit(self, tests, procedures, deleted, message, changes=()):
+        files = {self.proc_file(t): dump_procedures(p) for t, p in procedures.items()}
+        if tests is not None:
+            files["tests.json"] = tests
+        with self._staged_lock:
+            attachments = {c["link"]["path"]: self._staged[c["link"]["path"]] for c in changes
+                           if isinstance(c.get("link"), dict) and c["link"].get("path") in self._staged}
+        files.update(attachments)
+        ref = self._base_ref()
+        files.update(self.journal.commit_files(list(changes), ref)[0])
+        sha = github_store.commit_files(self.repo, files, message, deleted=[self.proc_file(t) for t in deleted], ref=ref)
+        if sha is not None:
+            self.journal.committed(ref.object.sha if ref is not None else None, sha, files)
+        with self._staged_lock:
+            for path in attachments:
+                self._staged.pop(path, None)
+        return sha
+
+#------------------------------------------------------
+# IN-MEMORY (benchmarks, tests, demos)
+#------------------------------------------------------
+class MemoryBackend(Backend):
+    name = "memory"
+
+    def __init__(self, tests=None, procedures=None):
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._tests = list(tests or [])
+        self._procedures = {t: list(p) for t, p in (procedures or {}).items()}
+        self._versions = {t: 1 for t in self._procedures}
+        self._tests_version = 1
+        self.procedures_folder = None
+        self.journal = MemoryJournal()
+
+    def list_tests(self):
+        with self._lock:
+            return list(self._tests)
+
+    def get_procedures(self, test_name):
+        with self._lock:
+            return list(self._procedures.get(test_name, []))
+
+    def get_version(self, test_name=None):
+        with self._lock:
+            return self._tests_version if test_name is None else self._versions.get(test_name)
+
+    def versions(self):
+        with self._lock:
+            return dict(self._versions)
+
+    def write_context(self):
+        return self._write_lock
+
+    def _commit(self, tests, procedures, deleted, message, changes=()):
+        with self._lock:
+            for test_name, procs in procedures.items():
+                self._procedures[test_name] = list(procs)
+                self._versions[test_name] = self._versions.get(test_name, 0) + 1
+            if tests is not None:
+                self._tests = list(tests)
+                self._tests_version += 1
+            for test_name in deleted:
+                self._procedures.pop(test_name, None)
+                self._versions.pop(test_name, None)
+        self.journal.append(list(changes))
+        return None
+
+#------------------------------------------------------
+# MIDDLEWARE LAYERS
+#------------------------------------------------------
+class BackendLayer(Backend):
+    # Forwards everything to the wrapped backend; layers override what they need
+    def __init__(self, inner):
+        self.inner = inner
+        self.name = inner.name
+
+    def __getattr__(self, attr):
+        return getattr(self.inner, attr)
+
+    def list_tests(self):
+        return self.inner.list_tests()
+
+    def get_procedures(self, test_name):
+        return self.inner.get_procedures(test_name)
+
+    def get_version(self, test_name=None):
+        return self.inner.get_version(test_name)
+
+    def versions(self):
+        return self.inner.versions()
+
+    def changed_at(self, version):
+        return self.inner.changed_at(version)
+
+    def attachment_checker(self):
+        return self.inner.attachment_checker()
+
+    def apply(self, mutations, message=None):
+        return self.inner.apply(mutations, message)
+
+class CachingBackend(BackendLayer):
+    # Keeps parsed data per test and revalidates it against get_version() at
+    # most once per ttl seconds. Writes through this layer drop what they touch;
+    # with a VersionChannel, writes from other processes drop what they touched.
+    def __init__(self, inner, ttl=1.0, channel=None):
+        super().__init__(inner)
+        self.ttl = ttl
+        self.channel = channel
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> [version, checked_at, value]; key None = tests list
+        self.hits = 0
+        self.misses = 0
+
+    def _sync(self, force=False):
+        changes = self.channel.poll(force)
+        if changes is None:
+            return
+        tests, tests_list, reset = changes
+        if reset:
+            self.clear()
+            return
+        for test_name in tests:
+            self.invalidate(test_name, tests_list=False)
+        if tests_list:
+            self.invalidate(None)
+
+    def _cached(self, key, load):
+        if self.channel is not None:
+            self._sync()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self.hits += 1
+                return entry[2]
+        version = self.inner.get_version(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and version is not None and entry[0] == version:
+                entry[1] = now
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        value = load()
+        with self._lock:
+            self._entries[key] = [version, now, value]
+        return value
+
+    def list_tests(self):
+        return list(self._cached(None, self.inner.list_tests))
+
+    def get_procedures(self, test_name):
+        return list(self._cached(test_name, lambda: self.inner.get_procedures(test_name)))
+
+    def invalidate(self, test_name=None, tests_list=True):
+        with self._lock:
+            if test_name is not None:
+                self._entries.pop(test_name, None)
+            if tests_list:
+                self._entries.pop(None, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    #---------------- warm start (relab/warmcache.py) ----------------
+    def export(self):
+        # -> {key: (version, value)} for every entry with a known version
+        with self._lock:
+            return {key: (entry[0], entry[2]) for key, entry in self._entries.items() if entry[0] is not None}
+
+    def preload(self, entries, checked_at):
+        # Installs entries validated at checked_at (monotonic); never replaces
+        # one loaded meanwhile. The channel is read first so its first poll
+        # (a full reset) doesn't throw them away.
+        if self.channel is not None:
+            self._sync(force=True)
+        with self._lock:
+            for key, (version, value) in entries.items():
+                if key not in self._entries:
+                    self._entries[key] = [version, checked_at, value]
+
+    def apply(self, mutations, message=None):
+        mutations = list(mutations)
+        try:
+            return self.inner.apply(mutations, message)
+        finally:
+            for m in mutations:
+                self.invalidate(m.get("test"), tests_list=m["op"] in ("add_test", "delete_test"))
+
+class BatchingBackend(BackendLayer):
+    # Coalesces apply() calls arriving within max_delay seconds (from any
+    # session) into one inner apply: one write per file, one GitHub commit.
+    # Each caller still blocks until its own mutations are stored.
+    def __init__(self, inner, max_delay=0.25, max_ops=500):
+        super().__init__(inner)
+        self.max_delay = max_delay
+        self.max_ops = max_ops
+        self._cond = threading.Condition()
+        self._pending = []  # (mutations, message, waiter)
+        self._thread = None
+
+    def apply(self, mutations, message=None):
+        mutations = list(mutations)
+        if not mutations:
+            return None
+        waiter = {"done": threading.Event(), "result": None, "error": None}
+        with self._cond:
+            self._pending.append((mutations, message, waiter))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="write-batcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        waiter["done"].wait()
+        if waiter["error"] is not None:
+            raise waiter["error"]
+        return waiter["result"]
+
+    def _pending_ops(self):
+        return sum(len(m) for m, _, _ in self._pending)
+
+    def pending_ops(self):
+        # Mutations queued but not yet handed to the inner backend
+        with self._cond:
+            return self._pending_ops()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.max_delay
+                while self._pending_ops() < self.max_ops:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending, []
+            self.flush_batch(batch)
+
+    def flush_batch(self, batch):
+        mutations = [m for muts, _, _ in batch for m in muts]
+        messages = list(dict.fromkeys(msg for _, msg, _ in batch if msg))
+        message = "; ".join(messages) if messages else None
+        result, error = None, None
+        try:
+            result = self.inner.apply(mutations, message)
+        except Exception as e:
+            error = e
+        for _, _, waiter in batch:
+            waiter["result"], waiter["error"] = result, error
+            waiter["done"].set()
+
+class WriteRateLimited(RuntimeError):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class IdempotentBackend(BackendLayer):
+    # Drops keyed mutations already applied (or in flight) in this process
+    # within `window` seconds before they reach the batcher or the store: a
+    # double-click or a replayed rerun costs a dict lookup instead of a full
+    # read-modify-write. The store re-checks keys against the journal under
+    # its write lock, which covers other processes.
+    def __init__(self, inner, window=60.0):
+        super().__init__(inner)
+        self.window = window
+        self._lock = threading.Lock()
+        self._keys = {}  # key -> [applied_at or None while in flight, threading.Event]
+        self.dropped = 0
+
+    def _expire(self, now):
+        for key in [k for k, (at, _) in self._keys.items() if at is not None and now - at > self.window]:
+            del self._keys[key]
+
+    def apply(self, mutations, message=None):
+        mutations = list(mutations)
+        fresh, waits, mine = [], [], []
+        with self._lock:
+            self._expire(time.monotonic())
+            for m in mutations:
+                key = m.get("key")
+                if not key:
+                    fresh.append(m)
+                elif key in self._keys:
+                    self.dropped += 1
+                    waits.append(self._keys[key][1])
+                else:
+                    self._keys[key] = [None, threading.Event()]
+                    mine.append(key)
+                    fresh.append(m)
+        try:
+            result = self.inner.apply(fresh, message) if fresh else None
+        except BaseException:
+            with self._lock:
+                for key in mine:
+                    self._keys.pop(key)[1].set()  # failed: a retry must go through
+            raise
+        now = time.monotonic()
+        with self._lock:
+            for key in mine:
+                self._keys[key][0] = now
+                self._keys[key][1].set()
+        for event in waits:
+            event.wait(30)  # the duplicate returns once the original is stored
+        return result
+
+class RateLimitedBackend(BackendLayer):
+    # Token bucket per actor (one per Streamlit session or signed-in user):
+    # `rate` writes per second, bursts of `burst`. A caller over the limit
+    # waits up to max_wait seconds, then gets WriteRateLimited.
+    def __init__(self, inner, rate=2.0, burst=10, max_wait=2.0):
+        super().__init__(inner)
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._buckets = {}  # actor -> [tokens, updated_at]
+
+    def _take(self, actor):
+        # -> seconds to wait for a token (0 when one is available now)
+        now = time.monotonic()
+        with self._lock:
+            if len(self._buckets) > 10000:
+                self._buckets = {a: b for a, b in self._buckets.items() if now - b[1] < 3600}
+            tokens, updated = self._buckets.get(actor, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            if wait <= self.max_wait:
+                tokens -= 1
+            self._buckets[actor] = [tokens, now]
+            return wait
+
+    def apply(self, mutations, message=None):
+        mutations = list(mutations)
+        if not mutations:
+            return None
+        actor = mutations[0].get("actor") or current_actor()
+        wait = self._take(actor)
+        if wait > self.max_wait:
+            raise WriteRateLimited(f"too many changes from {actor}, try again in {wait:.0f}s", wait)
+        if wait > 0:
+            time.sleep(wait)
+        return self.inner.apply(mutations, message)
+
+class InstrumentedBackend(BackendLayer):
+    # Times every call made by the dashboards (cache hits included) into the
+    # current rerun trace; the I/O underneath is timed where it happens
+    def list_tests(self):
+        with timed("backend.list_tests"):
+            return self.inner.list_tests()
+
+    def get_procedures(self, test_name):
+        with timed("backend.get_procedures", test=test_name):
+            return self.inner.get_procedures(test_name)
+
+    def versions(self):
+        with timed("backend.versions"):
+            return self.inner.versions()
+
+    def apply(self, mutations, message=None):
+        mutations = list(mutations)
+        tests = sorted({m.get("test") for m in mutations if m.get("test")})
+        with timed("backend.apply", message, tests[0] if len(tests) == 1 else None):
+            return self.inner.apply(mutations, message)
+
+#------------------------------------------------------
+# FACTORY - one configured backend per process
+#------------------------------------------------------
+_backends = {}
+_backends_lock = threading.Lock()
+
+def build_backend(name=None, **options):
+    name = name or config.BACKEND
+    channel = None
+    if name == "local":
+        shared_folder = options.get("shared_folder") or config.SHARED_FOLDER
+        if options.get("shared_invalidation", config.SHARED_INVALIDATION):
+            channel = VersionChannel(os.path.join(shared_folder, VERSIONS_NAME))
+        backend = LocalBackend(shared_folder, channel)
+    elif name == "github":
+        backend = GitHubBackend(options.get("repo"), options.get("procedures_folder"))
+    elif name == "memory":
+        backend = MemoryBackend(options.get("tests"), options.get("procedures"))
+    else:
+        raise ValueError(f"unknown backend {name!r}, expected local, github or memory")
+    batch_delay = options.get("batch_delay", config.WRITE_BATCH_DELAY)
+    if batch_delay > 0:
+        backend = BatchingBackend(backend, max_delay=batch_delay)
+    # The channel drops what relab writers changed at once; the TTL bounds how
+    # long a write from anything else (older dashboards, sync clients) can hide
+    if channel is not None and config.SHARED_CACHE_TTL > 0:
+        default_ttl = config.SHARED_CACHE_TTL
+    else:
+        default_ttl = config.CACHE_TTL.get(name, 1.0)
+    cache_ttl = options.get("cache_ttl", default_ttl)
+    if cache_ttl > 0:
+        backend = CachingBackend(backend, ttl=cache_ttl, channel=channel)
+    # Duplicates are dropped before they spend a session's write tokens.
+    # Only the dashboards' shared backend (get_backend) is rate limited;
+    # CLI tools and benchmarks write as fast as the store allows.
+    write_rate = options.get("write_rate", 0)
+    if write_rate > 0:
+        backend = RateLimitedBackend(backend, write_rate, config.WRITE_BURST)
+    window = options.get("idempotency_window", config.IDEMPOTENCY_WINDOW)
+    if window > 0:
+        backend = IdempotentBackend(backend, window)
+    if options.get("instrument", True):
+        backend = InstrumentedBackend(backend)
+    return backend
+
+def get_backend(name=None):
+    name = name or config.BACKEND
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = build_backend(name, write_rate=config.WRITE_RATE)
+            if config.WARM_CACHE:
+                from relab.warmcache import start_warm_cache
+                start_warm_cache(_backends[name])
+        return _backends[name]
+
+def active_backends():
+    with _backends_lock:
+        return dict(_backends)
+
+def find_layer(backend, layer_class):
+    # Walks the middleware stack for the first layer of the given class
+    while backend is not None:
+        if isinstance(backend, layer_class):
+            return backend
+        backend = backend.__dict__.get("inner")
+    return None
+
+def reset_backends():
+    # Drops the per-process backends (benchmarks switching datasets, tests)
+    with _backends_lock:
+        _backends.clear()
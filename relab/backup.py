@@ -0,0 +1,106 @@
+import os
+
+from relab import config
+from relab.instrument import timed
+from relab.invalidation import VERSIONS_NAME, VersionChannel
+from relab.journal import LocalJournal, current_actor
+from relab.locking import WRITE_LOCK_NAME, FileLock
+from relab.storage import read_json
+
+#------------------------------------------------------
+# BACKUP & RESTORE - zip of tests.json + TestProcedures/
+#------------------------------------------------------
+# Both work on shared_folder (default config.SHARED_FOLDER); jobs pass their
+# backend's folder, like the snapshot jobs.
+# Both take an optional progress object (relab/jobs.py passes its job
+# context): progress.total(files, bytes) once, then progress.advance(files,
+# bytes) per file. advance() may raise to cancel; a cancelled backup leaves
+# no zip behind and a cancelled restore leaves the catalog untouched.
+
+def _backup_sources(shared_folder):
+    sources = []
+    tests_file = os.path.join(shared_folder, "tests.json")
+    if os.path.exists(tests_file):
+        sources.append((tests_file, "tests.json"))
+    for root, dirs, files in os.walk(os.path.join(shared_folder, "TestProcedures")):
+        for file in files:
+            sources.append((os.path.join(root, file), os.path.join("TestProcedures", file)))
+    return sources
+
+def create_backup(zip_path=None, shared_folder=None, progress=None):
+    import zipfile
+
+    shared_folder = shared_folder or config.SHARED_FOLDER
+    zip_path = zip_path or os.path.join(shared_folder, "RE_LAB_Backup.zip")
+    sources = _backup_sources(shared_folder)
+    sizes = [os.path.getsize(path) for path, _ in sources]
+    if progress is not None:
+        progress.total(len(sources), sum(sizes))
+    temp_path = zip_path + ".tmp"
+    try:
+        with timed("backup", zip_path), zipfile.ZipFile(temp_path, "w") as zipf:
+            for (path, arcname), size in zip(sources, sizes):
+                zipf.write(path, arcname=arcname)
+                if progress is not None:
+                    progress.advance(1, size)
+        os.replace(temp_path, zip_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return zip_path
+
+def _restore_dest(member, shared_folder):
+    if member == "tests.json":
+        return os.path.join(shared_folder, "tests.json")
+    # Only TestProcedures/<file> - never outside the shared folder
+    parts = member.replace("\\", "/").split("/")
+    if len(parts) != 2 or parts[0] != "TestProcedures" or parts[1] in ("", ".", ".."):
+        raise ValueError(f"unexpected entry in backup: {member}")
+    return os.path.join(shared_folder, "TestProcedures", parts[1])
+
+def restore_backup(zip_file, shared_folder=None, progress=None):
+    import shutil
+    import tempfile
+    import zipfile
+
+    shared_folder = shared_folder or config.SHARED_FOLDER
+    tests_file = os.path.join(shared_folder, "tests.json")
+    with timed("restore"), zipfile.ZipFile(zip_file) as zipf:
+        members = [m for m in zipf.infolist() if not m.is_dir()]
+        dests = [_restore_dest(m.filename, shared_folder) for m in members]
+        if progress is not None:
+            progress.total(len(members), sum(m.file_size for m in members))
+        # Unpack next to the catalog first (slow, cancellable), then swap the
+        # files in under the lock (quick renames on the same volume)
+        os.makedirs(os.path.join(shared_folder, "TestProcedures"), exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".relab-restore-", dir=shared_folder)
+        try:
+            staged = []
+            for i, (member, dest_path) in enumerate(zip(members, dests)):
+                staged_path = os.path.join(staging, str(i))
+                with zipf.open(member) as src, open(staged_path, "wb") as f:
+                    shutil.copyfileobj(src, f, 1024 * 1024)
+                staged.append((staged_path, dest_path))
+                if progress is not None:
+                    progress.advance(1, member.file_size)
+
+            # Same lock as the dashboards' writes so nobody edits a half-restored catalog
+            with FileLock(os.path.join(shared_folder, WRITE_LOCK_NAME), timeout=60):
+                before = _tests_or_empty(tests_file)
+                for staged_path, dest_path in staged:
+                    os.replace(staged_path, dest_path)
+                # Every test may have changed: one journal entry, and every cache drops everything
+                after = _tests_or_empty(tests_file)
+                LocalJournal(shared_folder).append([{"op": "restore", "actor": current_actor(),
+                                                            "file": getattr(zip_file, "name", str(zip_file)),
+                                                            "tests": len(after)}])
+                VersionChannel(os.path.join(shared_folder, VERSIONS_NAME)).bump(set(before) | set(after), tests_list=True)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    return {"files": len(members), "tests": len(after)}
+
+def _tests_or_empty(tests_file):
+    try:
+        return read_json(tests_file)
+    except Exception:
+        return []
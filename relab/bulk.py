@@ -0,0 +1,198 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from relab import github_store
+from relab.backends import add_procedure_op, add_test_op, build_backend
+from relab.records import Procedure, RecordError
+
+#------------------------------------------------------
+# BULK IMPORT / EXPORT
+#------------------------------------------------------
+# python -m relab.bulk import procedures.csv --shared-folder "<SHARED_FOLDER>"
+# python -m relab.bulk export -o all.csv --shared-folder "<SHARED_FOLDER>"
+# python -m relab.bulk import procedures.csv --github-repo PNRELAB/RE_LAB_PROCEDURE   (token in $GITHUB_TOKEN)
+#
+# Each chunk of rows is applied as one backend batch: one read and one write
+# per procedures file (one commit on GitHub), instead of the dashboard's
+# read-modify-write per procedure.
+
+CSV_FIELDS = ["test", "text", "link", "file_path", "file_name", "file_url", "tags"]
+DEFAULT_CHUNK = 10000
+
+#------------------------------------------------------
+# ROWS <-> RECORDS
+#------------------------------------------------------
+def row_to_procedure(row):
+    if row.get("file_path"):
+        link = {"type": "file", "path": row["file_path"],
+                "name": row.get("file_name") or os.path.basename(row["file_path"].replace("\\", "/")),
+                "url": row.get("file_url") or ""}
+    else:
+        # JSON rows may carry the stored link object as-is
+        link = row.get("link") or ""
+    proc = Procedure.from_link(row.get("text"), link, row.get("tags"))  # "equipment:HAST, stage:qual" or a JSON list
+    if not proc.text:
+        raise RecordError("missing 'text'")
+    return proc
+
+def procedure_to_row(test_name, proc):
+    att = proc.attachment
+    return {
+        "test": test_name,
+        "text": proc.text,
+        "link": proc.url,
+        "file_path": att.path if att else "",
+        "file_name": att.name if att else "",
+        "file_url": att.url if att else "",
+        "tags": ", ".join(proc.tags),
+    }
+
+def guess_format(path, fmt=None):
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    return {".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl"}.get(ext, "csv")
+
+def read_rows(f, fmt):
+    # Streams rows; only the plain JSON array format has to be parsed whole
+    if fmt == "csv":
+        yield from csv.DictReader(f)
+    elif fmt == "jsonl":
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+    elif fmt == "json":
+        yield from json.load(f)
+    else:
+        raise ValueError(f"unknown format {fmt!r}")
+
+def write_rows(rows, f, fmt):
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    elif fmt == "jsonl":
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    elif fmt == "json":
+        f.write("[")
+        for row in rows:
+            f.write(("\n" if not count else ",\n") + json.dumps(row, ensure_ascii=False))
+            count += 1
+        f.write("\n]\n")
+    else:
+        raise ValueError(f"unknown format {fmt!r}")
+    return count
+
+#------------------------------------------------------
+# IMPORT / EXPORT
+#------------------------------------------------------
+def _flush(backend, pending, commit_message):
+    existing = set(backend.list_tests())
+    mutations = []
+    for test_name, procs in pending.items():
+        mutations.append(add_test_op(test_name))
+        mutations.extend(add_procedure_op(test_name, p.text, p.to_dict()["link"], p.tags) for p in procs)
+    backend.apply(mutations, commit_message)
+    return len([t for t in pending if t not in existing])
+
+def import_rows(backend, rows, chunk_size=DEFAULT_CHUNK, commit_message="Bulk import"):
+    stats = {"rows": 0, "imported": 0, "tests_created": 0, "rejected": [], "seconds": 0.0}
+    start = time.perf_counter()
+    pending = {}
+    pending_count = 0
+    for line_no, row in enumerate(rows, 1):
+        stats["rows"] += 1
+        test_name = (row.get("test") or "").strip()
+        try:
+            if not test_name:
+                raise RecordError("missing 'test'")
+            proc = row_to_procedure(row)
+        except RecordError as e:
+            stats["rejected"].append((line_no, str(e)))
+            continue
+        pending.setdefault(test_name, []).append(proc)
+        pending_count += 1
+        if pending_count >= chunk_size:
+            stats["tests_created"] += _flush(backend, pending, commit_message)
+            stats["imported"] += pending_count
+            pending, pending_count = {}, 0
+    if pending:
+        stats["tests_created"] += _flush(backend, pending, commit_message)
+        stats["imported"] += pending_count
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+def export_rows(backend, tests=None):
+    for test_name in tests or backend.list_tests():
+        for proc in backend.get_procedures(test_name):
+            yield procedure_to_row(test_name, proc)
+
+#------------------------------------------------------
+# CLI
+#------------------------------------------------------
+def _backend(args):
+    if args.github_repo:
+        # Same connection as the other CLIs: honours RELAB_GITHUB_API_URL (Enterprise, the fake server)
+        if not os.environ.get("GITHUB_TOKEN"):
+            sys.exit("GITHUB_TOKEN is not set")
+        github_store.configure(os.environ["GITHUB_TOKEN"], args.github_repo, args.procedures_folder)
+        return build_backend("github", cache_ttl=0, batch_delay=0)
+    return build_backend("local", shared_folder=args.shared_folder, cache_ttl=0, batch_delay=0)
+
+def _rate(count, seconds):
+    return f"{count / seconds:,.0f} rows/s" if seconds > 0 else "n/a"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import/export of lab procedures.")
+    source = argparse.ArgumentParser(add_help=False)
+    where = source.add_mutually_exclusive_group(required=True)
+    where.add_argument("--shared-folder", help="local folder containing tests.json and TestProcedures/")
+    where.add_argument("--github-repo", help="owner/name of the GitHub procedures repo")
+    source.add_argument("--procedures-folder", default="TestProcedures", help="procedures folder inside the GitHub repo")
+    source.add_argument("--format", choices=["csv", "json", "jsonl"], help="default: from the file extension")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    imp = commands.add_parser("import", parents=[source], help="add procedures from a CSV/JSON file")
+    imp.add_argument("file", help="input file, - for stdin")
+    imp.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK, help="rows applied per write (per commit on GitHub)")
+    imp.add_argument("-m", "--message", default="Bulk import", help="commit message (GitHub)")
+
+    exp = commands.add_parser("export", parents=[source], help="write every procedure as CSV/JSON")
+    exp.add_argument("-o", "--output", default="-", help="output file, - for stdout")
+    exp.add_argument("--test", action="append", help="only export this test (repeatable)")
+
+    args = parser.parse_args(argv)
+    backend = _backend(args)
+
+    if args.command == "import":
+        fmt = guess_format(args.file, args.format)
+        f = sys.stdin if args.file == "-" else open(args.file, "r", encoding="utf-8-sig", newline="")
+        with f:
+            stats = import_rows(backend, read_rows(f, fmt), args.chunk_size, args.message)
+        print(f"imported {stats['imported']} of {stats['rows']} rows into {args.shared_folder or args.github_repo} "
+              f"({stats['tests_created']} new tests) in {stats['seconds']:.2f}s, {_rate(stats['rows'], stats['seconds'])}",
+              file=sys.stderr)
+        for line_no, error in stats["rejected"]:
+            print(f"  row {line_no}: {error}", file=sys.stderr)
+        return 1 if stats["rejected"] else 0
+
+    fmt = guess_format(args.output, args.format)
+    start = time.perf_counter()
+    f = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    with f:
+        count = write_rows(export_rows(backend, args.test), f, fmt)
+    seconds = time.perf_counter() - start
+    print(f"exported {count} rows in {seconds:.2f}s, {_rate(count, seconds)}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import gzip
+import json
+import os
+
+#------------------------------------------------------
+# JSON CODECS - pluggable encoder/decoder pairs
+#------------------------------------------------------
+# Files are written compact (no indentation) by default. Gzip is opt-in
+# (GZIP_THRESHOLD > 0): the older dashboards and people opening the JSON
+# can't read it. Reading sniffs the gzip magic bytes, so pretty-printed
+# files written by older dashboards and gzipped ones both load. Pretty
+# output always comes from the stdlib (indent=4, byte-identical to what the
+# dashboards used to write); orjson can only indent by 2.
+#
+# Environment overrides:
+#   RELAB_JSON_CODEC      codec name (default: fastest installed)
+#   RELAB_JSON_PRETTY     1 = indented output, as the dashboards used to write
+#   RELAB_GZIP_THRESHOLD  size in bytes above which files are gzipped (default 0 = never)
+
+GZIP_MAGIC = b"\x1f\x8b"
+UTF8_BOM = b"\xef\xbb\xbf"
+
+_codecs = {}
+
+def register_codec(name, dumps, loads):
+    # dumps(data, pretty) -> bytes, loads(bytes) -> data
+    _codecs[name] = (dumps, loads)
+
+def available_codecs():
+    return list(_codecs)
+
+def _stdlib_dumps(data, pretty):
+    if pretty:
+        return json.dumps(data, indent=4).encode("utf-8")
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def _stdlib_loads(raw):
+    return json.loads(raw.decode("utf-8"))
+
+register_codec("stdlib", _stdlib_dumps, _stdlib_loads)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    def _orjson_dumps(data, pretty):
+        if pretty:
+            return _stdlib_dumps(data, True)
+        return orjson.dumps(data)
+
+    register_codec("orjson", _orjson_dumps, orjson.loads)
+
+DEFAULT_CODEC = os.environ.get("RELAB_JSON_CODEC") or ("orjson" if orjson is not None else "stdlib")
+PRETTY = os.environ.get("RELAB_JSON_PRETTY", "0") == "1"
+GZIP_THRESHOLD = int(os.environ.get("RELAB_GZIP_THRESHOLD", "0"))
+
+def _get(codec):
+    name = codec or DEFAULT_CODEC
+    if name not in _codecs:
+        raise ValueError(f"unknown JSON codec {name!r}, available: {', '.join(_codecs)}")
+    return _codecs[name]
+
+#------------------------------------------------------
+# ENCODE / DECODE
+#------------------------------------------------------
+def encode(data, pretty=None, compress=None, codec=None):
+    dumps, _ = _get(codec)
+    raw = dumps(data, PRETTY if pretty is None else pretty)
+    if compress is None:
+        compress = 0 < GZIP_THRESHOLD < len(raw)
+    if compress:
+        # mtime=0 keeps identical content byte-identical (no spurious syncs)
+        raw = gzip.compress(raw, compresslevel=6, mtime=0)
+    return raw
+
+def decode(raw, codec=None):
+    _, loads = _get(codec)
+    if raw[:2] == GZIP_MAGIC:
+        raw = gzip.decompress(raw)
+    if raw[:3] == UTF8_BOM:
+        raw = raw[3:]
+    return loads(raw)
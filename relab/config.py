@@ -0,0 +1,119 @@
+import os
+
+#-------------------------------------------------------
+# CONFIGURATION - update these paths to match your PC
+#------------------------------------------------------
+# Every value can be overridden from the environment, so CLI tools and
+# servers on other machines don't need code edits. Nothing here touches the
+# disk or the network; folders are created when something is written.
+
+SHARED_FOLDER = os.environ.get("RELAB_SHARED_FOLDER", r"C:\Users\1000329829\OneDrive - Western Digital\RE_LAB_PROCEDURE")
+TESTS_FILE = os.path.join(SHARED_FOLDER, "tests.json")
+PROCEDURES_FOLDER = os.path.join(SHARED_FOLDER, "TestProcedures")
+PROC_SUFFIX = "_procedures.json"
+
+# Local OneDrive root and the SharePoint folder it syncs with
+SHAREPOINT_BASE_LOCAL = os.environ.get("RELAB_SHAREPOINT_BASE_LOCAL", r"C:\Users\1000329829\OneDrive - Western Digital")
+SHAREPOINT_BASE_URL = os.environ.get("RELAB_SHAREPOINT_BASE_URL", "https://sharedspace-my.sharepoint.com/:f:/r/personal/deveepria_sankaran_wdc_com/Documents/RE_LAB_PROCEDURE?csf=1&web=1&e=OymaqI")
+# More local prefix -> URL rules (JSON {"C:\\Users\\me\\OneDrive - Western Digital": "https://..."}),
+# e.g. every user's OneDrive root; links are mapped when shown (relab/sharepoint.py)
+SHAREPOINT_MAP_FILE = os.environ.get("RELAB_SHAREPOINT_MAP_FILE", "")
+
+# GitHub connection (5.0 dashboard and --github-repo CLI options)
+GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN", "")
+REPO_NAME = os.environ.get("RELAB_GITHUB_REPO", "PNRELAB/RE_LAB_PROCEDURE")
+GITHUB_PROCEDURES_FOLDER = "TestProcedures"  #folder inside repo to store procedures
+GITHUB_API_URL = os.environ.get("RELAB_GITHUB_API_URL", "https://api.github.com")  #benchmarks point this at a local fake
+
+# Attachments uploaded through the GitHub dashboard are committed to the repo
+# up to GITHUB_ATTACHMENT_MAX_MB; bigger files are copied to EXTERNAL_STORE_DIR
+# (a share every user can read, optionally served at EXTERNAL_STORE_URL) and
+# the repo only gets a small pointer file.
+GITHUB_ATTACHMENT_MAX_MB = float(os.environ.get("RELAB_GITHUB_ATTACHMENT_MAX_MB", "50"))
+EXTERNAL_STORE_DIR = os.environ.get("RELAB_EXTERNAL_STORE_DIR", "")
+EXTERNAL_STORE_URL = os.environ.get("RELAB_EXTERNAL_STORE_URL", "")
+
+def set_shared_folder(shared_folder):
+    global SHARED_FOLDER, TESTS_FILE, PROCEDURES_FOLDER
+    SHARED_FOLDER = shared_folder
+    TESTS_FILE = os.path.join(shared_folder, "tests.json")
+    PROCEDURES_FOLDER = os.path.join(shared_folder, "TestProcedures")
+
+# Storage backend: local, github or memory. Reads are cached per process
+# and revalidated against the store at most every CACHE_TTL seconds; a
+# WRITE_BATCH_DELAY > 0 coalesces concurrent writes into one write/commit.
+BACKEND = os.environ.get("RELAB_BACKEND", "local")
+CACHE_TTL = {
+    "local": float(os.environ.get("RELAB_CACHE_TTL", "1")),
+    "github": float(os.environ.get("RELAB_GITHUB_CACHE_TTL", "10")),
+    "memory": 0.0,
+}
+WRITE_BATCH_DELAY = float(os.environ.get("RELAB_WRITE_BATCH_DELAY", "0"))
+
+# Writes are serialized across processes with a lock file next to tests.json
+# and re-checked against the versions they read; batches of appends are
+# retried on conflict, anything else raises WriteConflict.
+WRITE_LOCK_TIMEOUT = float(os.environ.get("RELAB_WRITE_LOCK_TIMEOUT", "10"))
+WRITE_LOCK_STALE = float(os.environ.get("RELAB_WRITE_LOCK_STALE", "30"))
+WRITE_RETRIES = int(os.environ.get("RELAB_WRITE_RETRIES", "5"))
+
+# Mutations carrying an idempotency key (the dashboards' buttons) are
+# applied once per IDEMPOTENCY_WINDOW seconds; each session may write
+# WRITE_RATE times per second with bursts of WRITE_BURST (0 disables).
+IDEMPOTENCY_WINDOW = float(os.environ.get("RELAB_IDEMPOTENCY_WINDOW", "60"))
+WRITE_RATE = float(os.environ.get("RELAB_WRITE_RATE", "2"))
+WRITE_BURST = int(os.environ.get("RELAB_WRITE_BURST", "10"))
+
+# Procedures added or edited within this many hours (by anyone, per the
+# change journal) are highlighted in the procedures table
+HIGHLIGHT_HOURS = float(os.environ.get("RELAB_HIGHLIGHT_HOURS", "24"))
+
+# Parsed catalog data is saved as JSON to WARM_CACHE_DIR (on the server's own
+# disk) every WARM_CACHE_INTERVAL seconds and at exit, and loaded again in the
+# background when a server starts, keeping the entries whose file versions
+# still match. Empty WARM_CACHE_DIR means the user's cache dir
+# (%LOCALAPPDATA%\relab, $XDG_CACHE_HOME/relab or ~/.cache/relab).
+WARM_CACHE = os.environ.get("RELAB_WARM_CACHE", "1") != "0"
+WARM_CACHE_DIR = os.environ.get("RELAB_WARM_CACHE_DIR", "")
+WARM_CACHE_INTERVAL = float(os.environ.get("RELAB_WARM_CACHE_INTERVAL", "60"))
+
+# Replicas sharing SHARED_FOLDER: writes bump .relab-versions.json and local
+# caches poll it every INVALIDATION_INTERVAL seconds, dropping only the tests
+# that changed. Entries are still revalidated (one stat) every CACHE_TTL, since
+# older dashboards, migrations and OneDrive/SMB sync write without bumping it.
+# SHARED_CACHE_TTL > 0 stretches that to SHARED_CACHE_TTL seconds - only for
+# folders nothing but relab ever writes to.
+SHARED_INVALIDATION = os.environ.get("RELAB_SHARED_INVALIDATION", "1") != "0"
+INVALIDATION_INTERVAL = float(os.environ.get("RELAB_INVALIDATION_INTERVAL", "1"))
+SHARED_CACHE_TTL = float(os.environ.get("RELAB_SHARED_CACHE_TTL", "0"))
+
+# Deduplicated snapshots of the shared folder (relab/snapshots.py), taken
+# every SNAPSHOT_INTERVAL seconds when something changed (0 disables the
+# schedule). Empty SNAPSHOT_DIR means <SHARED_FOLDER>/.relab-snapshots.
+SNAPSHOT_DIR = os.environ.get("RELAB_SNAPSHOT_DIR", "")
+SNAPSHOT_INTERVAL = float(os.environ.get("RELAB_SNAPSHOT_INTERVAL", "3600"))
+SNAPSHOT_KEEP = int(os.environ.get("RELAB_SNAPSHOT_KEEP", "336"))
+SNAPSHOT_LOCK_STALE = float(os.environ.get("RELAB_SNAPSHOT_LOCK_STALE", "3600"))
+
+# Backup, restore, reindex, migration and scrub run as background jobs
+# (relab/jobs.py), JOB_WORKERS at a time per server process. A job that has
+# not reported for JOB_STALE seconds is shown as interrupted; the newest
+# JOB_KEEP finished jobs are kept. Empty JOB_DIR means <SHARED_FOLDER>/.relab-jobs.
+JOB_DIR = os.environ.get("RELAB_JOB_DIR", "")
+JOB_WORKERS = int(os.environ.get("RELAB_JOB_WORKERS", "2"))
+JOB_STALE = float(os.environ.get("RELAB_JOB_STALE", "60"))
+JOB_KEEP = int(os.environ.get("RELAB_JOB_KEEP", "50"))
+
+# Prometheus text-format metrics on http://METRICS_HOST:<port>/metrics,
+# started once per server process. Each replica on a host takes the first
+# free port of METRICS_PORT .. METRICS_PORT + METRICS_PORT_RANGE - 1 and logs
+# it (0 disables the endpoint).
+METRICS_HOST = os.environ.get("RELAB_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("RELAB_METRICS_PORT", "9464"))
+METRICS_PORT_RANGE = int(os.environ.get("RELAB_METRICS_PORT_RANGE", "10"))
+
+# Opt-in rerun profiler (or ?profile=1 per browser tab). Empty PROFILE_DIR
+# means <temp dir>/relab-profiles.
+PROFILE = os.environ.get("RELAB_PROFILE") == "1"
+PROFILE_DIR = os.environ.get("RELAB_PROFILE_DIR", "")
+PROFILE_KEEP = int(os.environ.get("RELAB_PROFILE_KEEP", "50"))
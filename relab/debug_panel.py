@@ -0,0 +1,92 @@
+import contextvars
+import os
+
+from relab import config, instrument, profiler
+
+#------------------------------------------------------
+# HIDDEN DEBUG PANEL - open the dashboard with ?debug=1 (or RELAB_DEBUG=1)
+#------------------------------------------------------
+# Shows where the current rerun spent its time: per-kind counts/totals,
+# time per test, the slowest single operations, and the process-wide rolling
+# percentiles. With ?profile=1 (or RELAB_PROFILE=1) every rerun also runs
+# under cProfile and the panel lists the hotspots of the last reruns.
+# Streamlit is imported only when a dashboard calls in here.
+
+_profile = contextvars.ContextVar("relab_profile", default=None)
+
+def session_id():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        ctx = get_script_run_ctx()
+        return ctx.session_id if ctx is not None else None
+    except Exception:
+        return None
+
+def _query_flag(name):
+    import streamlit as st
+
+    try:
+        return st.query_params.get(name) == "1"
+    except AttributeError:
+        return st.experimental_get_query_params().get(name, [""])[0] == "1"
+
+def debug_enabled():
+    return os.environ.get("RELAB_DEBUG") == "1" or _query_flag("debug")
+
+def profile_enabled():
+    return config.PROFILE or _query_flag("profile")
+
+def begin_rerun():
+    trace = instrument.begin_rerun(session_id())
+    _profile.set(profiler.start() if profile_enabled() else None)
+    return trace
+
+def end_rerun(trace):
+    profiler.stop(_profile.get(), trace.session)
+    _profile.set(None)
+    return instrument.end_rerun(trace)
+
+def render_debug_panel(trace):
+    import streamlit as st
+
+    if trace is not None and profile_enabled():
+        render_profile_summary()
+    if trace is None or not debug_enabled():
+        return
+    previous = instrument.last_rerun(trace.session)
+    with st.expander("🛠️ Debug: rerun I/O and timing", expanded=True):
+        c1, c2, c3 = st.columns(3)
+        c1.metric("This rerun (so far)", f"{trace.total_ms:.0f} ms")
+        c2.metric("Previous rerun", f"{previous.total_ms:.0f} ms" if previous else "-")
+        c3.metric("Operations", len(trace.ops) + trace.dropped)
+
+        st.markdown("**Breakdown by operation**")
+        st.dataframe([{"operation": kind, "count": v["count"], "total ms": round(v["total_ms"], 2)}
+                      for kind, v in trace.breakdown().items()], use_container_width=True, hide_index=True)
+
+        by_test = trace.by_test()
+        if by_test:
+            st.markdown("**Time per test**")
+            st.dataframe([{"test": t, "ms": round(ms, 2)} for t, ms in by_test.items()],
+                         use_container_width=True, hide_index=True)
+
+        st.markdown("**Slowest operations**")
+        st.dataframe([{"operation": kind, "ms": round(ms, 2), "test": test or "", "target": str(target or "")}
+                      for kind, ms, target, test in trace.slowest(10)], use_container_width=True, hide_index=True)
+
+        st.markdown("**Rolling percentiles (all sessions)**")
+        st.dataframe([dict(operation=kind, **{k: round(v, 2) if isinstance(v, float) else v for k, v in stats.items()})
+                      for kind, stats in instrument.percentiles().items()], use_container_width=True, hide_index=True)
+        st.caption(f"Session: {trace.session or 'n/a'}")
+
+def render_profile_summary(last=20):
+    import streamlit as st
+
+    with st.expander(f"🔬 Profile: top cumulative functions (last {last} profiled reruns)", expanded=True):
+        rows = profiler.summarize(last=last)
+        if rows:
+            st.dataframe(rows, use_container_width=True, hide_index=True)
+        else:
+            st.caption("No saved profiles yet - they appear from the next rerun on.")
+        st.caption(f"Profiles: {profiler.profile_dir()} (newest {config.PROFILE_KEEP} kept)")
@@ -0,0 +1,223 @@
+import base64
+import hashlib
+import os
+import shutil
+import threading
+
+from relab import config
+from relab.codec import decode, encode
+from relab.instrument import timed
+from relab.locking import WriteConflict
+
+#--------------------------------------------
+# CONNECTION - made on first use, once per process
+#--------------------------------------------
+_settings = {"token": None, "repo_name": None, "procedures_folder": None}
+_repo = None
+_repo_lock = threading.Lock()
+
+def configure(token=None, repo_name=None, procedures_folder=None):
+    global _repo
+    with _repo_lock:
+        _settings.update(token=token, repo_name=repo_name, procedures_folder=procedures_folder)
+        _repo = None
+
+def procedures_folder():
+    return _settings["procedures_folder"] or config.GITHUB_PROCEDURES_FOLDER
+
+def get_repo():
+    global _repo
+    with _repo_lock:
+        if _repo is None:
+            from github import Auth, Github
+
+            token = _settings["token"] or config.GITHUB_TOKEN
+            g = Github(auth=Auth.Token(token) if token else None, base_url=config.GITHUB_API_URL)
+            _repo = g.get_repo(_settings["repo_name"] or config.REPO_NAME)
+        return _repo
+
+def rate_limit():
+    # (remaining, limit) from the last API response headers; no extra request
+    with _repo_lock:
+        repo = _repo
+    if repo is None:
+        return None
+    remaining, limit = repo.requester.rate_limiting
+    return None if limit < 0 else (remaining, limit)
+
+#--------------------------------------------
+# GITHUB JSON READ/WRITE
+#---------------------------------------------
+def read_json(repo, file_path, ref=None):
+    try:
+        with timed("github.get_contents", file_path):
+            contents = repo.get_contents(file_path, ref=ref) if ref else repo.get_contents(file_path)
+        return decode(contents.decoded_content)
+    except:
+        return []  #return empty if file doesn't exist
+
+def read_json_from_github(file_path):
+    return read_json(get_repo(), file_path)
+
+def write_json_to_github(file_path, data, commit_message="Update from Streamlit"):
+    repo = get_repo()
+    with timed("github.write_file", file_path):
+        try:
+            contents = repo.get_contents(file_path)
+            repo.update_file(contents.path, commit_message, encode(data, compress=False), contents.sha)
+        except:
+            repo.create_file(file_path, commit_message, encode(data, compress=False))
+
+def commit_files(repo, files, commit_message="Update from Streamlit", deleted=(), ref=None):
+    # Writes every {path: data} in files (and removes deleted paths) as ONE
+    # commit through the git data API instead of one contents call per file.
+    # With ref (the branch ref the data was read at) the commit must be a
+    # fast-forward of it, otherwise WriteConflict is raised.
+    if not files and not deleted:
+        return None
+    with timed("github.commit", commit_message):
+        return _commit_tree(repo, files, commit_message, deleted, ref)
+
+def _commit_tree(repo, files, commit_message, deleted, ref):
+    from github import GithubException, InputGitTreeElement
+
+    if ref is None:
+        ref = repo.get_git_ref(f"heads/{repo.default_branch}")
+    base_commit = repo.get_git_commit(ref.object.sha)
+    # str content (e.g. journal blocks) is stored as-is, BlobRef points at an
+    # uploaded blob, anything else is stored as JSON
+    elements = [InputGitTreeElement(path, "100644", "blob", sha=data.sha) if isinstance(data, BlobRef) else
+                InputGitTreeElement(path, "100644", "blob",
+                                    content=data if isinstance(data, str) else encode(data, compress=False).decode("utf-8"))
+                for path, data in files.items()]
+    elements += [InputGitTreeElement(path, "100644", "blob", sha=None) for path in deleted]
+    tree = repo.create_git_tree(elements, base_commit.tree)
+    commit = repo.create_git_commit(commit_message, tree, [base_commit])
+    try:
+        ref.edit(commit.sha)
+    except GithubException as e:
+        if e.status == 422:
+            raise WriteConflict(f"{ref.ref} moved while writing") from e
+        raise
+    return commit.sha
+
+#--------------------------------------------
+# ATTACHMENTS - git blobs, large files in an external store
+#--------------------------------------------
+# Uploads go straight to the blob API and are only referenced by the next
+# data commit (GitHubBackend.stage_attachment), so the file, the procedure
+# pointing at it and the journal entry land in one commit. The request body
+# is base64-encoded on the fly from UPLOAD_CHUNK reads, so memory stays flat
+# whatever the file size. Files over GITHUB_ATTACHMENT_MAX_MB go to
+# EXTERNAL_STORE_DIR (content-addressed by sha256) and the repo gets a Git
+# LFS-style pointer file in their place.
+
+UPLOAD_CHUNK = 3 * 256 * 1024  # multiple of 3: base64 pieces concatenate cleanly
+
+class BlobRef:
+    # commit_files() value for a blob that is already uploaded
+    __slots__ = ("sha",)
+
+    def __init__(self, sha):
+        self.sha = sha
+
+    def __repr__(self):
+        return f"BlobRef({self.sha!r})"
+
+def _size_of(fileobj):
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+def _read_chunks(fileobj, size=UPLOAD_CHUNK):
+    fileobj.seek(0)
+    while True:
+        data = fileobj.read(size)
+        if not data:
+            return
+        yield data
+
+def file_digests(fileobj):
+    # -> (size, git blob sha1, sha256) in one streaming pass
+    size = _size_of(fileobj)
+    git = hashlib.sha1(b"blob %d\0" % size)
+    sha256 = hashlib.sha256()
+    for data in _read_chunks(fileobj):
+        git.update(data)
+        sha256.update(data)
+    return size, git.hexdigest(), sha256.hexdigest()
+
+class _Base64Body:
+    # File-like JSON body {"encoding": "base64", "content": "..."} with a
+    # known length, read by the HTTP client piece by piece
+    def __init__(self, fileobj, size):
+        self._prefix = b'{"encoding":"base64","content":"'
+        self._suffix = b'"}'
+        self._length = len(self._prefix) + 4 * ((size + 2) // 3) + len(self._suffix)
+        self._pieces = self._generate(fileobj)
+        self._buffer = b""
+        self._offset = 0
+
+    def _generate(self, fileobj):
+        yield self._prefix
+        for data in _read_chunks(fileobj):
+            yield base64.b64encode(data)
+        yield self._suffix
+
+    def __len__(self):
+        return self._length
+
+    def read(self, amount=-1):
+        if self._offset >= len(self._buffer):
+            self._buffer, self._offset = next(self._pieces, b""), 0
+        if amount < 0:
+            data = self._buffer[self._offset:] + b"".join(self._pieces)
+            self._buffer, self._offset = b"", 0
+            return data
+        # Short reads at piece boundaries are fine for a file-like body
+        data = self._buffer[self._offset:self._offset + amount]
+        self._offset += len(data)
+        return data
+
+def _token(repo):
+    auth = getattr(repo.requester, "auth", None)
+    return getattr(auth, "token", None) or _settings["token"] or config.GITHUB_TOKEN
+
+def upload_blob(repo, fileobj, expected_sha=None):
+    # Streams fileobj to POST /git/blobs; returns the blob sha
+    import requests
+
+    size = _size_of(fileobj)
+    headers = {"Accept": "application/vnd.github+json", "Content-Type": "application/json",
+               "Content-Length": str(len(_Base64Body(fileobj, size)))}
+    token = _token(repo)
+    if token:
+        headers["Authorization"] = f"token {token}"
+    with timed("github.upload_blob", getattr(fileobj, "name", None)):
+        response = requests.post(f"{repo.url}/git/blobs", data=_Base64Body(fileobj, size), headers=headers, timeout=600)
+    if response.status_code != 201:
+        raise RuntimeError(f"blob upload failed: {response.status_code} {response.text[:200]}")
+    sha = response.json()["sha"]
+    if expected_sha and sha != expected_sha:
+        raise RuntimeError(f"blob upload corrupted: expected {expected_sha}, got {sha}")
+    return sha
+
+def lfs_pointer(sha256, size):
+    return f"version https://git-lfs.github.com/spec/v1\noid sha256:{sha256}\nsize {size}\n"
+
+def store_external(fileobj, sha256):
+    # Copies fileobj into EXTERNAL_STORE_DIR/ab/abcdef... once; -> (path, url)
+    if not config.EXTERNAL_STORE_DIR:
+        raise ValueError(f"file is over {config.GITHUB_ATTACHMENT_MAX_MB:g} MB and RELAB_EXTERNAL_STORE_DIR is not set")
+    relative = f"{sha256[:2]}/{sha256}"
+    path = os.path.join(config.EXTERNAL_STORE_DIR, sha256[:2], sha256)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        fileobj.seek(0)
+        with timed("external_store.write", path), open(tmp, "wb") as f:
+            shutil.copyfileobj(fileobj, f, UPLOAD_CHUNK)
+        os.replace(tmp, path)
+    url = f"{config.EXTERNAL_STORE_URL.rstrip('/')}/{relative}" if config.EXTERNAL_STORE_URL else path
+    return path, url
@@ -0,0 +1,145 @@
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+#------------------------------------------------------
+# I/O INSTRUMENTATION - per-rerun traces + rolling percentiles
+#------------------------------------------------------
+# Every storage boundary (read_json/write_json, GitHub calls, stats of
+# attachments, attachment reads, backend calls) is wrapped in timed(). The
+# op is added to the rerun trace of the current script run (Streamlit runs
+# each session's script in its own thread, so a context variable follows
+# it) and to a process-wide rolling window per kind. backend.* ops are the
+# dashboard-facing calls and include the I/O ops recorded beneath them.
+#
+#   RELAB_INSTRUMENT=0        turn recording off
+#   RELAB_INSTRUMENT_WINDOW   samples kept per kind for percentiles (2000)
+
+ENABLED = os.environ.get("RELAB_INSTRUMENT", "1") != "0"
+ROLLING_WINDOW = int(os.environ.get("RELAB_INSTRUMENT_WINDOW", "2000"))
+MAX_SESSIONS = 200
+MAX_OPS_PER_RERUN = 5000
+
+_current = contextvars.ContextVar("relab_rerun", default=None)
+_lock = threading.Lock()
+_rolling = {}             # kind -> deque of ms
+_last = OrderedDict()     # session -> last finished RerunTrace
+_observers = []           # fn(kind, ms, session), e.g. the metrics exporter
+
+class RerunTrace:
+    __slots__ = ("session", "started", "finished", "ops", "dropped")
+
+    def __init__(self, session=None):
+        self.session = session
+        self.started = time.perf_counter()
+        self.finished = None
+        self.ops = []  # (kind, ms, target, test)
+        self.dropped = 0
+
+    def add(self, kind, ms, target=None, test=None):
+        if len(self.ops) < MAX_OPS_PER_RERUN:
+            self.ops.append((kind, ms, target, test))
+        else:
+            self.dropped += 1
+
+    @property
+    def total_ms(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return (end - self.started) * 1000
+
+    def breakdown(self):
+        result = {}
+        for kind, ms, _, _ in self.ops:
+            entry = result.setdefault(kind, {"count": 0, "total_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += ms
+        return dict(sorted(result.items(), key=lambda kv: -kv[1]["total_ms"]))
+
+    def by_test(self):
+        result = {}
+        for _, ms, _, test in self.ops:
+            if test is not None:
+                result[test] = result.get(test, 0.0) + ms
+        return dict(sorted(result.items(), key=lambda kv: -kv[1]))
+
+    def slowest(self, n=10):
+        return sorted(self.ops, key=lambda op: -op[1])[:n]
+
+#------------------------------------------------------
+# RECORDING
+#------------------------------------------------------
+def begin_rerun(session=None):
+    trace = RerunTrace(session)
+    _current.set(trace)
+    return trace
+
+def end_rerun(trace):
+    trace.finished = time.perf_counter()
+    _current.set(None)
+    record("rerun", trace.total_ms, trace=False, session=trace.session)
+    with _lock:
+        _last[trace.session] = trace
+        _last.move_to_end(trace.session)
+        while len(_last) > MAX_SESSIONS:
+            _last.popitem(last=False)
+    return trace
+
+def current_trace():
+    return _current.get()
+
+def add_observer(fn):
+    with _lock:
+        if fn not in _observers:
+            _observers.append(fn)
+
+def record(kind, ms, target=None, test=None, trace=True, session=None):
+    if not ENABLED:
+        return
+    if trace:
+        current = _current.get()
+        if current is not None:
+            current.add(kind, ms, target, test)
+            session = current.session
+    with _lock:
+        samples = _rolling.get(kind)
+        if samples is None:
+            samples = _rolling[kind] = deque(maxlen=ROLLING_WINDOW)
+        samples.append(ms)
+        observers = list(_observers)
+    for fn in observers:
+        fn(kind, ms, session)
+
+@contextmanager
+def timed(kind, target=None, test=None):
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(kind, (time.perf_counter() - start) * 1000, target, test)
+
+#------------------------------------------------------
+# QUERIES
+#------------------------------------------------------
+def _pct(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(round((len(ordered) - 1) * pct / 100.0)))]
+
+def percentiles():
+    with _lock:
+        snapshot = {kind: sorted(samples) for kind, samples in _rolling.items()}
+    return {kind: {"count": len(s), "p50_ms": _pct(s, 50), "p90_ms": _pct(s, 90), "p99_ms": _pct(s, 99), "max_ms": s[-1]}
+            for kind, s in sorted(snapshot.items()) if s}
+
+def last_rerun(session=None):
+    with _lock:
+        return _last.get(session)
+
+def reset():
+    with _lock:
+        _rolling.clear()
+        _last.clear()
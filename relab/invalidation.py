@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+
+from relab import config
+from relab.instrument import timed
+from relab.storage import read_json, write_json
+
+#------------------------------------------------------
+# SHARED CACHE INVALIDATION - several server processes, one SHARED_FOLDER
+#------------------------------------------------------
+# Every write bumps a sequence number per touched test in a small version
+# file next to tests.json (inside the write lock):
+#   {"seq": 42, "tests_list": 40, "tests": {"HAST": 42, "Shock": 17}}
+# Each replica's cache polls that one file (a single stat, at most every
+# INVALIDATION_INTERVAL seconds) and drops only the tests whose number moved,
+# so another replica's writes show up at once instead of at the next
+# CACHE_TTL revalidation (which still catches writers that don't bump it).
+
+VERSIONS_NAME = ".relab-versions.json"
+
+def _empty():
+    return {"seq": 0, "tests_list": 0, "tests": {}}
+
+class VersionChannel:
+    # One channel per cache: poll() hands out each change once
+    def __init__(self, path, interval=None):
+        self.path = path
+        self.interval = config.INVALIDATION_INTERVAL if interval is None else interval
+        self._lock = threading.Lock()
+        self._seen = None        # file content as of the last poll/bump
+        self._stat = None
+        self._last_poll = 0.0
+        self._pending = set()
+        self._pending_list = False
+
+    def _stat_file(self):
+        try:
+            with timed("stat", self.path):
+                info = os.stat(self.path)
+        except OSError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def _load(self):
+        try:
+            data = read_json(self.path)
+        except Exception:
+            return _empty()  # half-synced or hand-edited: treat as a reset
+        if not isinstance(data, dict) or not isinstance(data.get("tests"), dict):
+            return _empty()
+        return data
+
+    def _collect(self, current):
+        # Queues what changed between the last seen content and current
+        seen = self._seen
+        if seen is None:
+            return True
+        if current["seq"] < seen["seq"]:
+            return True  # file was recreated
+        tests = seen["tests"].keys() | current["tests"].keys()
+        self._pending.update(t for t in tests if seen["tests"].get(t) != current["tests"].get(t))
+        self._pending_list = self._pending_list or seen.get("tests_list") != current.get("tests_list")
+        return False
+
+    def bump(self, tests, tests_list=False):
+        # Called by the writer while it holds the write lock
+        with self._lock:
+            current = self._load()
+            reset = self._collect(current)
+            seq = current["seq"] + 1
+            for test_name in tests:
+                current["tests"][test_name] = seq
+            if tests_list:
+                current["tests_list"] = seq
+            current["seq"] = seq
+            write_json(self.path, current)
+            # Our own write is already invalidated by the cache layer
+            self._seen = current if not reset else None
+            self._stat = self._stat_file() if not reset else None
+
+    def poll(self, force=False):
+        # -> (tests, tests_list_changed, reset) or None when nothing changed
+        now = time.monotonic()
+        with self._lock:
+            if force or now - self._last_poll >= self.interval:
+                self._last_poll = now
+                stat = self._stat_file()
+                if self._seen is None or stat != self._stat:
+                    current = self._load()
+                    reset = self._collect(current)
+                    self._seen, self._stat = current, stat
+                    if reset:
+                        self._pending.clear()
+                        self._pending_list = False
+                        return set(), True, True
+            if not self._pending and not self._pending_list:
+                return None
+            changes = (self._pending, self._pending_list, False)
+            self._pending, self._pending_list = set(), False
+            return changes
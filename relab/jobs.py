@@ -0,0 +1,418 @@
+import json
+import os
+import queue
+import shutil
+import socket
+import threading
+import time
+import uuid
+
+from relab import config
+from relab.journal import current_actor, set_actor
+
+#------------------------------------------------------
+# MAINTENANCE JOBS - backup, restore, snapshots, reindex, migrate, scrub, relink off the rerun
+#------------------------------------------------------
+# Heavy operations used to run inside the button's rerun: the page froze
+# for minutes and a browser refresh lost the result. They are now submitted
+# to a small pool of worker threads (JOB_WORKERS per process) and the
+# dashboards only poll the job table.
+#
+# <SHARED_FOLDER>/.relab-jobs/
+#   <id>.json        one record per job: kind, params, status, progress
+#                    (files/bytes done of total), result or error, heartbeat
+#   <id>.cancel      cancellation request (any process, any replica)
+#   backups/ uploads/  zips written by backups, zips uploaded for restore
+#
+# Jobs that rewrite the catalog (backup, restore, snapshot restore, migrate) run one at a time
+# per process; the catalog write lock serializes them against everyone else.
+# A job whose process died stops heartbeating and is reported "interrupted".
+#
+#   runner = get_job_runner(backend)
+#   job_id = runner.submit("backup")
+#   runner.get(job_id)["progress"]  -> {"files_done", "files_total", "bytes_done", "bytes_total"}
+#   runner.cancel(job_id)
+
+JOBS_NAME = ".relab-jobs"
+FINISHED = ("done", "failed", "cancelled", "interrupted")
+HEARTBEAT_INTERVAL = 5.0
+SAVE_INTERVAL = 0.5  # progress is written at most this often
+
+class JobCancelled(Exception):
+    pass
+
+#---------------- job kinds ----------------
+JOB_KINDS = {}  # kind -> (function(ctx, backend, params) -> result, exclusive)
+
+def job_kind(kind, exclusive=False):
+    def register(function):
+        JOB_KINDS[kind] = (function, exclusive)
+        return function
+    return register
+
+def _clear_cache(backend):
+    from relab.backends import CachingBackend, find_layer
+
+    cache = find_layer(backend, CachingBackend)
+    if cache is not None:
+        cache.clear()
+
+@job_kind("backup", exclusive=True)
+def _backup_job(ctx, backend, params):
+    from relab.backup import create_backup
+
+    zip_path = os.path.join(ctx.runner.root, "backups", f"RE_LAB_Backup-{ctx.job_id}.zip")
+    os.makedirs(os.path.dirname(zip_path), exist_ok=True)
+    create_backup(zip_path, backend.shared_folder, progress=ctx)
+    return {"zip": zip_path, "size": os.path.getsize(zip_path)}
+
+@job_kind("restore", exclusive=True)
+def _restore_job(ctx, backend, params):
+    from relab.backup import restore_backup
+
+    stats = restore_backup(params["path"], backend.shared_folder, progress=ctx)
+    _clear_cache(backend)
+    return stats
+
+@job_kind("migrate", exclusive=True)
+def _migrate_job(ctx, backend, params):
+    from relab.migrate import migrate_folder
+
+    results = migrate_folder(backend, check_only=params.get("check", False), progress=ctx)
+    _clear_cache(backend)
+    return {"migrated": len(results["migrated"]), "current": len(results["current"]), "invalid": results["invalid"]}
+
+@job_kind("snapshot", exclusive=True)
+def _snapshot_job(ctx, backend, params):
+    from relab.snapshots import SnapshotStore
+
+    manifest = SnapshotStore(backend.shared_folder).take(backend, note=params.get("note", "manual"))
+    return {"id": manifest["id"], "tests": len(manifest["tests"]), "size": manifest["size"]}
+
+@job_kind("snapshot_restore", exclusive=True)
+def _snapshot_restore_job(ctx, backend, params):
+    # params: {"snapshot": id, "test": name or None for the whole catalog}
+    from relab.snapshots import SnapshotStore
+
+    return SnapshotStore(backend.shared_folder).restore(backend, params["snapshot"], params.get("test"))
+
+@job_kind("reindex")
+def _reindex_job(ctx, backend, params):
+    # Drops every cached read, reloads every test, rebuilds the tag index
+    from relab.tags import get_tag_index
+
+    _clear_cache(backend)
+    tests = backend.list_tests()
+    ctx.total(len(tests), 0)
+    procedures = 0
+    for test_name in tests:
+        procedures += len(backend.get_procedures(test_name))
+        ctx.advance(1)
+    get_tag_index(backend).rebuild()
+    return {"tests": len(tests), "procedures": procedures}
+
+@job_kind("scrub")
+def _scrub_job(ctx, backend, params):
+    from relab.scrubber import get_scrubber
+
+    scrubber = get_scrubber(backend)
+    scrubber.scrub_once(progress=ctx)
+    report = scrubber.report()
+    return {"dangling": len(report["dangling"]), "orphaned": len(report["orphaned"])}
+
+@job_kind("relink", exclusive=True)
+def _relink_job(ctx, backend, params):
+    from relab.sharepoint import rewrite_links
+
+    return rewrite_links(backend, [tuple(m) for m in params.get("moves", ())], params.get("check", False), progress=ctx)
+
+#------------------------------------------------------
+# JOB CONTEXT - what a running job reports through
+#------------------------------------------------------
+class JobContext:
+    def __init__(self, runner, job):
+        self.runner = runner
+        self.job = job
+        self.job_id = job["id"]
+        self._cancel = threading.Event()
+        self._saved_at = 0.0
+
+    def total(self, files, bytes_):
+        with self.runner._lock:
+            self.job["progress"].update(files_total=files, bytes_total=bytes_)
+        self._tick(force=True)
+
+    def advance(self, files=1, bytes_=0):
+        with self.runner._lock:
+            progress = self.job["progress"]
+            progress["files_done"] += files
+            progress["bytes_done"] += bytes_
+        self._tick()
+
+    def message(self, text):
+        with self.runner._lock:
+            self.job["message"] = text
+        self._tick(force=True)
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled(self.job_id)
+
+    def _tick(self, force=False):
+        # Persists progress and picks up cancellations from other processes,
+        # at most every SAVE_INTERVAL seconds; raises JobCancelled if asked to stop
+        now = time.monotonic()
+        if force or now - self._saved_at >= SAVE_INTERVAL:
+            self._saved_at = now
+            if os.path.exists(self.runner._cancel_path(self.job_id)):
+                self._cancel.set()
+            self.runner._save(self.job)
+        self.check_cancelled()
+
+#------------------------------------------------------
+# JOB RUNNER - worker threads + the job table on the share
+#------------------------------------------------------
+class JobRunner:
+    def __init__(self, backend, root=None, workers=None):
+        self.backend = backend
+        self.root = root or config.JOB_DIR or os.path.join(backend.shared_folder, JOBS_NAME)
+        self.workers = workers or config.JOB_WORKERS
+        self._lock = threading.Lock()
+        self._exclusive = threading.Lock()  # catalog-rewriting jobs, one at a time
+        self._queue = queue.Queue()
+        self._active = {}  # job id -> JobContext (queued or running here)
+        self._listed = None  # (folder mtime, records)
+        self._threads = []
+
+    #---------------- lifecycle ----------------
+    def start(self):
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(target=self._work, name=f"relab-job-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+                thread = threading.Thread(target=self._heartbeat, name="relab-job-heartbeat", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def _work(self):
+        while True:
+            ctx = self._queue.get()
+            try:
+                self._run(ctx)
+            finally:
+                self._queue.task_done()
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with self._lock:
+                active = list(self._active.values())
+            for ctx in active:
+                try:
+                    if os.path.exists(self._cancel_path(ctx.job_id)):
+                        ctx.cancel()
+                    self._save(ctx.job)
+                except OSError:
+                    pass  # share temporarily unavailable - next beat
+
+    #---------------- job table ----------------
+    def _path(self, job_id):
+        return os.path.join(self.root, f"{job_id}.json")
+
+    def _cancel_path(self, job_id):
+        return os.path.join(self.root, f"{job_id}.cancel")
+
+    def _save(self, job):
+        with self._lock:
+            job["heartbeat"] = time.time()
+            data = json.dumps(job, indent=1)
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(job["id"])
+        temp_file = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_file, path)
+
+    def _read(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None  # being replaced or removed
+
+    def _mark_stale(self, job):
+        # Queued/running in a process that stopped heartbeating
+        if job["status"] in FINISHED or job["id"] in self._active:
+            return job
+        if time.time() - job.get("heartbeat", 0) < max(config.JOB_STALE, 3 * HEARTBEAT_INTERVAL):
+            return job
+        job = dict(job, status="interrupted", finished=job.get("heartbeat"),
+                   error=f"worker {job.get('host')}:{job.get('pid')} stopped")
+        try:
+            self._save(job)
+        except OSError:
+            pass
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            ctx = self._active.get(job_id)
+            if ctx is not None:
+                return json.loads(json.dumps(ctx.job))
+        job = self._read(self._path(job_id))
+        return self._mark_stale(job) if job is not None else None
+
+    def list(self, limit=20):
+        # Newest first, every process's jobs; re-read only when the folder changed
+        try:
+            mtime = os.stat(self.root).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if self._listed is None or self._listed[0] != mtime:
+            records = []
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json"):
+                        job = self._read(entry.path)
+                        if job is not None:
+                            records.append(job)
+            records.sort(key=lambda j: j["created"], reverse=True)
+            self._listed = (mtime, records)
+        jobs = []
+        for job in self._listed[1][:limit]:
+            fresh = self.get(job["id"]) if job["status"] not in FINISHED else job
+            if fresh is not None:
+                jobs.append(fresh)
+        return jobs
+
+    #---------------- submit / cancel ----------------
+    def submit(self, kind, params=None):
+        if kind not in JOB_KINDS:
+            raise ValueError(f"unknown job kind {kind!r} (one of {', '.join(sorted(JOB_KINDS))})")
+        job = {
+            "id": f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}",
+            "kind": kind,
+            "params": params or {},
+            "status": "queued",
+            "progress": {"files_done": 0, "files_total": None, "bytes_done": 0, "bytes_total": None},
+            "message": "",
+            "result": None,
+            "error": None,
+            "actor": current_actor(),
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "created": time.time(),
+            "started": None,
+            "finished": None,
+        }
+        ctx = JobContext(self, job)
+        with self._lock:
+            self._active[job["id"]] = ctx
+        self._save(job)
+        self.start()
+        self._queue.put(ctx)
+        return job["id"]
+
+    def cancel(self, job_id):
+        # Queued jobs never start; running jobs stop at their next progress report
+        with self._lock:
+            ctx = self._active.get(job_id)
+        if ctx is not None:
+            ctx.cancel()
+            return True
+        job = self._read(self._path(job_id))
+        if job is None or job["status"] in FINISHED:
+            return False
+        with open(self._cancel_path(job_id), "w") as f:
+            f.write(current_actor())
+        return True
+
+    def save_upload(self, uploaded_file):
+        # Copies a browser upload to the share so a job can read it after the rerun
+        folder = os.path.join(self.root, "uploads")
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{uuid.uuid4().hex[:12]}_{os.path.basename(uploaded_file.name)}")
+        uploaded_file.seek(0)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(uploaded_file, f, 1024 * 1024)
+        return path
+
+    #---------------- running ----------------
+    def _run(self, ctx):
+        job = ctx.job
+        function, exclusive = JOB_KINDS[job["kind"]]
+        set_actor(job["actor"])
+        try:
+            if exclusive:
+                while not self._exclusive.acquire(timeout=1.0):
+                    ctx._tick()
+            try:
+                ctx.check_cancelled()
+                with self._lock:
+                    job.update(status="running", started=time.time())
+                self._save(job)
+                result = function(ctx, self.backend, job["params"])
+            finally:
+                if exclusive:
+                    self._exclusive.release()
+            with self._lock:
+                job.update(status="done", result=result)
+        except JobCancelled:
+            with self._lock:
+                job.update(status="cancelled")
+        except Exception as e:
+            with self._lock:
+                job.update(status="failed", error=f"{type(e).__name__}: {e}")
+        with self._lock:
+            job["finished"] = time.time()
+            self._active.pop(job["id"], None)
+        try:
+            self._save(job)
+            if os.path.exists(self._cancel_path(job["id"])):
+                os.remove(self._cancel_path(job["id"]))
+            self.prune()
+        except OSError:
+            pass
+
+    #---------------- retention ----------------
+    def _owns(self, path):
+        root = os.path.abspath(self.root)
+        return os.path.commonpath([root, os.path.abspath(path)]) == root
+
+    def prune(self, keep=None):
+        # Keeps the newest `keep` finished jobs, their backup zips and uploads
+        keep = config.JOB_KEEP if keep is None else keep
+        finished = [j for j in self.list(limit=None) if j["status"] in FINISHED]
+        removed = 0
+        for job in finished[keep:]:
+            for path in ((job.get("result") or {}).get("zip"), job["params"].get("path"), self._path(job["id"])):
+                # Only files the runner wrote itself; a restore may point anywhere
+                if path and self._owns(path) and os.path.exists(path):
+                    os.remove(path)
+            removed += 1
+        return removed
+
+#------------------------------------------------------
+# ONE RUNNER PER SHARED FOLDER PER PROCESS
+#------------------------------------------------------
+_runners = {}
+_runners_lock = threading.Lock()
+
+def get_job_runner(backend, workers=None):
+    root = config.JOB_DIR or os.path.join(backend.shared_folder, JOBS_NAME)
+    with _runners_lock:
+        runner = _runners.get(root)
+        if runner is None:
+            runner = _runners[root] = JobRunner(backend, root, workers)
+        return runner.start()
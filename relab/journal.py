@@ -0,0 +1,352 @@
+import contextvars
+import json
+import os
+import socket
+import struct
+import threading
+import time
+
+#------------------------------------------------------
+# CHANGE JOURNAL - append-only log of every mutation
+#------------------------------------------------------
+# Backend.apply() appends one entry per effective change while it still
+# holds the write lock (local) or as part of the same commit (GitHub), so
+# sequence numbers follow the order the changes were stored in:
+#   {"seq": 118, "ts": 1760000000.5, "actor": "jdoe@LAB-PC-3", "op": "edit_procedure",
+#    "test": "HAST", "index": 2, "old_text": "...", "text": "...", "link": "..."}
+# op is one of add_test, delete_test, add_procedure, edit_procedure,
+# delete_procedure, restore, relink, migrate. since(seq) returns the entries after seq and
+# costs O(returned entries): the local journal keeps a fixed-width offset
+# index next to it, the GitHub one is split into blocks of BLOCK entries.
+# The local files are dot-named (.relab-journal.*) so they stay out of the
+# way of whatever else people keep in the shared folder.
+
+BLOCK = 1000
+_OFFSET = struct.Struct("<Q")
+
+#------------------------------------------------------
+# ACTOR - who is making the change (per thread / Streamlit session)
+#------------------------------------------------------
+_actor = contextvars.ContextVar("relab_actor", default=None)
+_default_actor = None
+
+def set_actor(actor):
+    _actor.set(actor)
+
+def current_actor():
+    global _default_actor
+    actor = _actor.get()
+    if actor:
+        return actor
+    if _default_actor is None:
+        import getpass
+
+        try:
+            user = getpass.getuser()
+        except Exception:
+            user = "unknown"
+        _default_actor = f"{user}@{socket.gethostname()}"
+    return _default_actor
+
+def streamlit_actor():
+    # Signed-in user's email when the deployment has auth, else the session
+    import streamlit as st
+
+    for attr in ("user", "experimental_user"):
+        try:
+            email = getattr(st, attr).email
+            if email:
+                return email
+        except Exception:
+            pass
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        return f"session-{get_script_run_ctx().session_id[:8]}@{socket.gethostname()}"
+    except Exception:
+        return current_actor()
+
+def _stamp(entries, first_seq):
+    now = time.time()
+    return [dict(e, seq=first_seq + i, ts=now) for i, e in enumerate(entries)]
+
+def _line(entry):
+    return json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+#------------------------------------------------------
+# BASE
+#------------------------------------------------------
+class Journal:
+    def last_seq(self):
+        raise NotImplementedError
+
+    def since(self, seq=0, limit=None):
+        raise NotImplementedError
+
+    def since_time(self, ts, fresh=False):
+        # Entries stamped at or after ts; newest-first scan, stops at the first older one.
+        # fresh=True: never from a cache (idempotency checks)
+        result = []
+        seq = self.last_seq()
+        while seq > 0:
+            chunk = self.since(max(0, seq - 256), limit=seq - max(0, seq - 256))
+            older = [e for e in chunk if e["ts"] < ts]
+            result[:0] = [e for e in chunk if e["ts"] >= ts]
+            if older:
+                break
+            seq -= len(chunk) or seq
+        return result
+
+    def recent_texts(self, test_name, seconds):
+        # Procedure texts added or edited in test_name during the last `seconds`
+        texts = set()
+        for e in self.since_time(time.time() - seconds):
+            if e.get("test") != test_name:
+                continue
+            if e["op"] in ("add_procedure", "edit_procedure"):
+                texts.add(e.get("text"))
+            elif e["op"] == "delete_test":
+                texts.clear()
+        return texts
+
+class MemoryJournal(Journal):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = []
+
+    def last_seq(self):
+        return len(self._entries)
+
+    def append(self, entries):
+        with self._lock:
+            stamped = _stamp(entries, len(self._entries) + 1)
+            self._entries.extend(stamped)
+        return stamped
+
+    def since(self, seq=0, limit=None):
+        with self._lock:
+            entries = self._entries[seq:]
+        return entries[:limit] if limit is not None else entries
+
+#------------------------------------------------------
+# LOCAL FOLDER - .relab-journal.jsonl + .relab-journal.idx (8-byte offset per entry)
+#------------------------------------------------------
+JOURNAL_FILE = ".relab-journal.jsonl"
+INDEX_FILE = ".relab-journal.idx"
+
+class LocalJournal(Journal):
+    # append() must run under the folder's write lock; reads need no lock
+    def __init__(self, folder):
+        self.path = os.path.join(folder, JOURNAL_FILE)
+        self.index_path = os.path.join(folder, INDEX_FILE)
+        self._cache = {"count": None, "ts": None, "entries": None}
+
+    def last_seq(self):
+        try:
+            return os.path.getsize(self.index_path) // _OFFSET.size
+        except OSError:
+            return 0
+
+    def _offset(self, f_idx, seq):
+        # Byte offset of entry number seq + 1
+        f_idx.seek(seq * _OFFSET.size)
+        return _OFFSET.unpack(f_idx.read(_OFFSET.size))[0]
+
+    def append(self, entries):
+        if not entries:
+            return []
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        try:
+            index_size = os.path.getsize(self.index_path)
+        except OSError:
+            index_size = 0
+        if index_size % _OFFSET.size:
+            # Drop an offset left half-written by a crash, or every later one is misaligned
+            with open(self.index_path, "r+b") as f_idx:
+                f_idx.truncate(index_size - index_size % _OFFSET.size)
+        count = self.last_seq()
+        stamped = _stamp(entries, count + 1)
+        with open(self.path, "ab") as f:
+            end = f.tell()
+            if count:
+                # Cut a line left half-written by a crash after the last indexed entry
+                with open(self.index_path, "rb") as f_idx:
+                    last = self._offset(f_idx, count - 1)
+                with open(self.path, "rb") as r:
+                    r.seek(last)
+                    valid_end = last + len(r.readline())
+                if end > valid_end:
+                    f.truncate(valid_end)
+                    end = valid_end
+            elif end:
+                f.truncate(0)
+                end = 0
+            offsets = []
+            for e in stamped:
+                data = _line(e).encode("utf-8")
+                offsets.append(end)
+                f.write(data)
+                end += len(data)
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.index_path, "ab") as f_idx:
+            f_idx.write(b"".join(_OFFSET.pack(o) for o in offsets))
+        return stamped
+
+    def since(self, seq=0, limit=None):
+        count = self.last_seq()
+        seq = max(0, seq)
+        if seq >= count:
+            return []
+        stop = count if limit is None else min(count, seq + limit)
+        with open(self.index_path, "rb") as f_idx:
+            start = self._offset(f_idx, seq)
+            end = self._offset(f_idx, stop) if stop < count else None
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            raw = f.read() if end is None else f.read(end - start)
+        entries = [json.loads(line) for line in raw.decode("utf-8").splitlines() if line.strip()]
+        return entries[:stop - seq]
+
+    def since_time(self, ts, fresh=False):
+        # Binary search on the stamps, then one read; while the journal length
+        # is unchanged a later ts is answered from the last result (the length
+        # is read every call, so this is always fresh)
+        count = self.last_seq()
+        cache = self._cache
+        if cache["count"] == count and cache["ts"] is not None and ts >= cache["ts"]:
+            return [e for e in cache["entries"] if e["ts"] >= ts]
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = self.since(mid, limit=1)
+            if entry and entry[0]["ts"] < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        entries = [e for e in self.since(lo) if e["ts"] >= ts]
+        self._cache = {"count": count, "ts": ts, "entries": entries}
+        return entries
+
+#------------------------------------------------------
+# GITHUB REPO - journal/000000.jsonl, journal/000001.jsonl, ... in the data commit
+#------------------------------------------------------
+# The open block is rewritten by every commit. The journal remembers the
+# block it put in the last commit it made; when the next write builds on that
+# commit (nobody else wrote in between) the block is extended from memory,
+# so journaling costs no API call on top of the data commit. Otherwise the
+# block is listed and read at the base commit, as before.
+
+class RepoJournal(Journal):
+    def __init__(self, backend, folder="journal", cache_ttl=10.0):
+        self.backend = backend
+        self.folder = folder
+        self.cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        self._recent = {"at": 0.0, "ts": None, "entries": None}
+        self._tail = {"commit": None, "block": None, "text": ""}  # open block as of our last commit
+
+    def _block_path(self, block):
+        return f"{self.folder}/{block:06d}.jsonl"
+
+    def _read_text(self, block, ref=None):
+        repo = self.backend.repo
+        try:
+            contents = repo.get_contents(self._block_path(block), ref=ref) if ref else repo.get_contents(self._block_path(block))
+        except Exception:
+            return ""
+        return contents.decoded_content.decode("utf-8")
+
+    def _read_block(self, block, ref=None):
+        return [json.loads(line) for line in self._read_text(block, ref).splitlines() if line.strip()]
+
+    def _last_block(self, ref=None):
+        repo = self.backend.repo
+        try:
+            listing = repo.get_contents(self.folder, ref=ref) if ref else repo.get_contents(self.folder)
+        except Exception:
+            return None
+        blocks = [int(c.name[:-6]) for c in listing if c.name.endswith(".jsonl") and c.name[:-6].isdigit()]
+        return max(blocks) if blocks else None
+
+    def last_seq(self):
+        block = self._last_block()
+        if block is None:
+            return 0
+        return block * BLOCK + len(self._read_block(block))
+
+    def commit_files(self, entries, ref=None):
+        # {path: jsonl text} to add to the data commit; ref is the base the commit builds on
+        if not entries:
+            return {}, []
+        sha = ref.object.sha if ref is not None else None
+        with self._lock:
+            tail = dict(self._tail)
+        if sha is not None and tail["commit"] == sha:
+            block, text = tail["block"], tail["text"]
+        else:
+            block = self._last_block(sha)
+            text = self._read_text(block, sha) if block is not None else ""
+        lines = [line + "\n" for line in text.splitlines() if line.strip()]
+        block = block or 0
+        stamped = _stamp(entries, block * BLOCK + len(lines) + 1)
+        files = {}
+        for e in stamped:
+            if len(lines) >= BLOCK:
+                files[self._block_path(block)] = "".join(lines)
+                block, lines = block + 1, []
+            lines.append(_line(e))
+        files[self._block_path(block)] = "".join(lines)
+        return files, stamped
+
+    def _tail_since(self, ts):
+        ref = getattr(self.backend, "_base_ref", lambda: None)()
+        with self._lock:
+            tail = dict(self._tail)
+        if ref is None or tail["commit"] != ref.object.sha:
+            return None
+        entries = [json.loads(line) for line in tail["text"].splitlines() if line.strip()]
+        if not entries or (entries[0]["ts"] >= ts and tail["block"] > 0):
+            return None  # the window reaches into an older block
+        return [e for e in entries if e["ts"] >= ts]
+
+    def committed(self, base_sha, commit_sha, files):
+        # After a data commit: remember the open block it contains, if any
+        blocks = sorted(path for path in files if path.startswith(f"{self.folder}/") and path.endswith(".jsonl"))
+        with self._lock:
+            if blocks:
+                block = int(blocks[-1][len(self.folder) + 1:-6])
+                self._tail = {"commit": commit_sha, "block": block, "text": files[blocks[-1]]}
+            elif self._tail["commit"] is not None and self._tail["commit"] == base_sha:
+                self._tail = dict(self._tail, commit=commit_sha)
+
+    def since(self, seq=0, limit=None):
+        last = self._last_block()
+        if last is None:
+            return []
+        result = []
+        for block in range(max(0, seq) // BLOCK, last + 1):
+            result += [e for e in self._read_block(block) if e["seq"] > seq]
+            if limit is not None and len(result) >= limit:
+                return result[:limit]
+        return result
+
+    def since_time(self, ts, fresh=False):
+        # One listing + the newest block(s) at most every cache_ttl seconds for
+        # the highlights. fresh=True (idempotency keys) must not miss a key
+        # another server committed a moment ago: it reads the repo, unless the
+        # write builds on our own last commit and its open block covers ts -
+        # the commit only lands as a fast-forward of that base anyway.
+        if fresh:
+            entries = self._tail_since(ts)
+            if entries is not None:
+                return entries
+        now = time.monotonic()
+        with self._lock:
+            recent = dict(self._recent)
+        if not fresh and recent["ts"] is not None and ts >= recent["ts"] and now - recent["at"] < self.cache_ttl:
+            return [e for e in recent["entries"] if e["ts"] >= ts]
+        entries = super().since_time(ts)
+        with self._lock:
+            self._recent = {"at": now, "ts": ts, "entries": entries}
+        return entries
@@ -0,0 +1,105 @@
+import os
+import random
+import socket
+import threading
+import time
+
+from relab import config
+from relab.instrument import record
+
+#------------------------------------------------------
+# WRITE LOCKS + CONFLICTS
+#------------------------------------------------------
+# FileLock is an advisory lock file created with O_EXCL, so it works the
+# same on NTFS, SMB shares and Linux. Threads of one process queue on an
+# in-process lock first and only one of them polls the file. The lock is
+# held for a single read-modify-write (a few ms), so a lock file older than
+# WRITE_LOCK_STALE seconds belongs to a crashed process and is broken.
+
+WRITE_LOCK_NAME = ".relab-write.lock"  # in the shared folder, next to tests.json
+
+class LockTimeout(TimeoutError):
+    pass
+
+class WriteConflict(RuntimeError):
+    # The store changed between reading and writing; the caller may retry
+    pass
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+def _thread_lock(path):
+    with _thread_locks_guard:
+        lock = _thread_locks.get(path)
+        if lock is None:
+            lock = _thread_locks[path] = threading.Lock()
+        return lock
+
+class FileLock:
+    def __init__(self, path, timeout=None, stale_after=None):
+        self.path = os.path.abspath(path)
+        self.timeout = config.WRITE_LOCK_TIMEOUT if timeout is None else timeout
+        self.stale_after = config.WRITE_LOCK_STALE if stale_after is None else stale_after
+        self._local = _thread_lock(self.path)
+        self._acquired_at = None
+
+    def acquire(self):
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.timeout
+        if not self._local.acquire(timeout=self.timeout):
+            raise LockTimeout(f"timed out waiting for {self.path}")
+        try:
+            self._acquire_file(deadline)
+        except BaseException:
+            self._local.release()
+            raise
+        self._acquired_at = time.perf_counter()
+        record("lock_wait", (self._acquired_at - start) * 1000, self.path)
+        return self
+
+    def _acquire_file(self, deadline):
+        delay = 0.001
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                self._break_if_stale()
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                continue
+            else:
+                try:
+                    os.write(fd, f"{socket.gethostname()} {os.getpid()} {time.time():.3f}\n".encode("utf-8"))
+                finally:
+                    os.close(fd)
+                return
+            if time.monotonic() >= deadline:
+                raise LockTimeout(f"timed out waiting for {self.path}")
+            time.sleep(random.uniform(0, delay))
+            delay = min(delay * 2, 0.05)
+
+    def _break_if_stale(self):
+        try:
+            age = time.time() - os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if age > self.stale_after:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def release(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        finally:
+            record("lock_hold", (time.perf_counter() - self._acquired_at) * 1000, self.path)
+            self._local.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from relab import config, github_store, instrument
+from relab.backends import BatchingBackend, CachingBackend, active_backends, find_layer
+
+#------------------------------------------------------
+# PROMETHEUS METRICS - text format on a small local HTTP endpoint
+#------------------------------------------------------
+# start_metrics_server() is safe to call on every rerun: the first call in a
+# process starts the endpoint, later calls do nothing. Latencies come from
+# the instrument module (every timed() op), cache and queue gauges are read
+# from the per-process backends when Prometheus scrapes.
+#
+#   curl http://127.0.0.1:9464/metrics     (replicas on one host: 9465, 9466, ... see the log)
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ACTIVE_SESSION_WINDOW = 30  # seconds since a session's last rerun (autorefresh is 5 s)
+
+log = logging.getLogger(__name__)
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.total += seconds
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            cumulative += n
+            yield f'{name}_bucket{{{labels}le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels}le="+Inf"}} {self.count}'
+        plain = f"{{{labels.rstrip(',')}}}" if labels else ""
+        yield f"{name}_sum{plain} {self.total}"
+        yield f"{name}_count{plain} {self.count}"
+
+_lock = threading.Lock()
+_ops = {}                  # kind -> Histogram
+_reruns = Histogram()
+_rerun_times = deque()     # monotonic timestamps of the last minute's reruns
+_sessions = {}             # session -> monotonic time of last rerun
+_last_duration = {}        # "backup"/"restore" -> seconds
+
+def observe(kind, ms, session=None):
+    now = time.monotonic()
+    with _lock:
+        if kind == "rerun":
+            _reruns.observe(ms / 1000)
+            _rerun_times.append(now)
+            if session is not None:
+                _sessions[session] = now
+            return
+        hist = _ops.get(kind)
+        if hist is None:
+            hist = _ops[kind] = Histogram()
+        hist.observe(ms / 1000)
+        if kind in ("backup", "restore"):
+            _last_duration[kind] = ms / 1000
+
+#------------------------------------------------------
+# EXPOSITION
+#------------------------------------------------------
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def render():
+    now = time.monotonic()
+    out = []
+    with _lock:
+        while _rerun_times and now - _rerun_times[0] > 60:
+            _rerun_times.popleft()
+        for session, seen in list(_sessions.items()):
+            if now - seen > ACTIVE_SESSION_WINDOW:
+                del _sessions[session]
+
+        out += ["# HELP relab_reruns_total Dashboard script reruns.", "# TYPE relab_reruns_total counter",
+                f"relab_reruns_total {_reruns.count}",
+                "# HELP relab_reruns_per_minute Reruns finished in the last 60 seconds.", "# TYPE relab_reruns_per_minute gauge",
+                f"relab_reruns_per_minute {len(_rerun_times)}",
+                f"# HELP relab_active_sessions Sessions that reran in the last {ACTIVE_SESSION_WINDOW} seconds.",
+                "# TYPE relab_active_sessions gauge", f"relab_active_sessions {len(_sessions)}",
+                "# HELP relab_rerun_duration_seconds Dashboard rerun duration.", "# TYPE relab_rerun_duration_seconds histogram"]
+        out += _reruns.lines("relab_rerun_duration_seconds", "")
+
+        out += ["# HELP relab_storage_op_duration_seconds Storage, GitHub and backend call latency by operation.",
+                "# TYPE relab_storage_op_duration_seconds histogram"]
+        for kind in sorted(_ops):
+            out += _ops[kind].lines("relab_storage_op_duration_seconds", f'op="{_escape(kind)}",')
+
+        out += ["# HELP relab_last_duration_seconds Duration of the last backup/restore.", "# TYPE relab_last_duration_seconds gauge"]
+        out += [f'relab_last_duration_seconds{{job="{job}"}} {seconds}' for job, seconds in sorted(_last_duration.items())]
+
+    out += ["# HELP relab_cache_hits_total Read cache hits.", "# TYPE relab_cache_hits_total counter",
+            "# HELP relab_cache_misses_total Read cache misses.", "# TYPE relab_cache_misses_total counter",
+            "# HELP relab_cache_hit_ratio Read cache hits / lookups.", "# TYPE relab_cache_hit_ratio gauge",
+            "# HELP relab_write_queue_depth Mutations waiting in the write batcher.", "# TYPE relab_write_queue_depth gauge"]
+    for name, backend in sorted(active_backends().items()):
+        cache = find_layer(backend, CachingBackend)
+        if cache is not None:
+            lookups = cache.hits + cache.misses
+            out += [f'relab_cache_hits_total{{backend="{name}"}} {cache.hits}',
+                    f'relab_cache_misses_total{{backend="{name}"}} {cache.misses}',
+                    f'relab_cache_hit_ratio{{backend="{name}"}} {cache.hits / lookups if lookups else 0.0}']
+        batcher = find_layer(backend, BatchingBackend)
+        out.append(f'relab_write_queue_depth{{backend="{name}"}} {batcher.pending_ops() if batcher is not None else 0}')
+
+    limits = github_store.rate_limit()
+    if limits is not None:
+        out += ["# HELP relab_github_rate_limit_remaining GitHub API requests left in the current window.",
+                "# TYPE relab_github_rate_limit_remaining gauge", f"relab_github_rate_limit_remaining {limits[0]}",
+                "# HELP relab_github_rate_limit GitHub API requests allowed per window.",
+                "# TYPE relab_github_rate_limit gauge", f"relab_github_rate_limit {limits[1]}"]
+    return "\n".join(out) + "\n"
+
+#------------------------------------------------------
+# HTTP ENDPOINT - once per process
+#------------------------------------------------------
+_server = None
+_server_lock = threading.Lock()
+
+def _bind(host, first_port, count, handler):
+    # First free port of first_port .. first_port + count - 1
+    from http.server import ThreadingHTTPServer
+
+    error = None
+    for port in range(first_port, first_port + max(count, 1)):
+        try:
+            return ThreadingHTTPServer((host, port), handler)
+        except OSError as e:
+            error = e
+    raise error
+
+def start_metrics_server(host=None, port=None, port_range=None):
+    global _server
+    port = config.METRICS_PORT if port is None else port
+    port_range = config.METRICS_PORT_RANGE if port_range is None else port_range
+    host = host or config.METRICS_HOST
+    with _server_lock:
+        if _server is not None or not port:
+            return _server or None
+        from http.server import BaseHTTPRequestHandler
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        instrument.add_observer(observe)
+        try:
+            _server = _bind(host, port, port_range, Handler)
+        except OSError as e:
+            # Other server processes on this box own every port of the range
+            log.warning("metrics endpoint not started, ports %d-%d busy: %s", port, port + port_range - 1, e)
+            _server = False
+            return None
+        log.info("metrics on http://%s:%d/metrics", host, _server.server_address[1])
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
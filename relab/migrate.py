@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+
+from contextlib import nullcontext
+
+from relab.config import PROC_SUFFIX
+from relab.journal import current_actor
+from relab.records import RecordError, SCHEMA_VERSION, parse_procedures, schema_of
+
+#------------------------------------------------------
+# SCHEMA MIGRATION - python -m relab.migrate <SHARED_FOLDER> [--check]
+#------------------------------------------------------
+def migrate_folder(backend, check_only=False, progress=None):
+    # One file at a time under the write lock, like any other edit: a file
+    # changed since it was read is not overwritten (WriteConflict), and each
+    # rewrite is journaled and bumps the version channel so caches follow.
+    # progress: optional relab.jobs context (total/advance per file)
+    from relab.backends import LocalBackend, find_layer
+
+    local = find_layer(backend, LocalBackend)
+    if local is None:
+        raise ValueError("only the local folder backend has files to migrate")
+    procedures_folder = local.procedures_folder
+    results = {"migrated": [], "current": [], "invalid": []}
+    names = [name for name in sorted(os.listdir(procedures_folder)) if name.endswith(PROC_SUFFIX)]
+    if progress is not None:
+        progress.total(len(names), sum(os.path.getsize(os.path.join(procedures_folder, n)) for n in names))
+    for name in names:
+        test_name = name[:-len(PROC_SUFFIX)]
+        path = local.proc_file(test_name)
+        if progress is not None:
+            progress.advance(1, os.path.getsize(path))
+        with nullcontext() if check_only else local.write_context():
+            try:
+                data = local._read(path)
+                procedures = parse_procedures(data)
+            except (RecordError, ValueError) as e:
+                results["invalid"].append((name, str(e)))
+                continue
+            if schema_of(data) == SCHEMA_VERSION:
+                results["current"].append(name)
+                continue
+            if not check_only:
+                local._commit(None, {test_name: procedures}, set(), f"Migrate {name} to schema {SCHEMA_VERSION}",
+                              [{"op": "migrate", "test": test_name, "actor": current_actor()}])
+        results["migrated"].append(name)
+    return results
+
+def main(argv=None):
+    from relab.backends import build_backend
+
+    parser = argparse.ArgumentParser(description=f"Convert procedure files to schema {SCHEMA_VERSION} and validate them.")
+    parser.add_argument("shared_folder", help="folder containing tests.json and TestProcedures/")
+    parser.add_argument("--check", action="store_true", help="only validate, do not rewrite anything")
+    args = parser.parse_args(argv)
+
+    procedures_folder = os.path.join(args.shared_folder, "TestProcedures")
+    if not os.path.isdir(procedures_folder):
+        parser.error(f"{procedures_folder} does not exist")
+    backend = build_backend("local", shared_folder=args.shared_folder, cache_ttl=0, batch_delay=0)
+    results = migrate_folder(backend, check_only=args.check)
+
+    verb = "would migrate" if args.check else "migrated"
+    print(f"{verb}: {len(results['migrated'])}, already schema {SCHEMA_VERSION}: {len(results['current'])}, invalid: {len(results['invalid'])}")
+    for name in results["migrated"]:
+        print(f"  {verb} {name}")
+    for name, error in results["invalid"]:
+        print(f"  INVALID {name}: {error}")
+    return 1 if results["invalid"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+
+from relab import config
+
+#------------------------------------------------------
+# LAB OVERVIEW - one summary row per test
+#------------------------------------------------------
+# Rows are cached for the whole server process and keyed by the version of
+# each test's procedures file (mtime/size locally, blob SHA on GitHub), so a
+# recompute only re-reads the tests whose file changed since the last one.
+# Attachments are checked where they live (local disk, or the repo's
+# procedures folder listing). "Recent changes" counts what the change journal
+# shows for the last HIGHLIGHT_HOURS, whichever user or server made it.
+
+_lock = threading.Lock()
+_rows = {}       # scope -> {test_name: (version, row)}
+_snapshots = {}  # scope -> {"key", "checked", "rows"}
+
+SORT_OPTIONS = {
+    "Test name": ("test", False),
+    "Most procedures": ("procedures", True),
+    "Most attachments": ("attachments", True),
+    "Most missing files": ("missing_files", True),
+    "Recently changed": ("last_changed", True),
+}
+
+def summarize_procedures(test_name, procedures, file_exists=os.path.exists):
+    attachments = 0
+    missing = 0
+    for proc in procedures:
+        if proc.attachment is not None:
+            attachments += 1
+            if not file_exists(proc.attachment.path):
+                missing += 1
+    return {
+        "test": test_name,
+        "procedures": len(procedures),
+        "attachments": attachments,
+        "missing_files": missing,
+        "last_changed": None,
+        "added": 0,
+        "edited": 0,
+        "removed": 0,
+    }
+
+def compute_overview(tests, versions, load, changed_at=None, file_exists=os.path.exists, scope=""):
+    # versions: test_name -> opaque version key, None when the file is absent
+    # load: test_name -> list of Procedure records
+    rows = []
+    with _lock:
+        cached = dict(_rows.get(scope, {}))
+    fresh = {}
+    for test_name in tests:
+        version = versions.get(test_name)
+        hit = cached.get(test_name)
+        if hit is not None and hit[0] == version:
+            fresh[test_name] = hit
+            rows.append(hit[1])
+            continue
+        procedures = (load(test_name) or []) if version is not None else []
+        row = summarize_procedures(test_name, procedures, file_exists)
+        if changed_at is not None and version is not None:
+            row["last_changed"] = changed_at(version)
+        if row["last_changed"] is None and hit is not None:
+            # No timestamp from the store: remember when the change was seen
+            row["last_changed"] = time.time()
+        fresh[test_name] = (version, row)
+        rows.append(row)
+    with _lock:
+        _rows[scope] = fresh
+    return rows
+
+#------------------------------------------------------
+# BACKEND OVERVIEW - one version listing per recompute
+#------------------------------------------------------
+def recent_changes(backend, seconds=None):
+    # -> {test: {"added", "edited", "removed"}} from the journal's last `seconds`
+    journal = getattr(backend, "journal", None)
+    if journal is None:
+        return {}
+    seconds = config.HIGHLIGHT_HOURS * 3600 if seconds is None else seconds
+    counts = {}
+    for e in journal.since_time(time.time() - seconds):
+        field = {"add_procedure": "added", "edit_procedure": "edited", "delete_procedure": "removed"}.get(e["op"])
+        if field is not None and e.get("test"):
+            test_counts = counts.setdefault(e["test"], {"added": 0, "edited": 0, "removed": 0})
+            test_counts[field] += 1
+        elif e["op"] == "delete_test":
+            counts.pop(e.get("test"), None)
+    return counts
+
+def backend_overview(backend, tests, max_age=30.0, file_exists=None):
+    # file_exists defaults to the backend's own attachment check.
+    # The local backend exposes the procedures folder mtime, which changes on
+    # every write_json (files are renamed into place). While it is unchanged
+    # the previous rows are served without even listing the folder; the
+    # listing is still redone every max_age seconds to catch in-place edits.
+    folder_version = getattr(backend, "folder_version", None)
+    folder_version = folder_version() if folder_version is not None else None
+    scope = backend.name
+    key = (tuple(tests), folder_version)
+    now = time.monotonic()
+    with _lock:
+        snapshot = _snapshots.get(scope)
+        if (folder_version is not None and snapshot is not None and snapshot["key"] == key
+                and now - snapshot["checked"] < max_age):
+            rows = snapshot["rows"]
+        else:
+            snapshot = None
+    if snapshot is None:
+        rows = compute_overview(tests, backend.versions(), backend.get_procedures, changed_at=backend.changed_at,
+                                file_exists=file_exists or backend.attachment_checker(), scope=scope)
+        with _lock:
+            _snapshots[scope] = {"key": key, "checked": now, "rows": rows}
+    changes = recent_changes(backend)
+    return [dict(row, **changes.get(row["test"], {})) for row in rows]
+
+#------------------------------------------------------
+# SORTING / FILTERING
+#------------------------------------------------------
+def filter_rows(rows, text="", missing_only=False, changed_only=False):
+    text = (text or "").strip().lower()
+    result = []
+    for row in rows:
+        if text and text not in row["test"].lower():
+            continue
+        if missing_only and not row["missing_files"]:
+            continue
+        if changed_only and not (row["added"] or row["edited"] or row["removed"]):
+            continue
+        result.append(row)
+    return result
+
+def sort_rows(rows, sort_by="Test name"):
+    field, reverse = SORT_OPTIONS.get(sort_by, SORT_OPTIONS["Test name"])
+    if field == "test":
+        return sorted(rows, key=lambda r: r["test"].lower(), reverse=reverse)
+    return sorted(rows, key=lambda r: (r[field] or 0, r["test"].lower()), reverse=reverse)
+
+def format_change(row):
+    parts = []
+    if row["added"]:
+        parts.append(f"+{row['added']}")
+    if row["edited"]:
+        parts.append(f"~{row['edited']}")
+    if row["removed"]:
+        parts.append(f"-{row['removed']}")
+    return " / ".join(parts)
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+
+from relab import config
+
+#------------------------------------------------------
+# RERUN PROFILER - opt-in cProfile per script rerun
+#------------------------------------------------------
+# Turned on with RELAB_PROFILE=1 (every session) or ?profile=1 (one browser
+# tab). Each profiled rerun is dumped to PROFILE_DIR as a .prof file that
+# snakeviz / pstats can open; only the newest PROFILE_KEEP files are kept.
+# summarize() merges the last N files into a top-functions table, so time in
+# JSON decoding, the per-row st.columns loop, attachment reads and GitHub
+# calls can be told apart on the production server.
+#
+# cProfile hooks the calling thread only (Python <= 3.11), which is the
+# session's script thread. On 3.12+ only one profiler may be active per
+# process, so concurrent reruns are skipped rather than failing; a profile
+# left running by an interrupted rerun (st.rerun, stop) is dropped after
+# STALE_AFTER seconds.
+
+STALE_AFTER = 120
+_lock = threading.Lock()
+_running = {}  # profile -> start time
+_summary_cache = {"key": None, "rows": []}
+
+def profile_dir():
+    if config.PROFILE_DIR:
+        return config.PROFILE_DIR
+    import tempfile
+
+    return os.path.join(tempfile.gettempdir(), "relab-profiles")
+
+def start():
+    import cProfile
+
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # another rerun is being profiled (3.12+)
+        if not _drop_stale():
+            return None
+        try:
+            profile.enable()
+        except ValueError:
+            return None
+    with _lock:
+        _running[profile] = time.monotonic()
+    return profile
+
+def _drop_stale():
+    now = time.monotonic()
+    with _lock:
+        stale = [p for p, started in _running.items() if now - started > STALE_AFTER]
+        for p in stale:
+            del _running[p]
+    for p in stale:
+        p.disable()
+    return bool(stale)
+
+def stop(profile, session=None):
+    # Saves the profile and rotates the directory; returns the file path
+    if profile is None:
+        return None
+    profile.disable()
+    with _lock:
+        _running.pop(profile, None)
+    folder = profile_dir()
+    os.makedirs(folder, exist_ok=True)
+    now = time.time_ns()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now // 10**9))
+    name = f"rerun-{stamp}-{now % 10**9:09d}-{(session or 'nosession')[:8]}.prof"
+    path = os.path.join(folder, name)
+    profile.dump_stats(path)
+    with _lock:
+        for old in saved_profiles()[:-config.PROFILE_KEEP]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return path
+
+def saved_profiles():
+    folder = profile_dir()
+    try:
+        names = sorted(n for n in os.listdir(folder) if n.startswith("rerun-") and n.endswith(".prof"))
+    except FileNotFoundError:
+        return []
+    return [os.path.join(folder, n) for n in names]
+
+def summarize(last=20, top=25):
+    # Top functions by cumulative time over the last `last` saved reruns
+    import pstats
+
+    files = saved_profiles()[-last:]
+    key = (tuple(files), top)
+    with _lock:
+        if _summary_cache["key"] == key:
+            return _summary_cache["rows"]
+    rows = []
+    if files:
+        stats = None
+        for path in files:
+            try:
+                stats = pstats.Stats(path) if stats is None else stats.add(path)
+            except Exception:
+                continue  # rotated away or half written
+        if stats is not None:
+            entries = sorted(stats.stats.items(), key=lambda kv: -kv[1][3])[:top]
+            for (filename, line, func), (cc, nc, tt, ct, _) in entries:
+                rows.append({"function": func, "location": f"{os.path.basename(filename)}:{line}",
+                             "calls": nc, "tottime s/rerun": round(tt / len(files), 5),
+                             "cumtime s/rerun": round(ct / len(files), 5)})
+    with _lock:
+        _summary_cache.update(key=key, rows=rows)
+    return rows
@@ -0,0 +1,177 @@
+#------------------------------------------------------
+# RECORD MODEL - compact, validated procedure records
+#------------------------------------------------------
+# On disk a procedures file is a bare list whose items used to be either
+# strings or {"text", "link"} dicts, with link being a URL string or a
+# {"type": "file", "path", "name", "url"} dict. Schema 2 keeps the bare list
+# (the 1.0-3.0 dashboards share the folder and iterate/append it as a list)
+# and always writes {"text", "link"} records. Legacy lists and the
+# {"schema": 2, "procedures": [...]} wrapper written by earlier builds still
+# load; relab.migrate rewrites both. A record may also carry
+# "tags": ["equipment:HAST-01", "stage:qual", "rev:B"] - optional, so files
+# without tags are unchanged and older readers ignore them.
+
+SCHEMA_VERSION = 2
+
+class RecordError(ValueError):
+    pass
+
+def _str(value, field):
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise RecordError(f"'{field}' must be a string, got {type(value).__name__}")
+    return value
+
+class Attachment:
+    __slots__ = ("path", "name", "url")
+
+    def __init__(self, path, name="", url=""):
+        self.path = _str(path, "link.path")
+        if not self.path:
+            raise RecordError("file attachment needs a 'path'")
+        self.name = _str(name, "link.name") or "file"
+        self.url = _str(url, "link.url")
+
+    @classmethod
+    def from_dict(cls, raw):
+        if raw.get("type") != "file":
+            raise RecordError(f"unknown link type {raw.get('type')!r}")
+        return cls(raw.get("path"), raw.get("name"), raw.get("url"))
+
+    def to_dict(self):
+        return {"type": "file", "path": self.path, "name": self.name, "url": self.url}
+
+    def _key(self):
+        return (self.path, self.name, self.url)
+
+    def __eq__(self, other):
+        return isinstance(other, Attachment) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"Attachment({self.path!r}, name={self.name!r})"
+
+def normalize_tags(tags):
+    # "a, b" / ["a", "b"] -> sorted tuple without blanks or duplicates; the
+    # facet prefix ("Equipment: X") is lower-cased, the value kept as typed.
+    # "tag:x" is the default facet spelled out and is stored as plain "x".
+    if not tags:
+        return ()
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    if not isinstance(tags, (list, tuple, set, frozenset)):
+        raise RecordError(f"'tags' must be a list of strings, got {type(tags).__name__}")
+    result = set()
+    for tag in tags:
+        tag = " ".join(_str(tag, "tags").split())
+        if ":" in tag:
+            facet, value = tag.split(":", 1)
+            facet, value = facet.strip().lower(), value.strip()
+            tag = f"{facet}:{value}" if facet and value else (facet or value)
+            if facet == "tag" and value and ":" not in value:
+                tag = value
+        if tag:
+            result.add(tag)
+    return tuple(sorted(result))
+
+class Procedure:
+    # Treated as immutable: edits build a new record with replace()
+    __slots__ = ("text", "url", "attachment", "tags")
+
+    def __init__(self, text, url="", attachment=None, tags=()):
+        self.text = _str(text, "text")
+        self.url = _str(url, "link")
+        if attachment is not None and not isinstance(attachment, Attachment):
+            raise RecordError("attachment must be an Attachment")
+        self.attachment = attachment
+        self.tags = normalize_tags(tags)
+
+    @classmethod
+    def from_link(cls, text, link="", tags=()):
+        # link as stored / entered in the UI: URL string or attachment dict
+        if isinstance(link, Attachment):
+            return cls(text, attachment=link, tags=tags)
+        if isinstance(link, dict):
+            return cls(text, attachment=Attachment.from_dict(link), tags=tags)
+        return cls(text, url=link, tags=tags)
+
+    @classmethod
+    def from_raw(cls, raw):
+        if isinstance(raw, str):
+            return cls(raw)
+        if not isinstance(raw, dict):
+            raise RecordError(f"procedure must be a string or object, got {type(raw).__name__}")
+        return cls.from_link(raw.get("text"), raw.get("link", ""), raw.get("tags"))
+
+    def to_dict(self):
+        record = {"text": self.text, "link": self.attachment.to_dict() if self.attachment else self.url}
+        if self.tags:
+            record["tags"] = list(self.tags)
+        return record
+
+    def replace(self, text=None, link=None, tags=None):
+        return Procedure.from_link(self.text if text is None else text, self.link if link is None else link,
+                                   self.tags if tags is None else tags)
+
+    @property
+    def link(self):
+        return self.attachment if self.attachment is not None else self.url
+
+    @property
+    def link_text(self):
+        # What the edit form shows: URL, or the attachment's SharePoint URL / path
+        if self.attachment is not None:
+            return self.attachment.url or self.attachment.path
+        return self.url
+
+    def _key(self):
+        return (self.text, self.url, self.attachment, self.tags)
+
+    def __eq__(self, other):
+        return isinstance(other, Procedure) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"Procedure({self.text!r})"
+
+#------------------------------------------------------
+# FILE <-> RECORDS
+#------------------------------------------------------
+def schema_of(data):
+    # SCHEMA_VERSION only for the layout written now; legacy lists and the
+    # wrapped layout report 1 so relab.migrate rewrites them
+    if isinstance(data, list) and all(isinstance(item, dict) and "text" in item and "link" in item for item in data):
+        return SCHEMA_VERSION
+    return 1
+
+def parse_procedures(data):
+    if not data:
+        return []
+    if isinstance(data, dict):
+        if data.get("schema") != SCHEMA_VERSION:
+            raise RecordError(f"unsupported procedures schema {data.get('schema')!r}")
+        items = data.get("procedures", [])
+    else:
+        items = data
+    if not isinstance(items, list):
+        raise RecordError("procedures must be a list")
+    procedures = []
+    for i, raw in enumerate(items):
+        try:
+            procedures.append(Procedure.from_raw(raw))
+        except RecordError as e:
+            raise RecordError(f"procedure #{i + 1}: {e}") from None
+    return procedures
+
+def dump_procedures(procedures):
+    items = []
+    for proc in procedures:
+        if not isinstance(proc, Procedure):
+            proc = Procedure.from_raw(proc)
+        items.append(proc.to_dict())
+    return items
@@ -0,0 +1,175 @@
+import os
+import threading
+import time
+
+from relab.config import PROC_SUFFIX
+from relab.instrument import timed
+
+#------------------------------------------------------
+# ATTACHMENT SCRUBBER - background existence/size/mtime checks
+#------------------------------------------------------
+# The procedures table used to call os.path.exists on the share for every
+# file attachment on every rerun. The scrubber walks all referenced
+# attachments on a background thread instead and the table reads the cached
+# status. Paths seen for the first time are checked once, synchronously.
+
+def _norm(path):
+    return os.path.normcase(os.path.normpath(path))
+
+class AttachmentScrubber:
+    def __init__(self, backend, interval=60.0):
+        self.backend = backend
+        self.procedures_folder = backend.procedures_folder
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._status = {}  # normalized path -> {"path","exists","size","mtime","checked"}
+        self._refs = {}    # test_name -> (version, [(text, path)])
+        self._orphans = []
+        self._last_scrub = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    #---------------- lifecycle ----------------
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="attachment-scrubber", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.scrub_once()
+            except Exception:
+                pass  # share temporarily unavailable - retry next round
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    #---------------- checks ----------------
+    def check(self, path):
+        try:
+            with timed("stat", path):
+                info = os.stat(path)
+            entry = {"path": path, "exists": True, "size": info.st_size, "mtime": info.st_mtime, "checked": time.time()}
+        except OSError:
+            entry = {"path": path, "exists": False, "size": None, "mtime": None, "checked": time.time()}
+        with self._lock:
+            self._status[_norm(path)] = entry
+        return entry
+
+    def status(self, path):
+        with self._lock:
+            entry = self._status.get(_norm(path))
+        return entry if entry is not None else self.check(path)
+
+    def exists(self, path):
+        with timed("exists", path):
+            return bool(path) and self.status(path)["exists"]
+
+    def open(self, path):
+        # -> binary file for the table's download button, or None. The cached
+        # status can be up to a scrub old: a file deleted or renamed since is
+        # re-checked at once so the next rerun shows it as missing.
+        if not self.exists(path):
+            return None
+        try:
+            return open(path, "rb")
+        except OSError:
+            self.check(path)
+            return None
+
+    def _collect_refs(self):
+        versions = self.backend.versions()
+        refs = {}
+        for test_name in self.backend.list_tests():
+            version = versions.get(test_name)
+            cached = self._refs.get(test_name)
+            if cached is not None and cached[0] == version:
+                refs[test_name] = cached
+                continue
+            procedures = self.backend.get_procedures(test_name) if version else []
+            links = [(proc.text, proc.attachment.path) for proc in procedures if proc.attachment is not None]
+            refs[test_name] = (version, links)
+        self._refs = refs
+        return refs
+
+    def scrub_once(self, progress=None):
+        # progress: optional relab.jobs context (total/advance per attachment)
+        refs = self._collect_refs()
+        paths = {}
+        for _, links in refs.values():
+            for _, path in links:
+                paths.setdefault(_norm(path), path)
+        if progress is not None:
+            progress.total(len(paths), 0)
+        referenced = set(paths)
+        for path in paths.values():
+            entry = self.check(path)
+            if progress is not None:
+                progress.advance(1, entry["size"] or 0)
+        orphans = []
+        try:
+            with os.scandir(self.procedures_folder) as entries:
+                for entry in entries:
+                    if not entry.is_file() or entry.name.endswith(PROC_SUFFIX) or entry.name.endswith(".tmp"):
+                        continue
+                    if _norm(entry.path) not in referenced:
+                        orphans.append(entry.path)
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            # Forget paths no procedure points at any more
+            for key in [k for k in self._status if k not in referenced]:
+                del self._status[key]
+            self._orphans = sorted(orphans)
+            self._last_scrub = time.time()
+
+    #---------------- reporting ----------------
+    def missing_by_test(self):
+        counts = {}
+        with self._lock:
+            for test_name, (_, links) in self._refs.items():
+                entries = [self._status.get(_norm(path)) for _, path in links]
+                counts[test_name] = sum(1 for e in entries if e is not None and not e["exists"])
+        return counts
+
+    def report(self):
+        dangling = []
+        with self._lock:
+            for test_name, (_, links) in sorted(self._refs.items()):
+                for text, path in links:
+                    entry = self._status.get(_norm(path))
+                    if entry is not None and not entry["exists"]:
+                        dangling.append({"test": test_name, "procedure": text, "path": path})
+            return {"dangling": dangling, "orphaned": list(self._orphans), "last_scrub": self._last_scrub}
+
+#------------------------------------------------------
+# ONE SCRUBBER PER PROCEDURES FOLDER PER PROCESS (local backend only)
+#------------------------------------------------------
+_scrubbers = {}
+_scrubbers_lock = threading.Lock()
+
+def get_scrubber(backend, interval=60.0):
+    key = _norm(backend.procedures_folder)
+    with _scrubbers_lock:
+        scrubber = _scrubbers.get(key)
+        if scrubber is None:
+            scrubber = _scrubbers[key] = AttachmentScrubber(backend, interval)
+        return scrubber.start()
+
+def stop_scrubbers():
+    # Stops and forgets every scrubber (benchmarks switching datasets, tests)
+    with _scrubbers_lock:
+        scrubbers = list(_scrubbers.values())
+        _scrubbers.clear()
+    for scrubber in scrubbers:
+        scrubber.stop()
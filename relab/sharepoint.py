@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import posixpath
+import re
+import sys
+import threading
+from urllib.parse import quote, urlsplit, urlunsplit
+
+from relab import config
+
+#------------------------------------------------------
+# LINK MAP - local path prefixes -> SharePoint URLs, compiled into a trie
+#------------------------------------------------------
+# Attachments store the local path they were uploaded to (plus the URL it
+# mapped to back then, for older readers). The URL shown is computed when the
+# row is rendered: the path is walked down a trie of mapping rules, the
+# longest matching prefix wins and the rest of the path is appended to that
+# rule's URL. Rules are SHAREPOINT_BASE_LOCAL -> SHAREPOINT_BASE_URL plus any
+# in SHAREPOINT_MAP_FILE (JSON {"local prefix": "url prefix"}, e.g. every
+# user's OneDrive root); they are compiled once per process. Matching is
+# component-wise and case-insensitive, with / and \ treated alike.
+#
+# The stored path stays absolute, not relative to SHARED_FOLDER: the 1.0
+# dashboard, the scrubber and snapshots open link["path"] as is, and an
+# attachment under a personal OneDrive root has no path relative to the
+# share. Only the stored URL is treated as a cache; the path is the source.
+#
+# When the share itself moves, rewrite the stored paths and URLs in one pass:
+#   python -m relab.sharepoint rewrite "<SHARED_FOLDER>" --move "C:\Users\old\OneDrive=D:\OneDrive" [--check]
+#   python -m relab.sharepoint resolve "C:\Users\...\TestProcedures\HAST_spec.pdf"
+
+def _parts(path):
+    path = posixpath.normpath(path.replace("\\", "/"))
+    return [part for part in path.split("/") if part not in ("", ".")]
+
+class _Node:
+    __slots__ = ("children", "target")
+
+    def __init__(self):
+        self.children = {}
+        self.target = None
+
+class PrefixMap:
+    # rules: [(local prefix, target)] -> target + the rest of the path
+    def __init__(self, rules, join):
+        self._root = _Node()
+        self._join = join
+        for prefix, target in rules:
+            node = self._root
+            for part in _parts(prefix):
+                node = node.children.setdefault(part.casefold(), _Node())
+            if node.target is None:  # earlier rules win on the same prefix
+                node.target = target
+
+    def lookup(self, path):
+        # -> (target, remaining parts) for the longest matching prefix, or None
+        parts = _parts(path)
+        node, found = self._root, None
+        for depth, part in enumerate(parts):
+            node = node.children.get(part.casefold())
+            if node is None:
+                break
+            if node.target is not None:
+                found = (node.target, parts[depth + 1:])
+        return found
+
+    def map(self, path):
+        found = self.lookup(path) if path else None
+        return self._join(*found) if found is not None else None
+
+def join_url(base, parts):
+    # The path goes before any ?query of the base (sharing links carry one)
+    scheme, netloc, path, query, fragment = urlsplit(base)
+    path = "/".join([path.rstrip("/")] + [quote(part) for part in parts])
+    return urlunsplit((scheme, netloc, path, query, fragment))
+
+def join_path(base, parts):
+    sep = "\\" if "\\" in base or re.match(r"^[A-Za-z]:", base) else "/"
+    return sep.join([base.rstrip("\\/")] + parts)
+
+def url_map(rules):
+    return PrefixMap(rules, join_url)
+
+def path_map(rules):
+    return PrefixMap(rules, join_path)
+
+#---------------- configured rules ----------------
+def load_rules(map_file=None):
+    rules = []
+    map_file = config.SHAREPOINT_MAP_FILE if map_file is None else map_file
+    if map_file:
+        with open(map_file, encoding="utf-8") as f:
+            rules.extend(json.load(f).items())
+    if config.SHAREPOINT_BASE_LOCAL and config.SHAREPOINT_BASE_URL:
+        rules.append((config.SHAREPOINT_BASE_LOCAL, config.SHAREPOINT_BASE_URL))
+    return rules
+
+_link_maps = {}
+_link_maps_lock = threading.Lock()
+
+def get_link_map():
+    key = (config.SHAREPOINT_BASE_LOCAL, config.SHAREPOINT_BASE_URL, config.SHAREPOINT_MAP_FILE)
+    with _link_maps_lock:
+        link_map = _link_maps.get(key)
+        if link_map is None:
+            link_map = _link_maps[key] = url_map(load_rules())
+        return link_map
+
+def attachment_url(attachment):
+    # What the tables link to: the mapped URL, else whatever was stored
+    return get_link_map().map(attachment.path) or attachment.url
+
+#------------------------------------------------------
+# HELPER FUNCTION: Convert local path -> SharePoint URL
+#------------------------------------------------------
+def local_to_sharepoint(local_path, base_local=None, base_sharepoint=None):
+    if base_local is None and base_sharepoint is None:
+        link_map = get_link_map()
+    else:
+        link_map = url_map([(base_local or config.SHAREPOINT_BASE_LOCAL, base_sharepoint or config.SHAREPOINT_BASE_URL)])
+    return link_map.map(local_path) or local_path
+
+#------------------------------------------------------
+# BULK REWRITE - move attachment paths, refresh stored URLs
+#------------------------------------------------------
+def rewrite_links(backend, moves=(), check_only=False, progress=None):
+    # One test at a time under the write lock: memory stays at one procedures
+    # file, and every rewritten test is journaled so caches and indexes follow.
+    # progress: optional relab.jobs context (total/advance per test)
+    from relab.backends import CachingBackend, LocalBackend, find_layer
+    from relab.journal import current_actor
+
+    local = find_layer(backend, LocalBackend)
+    if local is None:
+        raise ValueError("attachment links only exist in the local folder backend")
+    relocate = path_map(moves)
+    link_map = get_link_map()
+    tests = local.list_tests()
+    if progress is not None:
+        progress.total(len(tests), 0)
+    stats = {"tests": 0, "attachments": 0, "rewritten": 0}
+    for test_name in tests:
+        with local.write_context():
+            procedures = local.get_procedures(test_name)
+            updated, changed = [], 0
+            for proc in procedures:
+                att = proc.attachment
+                if att is not None:
+                    stats["attachments"] += 1
+                    path = relocate.map(att.path) or att.path
+                    url = link_map.map(path) or att.url
+                    if (path, url) != (att.path, att.url):
+                        proc = proc.replace(link={"type": "file", "path": path, "name": att.name, "url": url})
+                        changed += 1
+                updated.append(proc)
+            if changed and not check_only:
+                local._commit(None, {test_name: updated}, set(), f"Rewrite {changed} attachment links",
+                              [{"op": "relink", "test": test_name, "actor": current_actor()}])
+        if changed:
+            stats["tests"] += 1
+            stats["rewritten"] += changed
+        if progress is not None:
+            progress.advance(1)
+    cache = find_layer(backend, CachingBackend)
+    if cache is not None and stats["rewritten"] and not check_only:
+        cache.clear()
+    return stats
+
+def _move(value):
+    old, sep, new = value.rpartition("=")
+    if not sep or not old or not new:
+        raise argparse.ArgumentTypeError(f"expected OLD=NEW, got {value!r}")
+    return old, new
+
+#------------------------------------------------------
+# CLI
+#------------------------------------------------------
+def main(argv=None):
+    from relab.backends import build_backend
+
+    parser = argparse.ArgumentParser(description="Resolve attachment paths to SharePoint URLs and rewrite stored links.")
+    parser.add_argument("--map-file", help="JSON {\"local prefix\": \"url prefix\"} (default: RELAB_SHAREPOINT_MAP_FILE)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    resolve = commands.add_parser("resolve", help="print the URL for local paths")
+    resolve.add_argument("paths", nargs="+")
+    rewrite = commands.add_parser("rewrite", help="re-map every attachment link in the catalog")
+    rewrite.add_argument("shared_folder", help="folder containing tests.json and TestProcedures/")
+    rewrite.add_argument("--move", action="append", type=_move, default=[], metavar="OLD=NEW",
+                         help="attachment paths under OLD now live under NEW (repeatable)")
+    rewrite.add_argument("--check", action="store_true", help="only count, do not rewrite anything")
+    args = parser.parse_args(argv)
+
+    if args.map_file is not None:
+        config.SHAREPOINT_MAP_FILE = args.map_file
+    if args.command == "resolve":
+        link_map = get_link_map()
+        for path in args.paths:
+            print(f"{path}\t{link_map.map(path) or '-'}")
+        return 0
+
+    if not os.path.isdir(args.shared_folder):
+        parser.error(f"{args.shared_folder} does not exist")
+    backend = build_backend("local", shared_folder=args.shared_folder, cache_ttl=0, batch_delay=0)
+    stats = rewrite_links(backend, args.move, check_only=args.check)
+    verb = "would rewrite" if args.check else "rewrote"
+    print(f"{verb} {stats['rewritten']} of {stats['attachments']} attachment links in {stats['tests']} tests", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+
+from relab import config
+from relab.codec import decode
+from relab.instrument import timed
+from relab.journal import current_actor
+from relab.locking import FileLock, LockTimeout
+from relab.records import parse_procedures
+
+#------------------------------------------------------
+# POINT-IN-TIME SNAPSHOTS - deduplicated, content-addressed
+#------------------------------------------------------
+# <SHARED_FOLDER>/.relab-snapshots/
+#   objects/ab/abcdef...    zlib-compressed CHUNK_SIZE pieces, named by sha256
+#   snapshots/<id>.json     manifest: every file as a list of chunk hashes
+#
+# A snapshot covers tests.json, TestProcedures/ (procedures and uploaded
+# attachments) and attachments linked from outside that folder. Chunks
+# already stored are not written again and files whose size and mtime match
+# the previous snapshot are not even re-read, so a snapshot of an unchanged
+# catalog costs one scandir and a manifest, and disk use grows with what
+# changed. Under the write lock a snapshot only stats tests.json and the
+# procedures files and reads the changed ones into memory (a consistent
+# catalog); chunking, compression, parsing for attachment links and copying
+# the attachments all happen after it is released, so edits wait for a few
+# small file reads at most. Restores likewise decode the snapshot first and
+# hold the lock only for the write itself.
+#
+# python -m relab.snapshots take --shared-folder "<SHARED_FOLDER>"
+# python -m relab.snapshots list
+# python -m relab.snapshots restore 20251019-140000 [--test HAST]
+
+SNAPSHOTS_NAME = ".relab-snapshots"
+SNAPSHOT_LOCK_NAME = ".relab-snapshot.lock"
+CHUNK_SIZE = 1024 * 1024
+
+def _unchanged(previous, info):
+    return previous is not None and previous["size"] == info.st_size and previous["mtime_ns"] == info.st_mtime_ns
+
+class SnapshotStore:
+    def __init__(self, shared_folder=None, root=None):
+        self.shared_folder = shared_folder or config.SHARED_FOLDER
+        self.root = root or config.SNAPSHOT_DIR or os.path.join(self.shared_folder, SNAPSHOTS_NAME)
+        self.objects = os.path.join(self.root, "objects")
+        self.manifests = os.path.join(self.root, "snapshots")
+        self.lock_file = os.path.join(self.root, SNAPSHOT_LOCK_NAME)
+        self._listed = None  # (manifests folder mtime, list())
+
+    #---------------- chunks ----------------
+    def _object_path(self, digest):
+        return os.path.join(self.objects, digest[:2], digest[2:])
+
+    def _put_chunk(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(zlib.compress(data, 6))
+            os.replace(tmp, path)
+        return digest
+
+    def _store_bytes(self, data, info):
+        # -> manifest entry for content already read into memory
+        chunks = [self._put_chunk(data[i:i + CHUNK_SIZE]) for i in range(0, len(data), CHUNK_SIZE)]
+        return {"size": info.st_size, "mtime_ns": info.st_mtime_ns, "chunks": chunks}
+
+    def _store_file(self, path, previous=None):
+        # -> manifest entry; reuses the previous one when size and mtime match
+        info = os.stat(path)
+        if _unchanged(previous, info):
+            return previous
+        chunks = []
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(CHUNK_SIZE)
+                if not data:
+                    break
+                chunks.append(self._put_chunk(data))
+        return {"size": info.st_size, "mtime_ns": info.st_mtime_ns, "chunks": chunks}
+
+    def read_entry(self, entry):
+        parts = []
+        for digest in entry["chunks"]:
+            with open(self._object_path(digest), "rb") as f:
+                parts.append(zlib.decompress(f.read()))
+        return b"".join(parts)
+
+    def _write_entry(self, entry, dest):
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        tmp = dest + ".tmp"
+        with open(tmp, "wb") as f:
+            for digest in entry["chunks"]:
+                with open(self._object_path(digest), "rb") as chunk:
+                    f.write(zlib.decompress(chunk.read()))
+        os.utime(tmp, ns=(entry["mtime_ns"], entry["mtime_ns"]))  # matches the snapshot again
+        os.replace(tmp, dest)
+
+    #---------------- manifests ----------------
+    def list(self):
+        # Newest first, without the file lists; re-read only when the folder changes
+        try:
+            folder_version = os.stat(self.manifests).st_mtime_ns
+            if self._listed is not None and self._listed[0] == folder_version:
+                return list(self._listed[1])
+            names = sorted((n[:-5] for n in os.listdir(self.manifests) if n.endswith(".json")), reverse=True)
+        except FileNotFoundError:
+            return []
+        result = []
+        for snapshot_id in names:
+            try:
+                manifest = self.load(snapshot_id)
+            except (OSError, ValueError):
+                continue
+            result.append({k: v for k, v in manifest.items() if k not in ("files", "external")})
+        self._listed = (folder_version, result)
+        return list(result)
+
+    def load(self, snapshot_id):
+        with open(os.path.join(self.manifests, f"{snapshot_id}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def latest(self):
+        snapshots = self.list()
+        return self.load(snapshots[0]["id"]) if snapshots else None
+
+    #---------------- taking ----------------
+    def take(self, backend, note="", lock_timeout=None):
+        # backend: the local backend of shared_folder (its write lock and journal)
+        from relab.backends import LocalBackend, find_layer
+
+        local = find_layer(backend, LocalBackend)
+        if local is None:
+            raise ValueError("snapshots need the local folder backend")
+        with timed("snapshot", self.root), FileLock(self.lock_file, timeout=config.WRITE_LOCK_TIMEOUT if lock_timeout is None else lock_timeout,
+                                                     stale_after=config.SNAPSHOT_LOCK_STALE):
+            return self._take(local, note)
+
+    def _take(self, local, note):
+        previous = self.latest() or {}
+        prev_files = previous.get("files", {})
+        prev_external = previous.get("external", {})
+        files, read, attachments = {}, {}, set()
+        folder = os.path.basename(local.procedures_folder)
+        with local.write_context():
+            # Only stat + raw reads of what changed while edits are blocked
+            journal_seq = local.journal.last_seq()
+            tests = local.list_tests()
+            paths = [("tests.json", local.tests_file)] + [
+                (f"{folder}/{os.path.basename(local.proc_file(t))}", local.proc_file(t)) for t in tests]
+            for key, path in paths:
+                try:
+                    info = os.stat(path)
+                    if _unchanged(prev_files.get(key), info):
+                        files[key] = prev_files[key]
+                    else:
+                        with open(path, "rb") as f:
+                            read[key] = (f.read(), info)
+                except FileNotFoundError:
+                    continue
+        for key, (data, info) in read.items():
+            files[key] = self._store_bytes(data, info)
+        for key, _ in paths[1:]:
+            if key in files:
+                data = read[key][0] if key in read else self.read_entry(files[key])
+                attachments.update(p.attachment.path for p in parse_procedures(decode(data)) if p.attachment is not None)
+        # Uploaded attachments and other files in the procedures folder
+        try:
+            with os.scandir(local.procedures_folder) as entries:
+                for entry in entries:
+                    key = f"{folder}/{entry.name}"
+                    if entry.is_file() and key not in files and not entry.name.endswith(".tmp") \
+                            and not entry.name.endswith(config.PROC_SUFFIX):
+                        files[key] = self._store_file(entry.path, prev_files.get(key))
+        except FileNotFoundError:
+            pass
+        inside = os.path.normcase(os.path.abspath(local.procedures_folder)) + os.sep
+        external = {}
+        for path in sorted(attachments):
+            if os.path.normcase(os.path.abspath(path)).startswith(inside):
+                continue
+            try:
+                external[path] = self._store_file(path, prev_external.get(path))
+            except OSError:
+                pass  # dangling link, reported by the scrubber
+
+        now = time.time()
+        snapshot_id = time.strftime("%Y%m%d-%H%M%S", time.localtime(now))
+        if os.path.exists(os.path.join(self.manifests, f"{snapshot_id}.json")):
+            snapshot_id += f"-{int(now * 1000) % 1000:03d}"
+        manifest = {"id": snapshot_id, "created": now, "actor": current_actor(), "note": note,
+                    "journal_seq": journal_seq, "tests": tests,
+                    "size": sum(e["size"] for e in files.values()) + sum(e["size"] for e in external.values()),
+                    "files": files, "external": external}
+        os.makedirs(self.manifests, exist_ok=True)
+        tmp = os.path.join(self.manifests, f"{snapshot_id}.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, os.path.join(self.manifests, f"{snapshot_id}.json"))
+        return manifest
+
+    #---------------- restoring ----------------
+    def _test_procedures(self, manifest, local, test_name):
+        folder = os.path.basename(local.procedures_folder)
+        entry = manifest["files"].get(f"{folder}/{os.path.basename(local.proc_file(test_name))}")
+        return parse_procedures(decode(self.read_entry(entry))) if entry is not None else []
+
+    def _restore_attachments(self, manifest, local, procedures):
+        # Puts back attachment files that are missing or differ from the snapshot
+        folder = os.path.basename(local.procedures_folder)
+        inside = os.path.normcase(os.path.abspath(local.procedures_folder)) + os.sep
+        restored = 0
+        for proc in procedures:
+            if proc.attachment is None:
+                continue
+            path = proc.attachment.path
+            if os.path.normcase(os.path.abspath(path)).startswith(inside):
+                entry = manifest["files"].get(f"{folder}/{os.path.basename(path)}")
+            else:
+                entry = manifest["external"].get(path)
+            if entry is None:
+                continue
+            try:
+                info = os.stat(path)
+                if info.st_size == entry["size"] and info.st_mtime_ns == entry["mtime_ns"]:
+                    continue
+            except OSError:
+                pass
+            self._write_entry(entry, path)
+            restored += 1
+        return restored
+
+    def restore(self, backend, snapshot_id, test_name=None):
+        # One test (its procedures + attachments) or the whole catalog, as one
+        # locked write that is journaled and invalidates every replica's cache
+        from relab.backends import CachingBackend, LocalBackend, find_layer
+
+        local = find_layer(backend, LocalBackend)
+        if local is None:
+            raise ValueError("snapshots need the local folder backend")
+        manifest = self.load(snapshot_id)
+        change = {"op": "restore", "snapshot": snapshot_id, "actor": current_actor()}
+        if test_name is not None and test_name not in manifest["tests"]:
+            raise KeyError(f"{test_name!r} is not in snapshot {snapshot_id}")
+        with timed("snapshot_restore", snapshot_id, test_name):
+            restoring = manifest["tests"] if test_name is None else [test_name]
+            procedures = {t: self._test_procedures(manifest, local, t) for t in restoring}
+            with local.write_context():
+                current = local.list_tests()
+                if test_name is not None:
+                    tests = None if test_name in current else current + [test_name]
+                    deleted = set()
+                    change["test"] = test_name
+                else:
+                    tests = list(manifest["tests"])
+                    deleted = set(current) - set(tests)
+                    change["tests"] = len(tests)
+                local._commit(tests, procedures, deleted, f"Restore snapshot {snapshot_id}", [change])
+            restored = self._restore_attachments(manifest, local, [p for procs in procedures.values() for p in procs])
+        cache = find_layer(backend, CachingBackend)
+        if cache is not None:
+            cache.clear()
+        return {"tests": len(procedures), "procedures": sum(len(p) for p in procedures.values()), "attachments": restored}
+
+    #---------------- retention ----------------
+    def prune(self, keep=None):
+        # Drops the oldest manifests beyond keep, then every chunk no manifest uses
+        keep = config.SNAPSHOT_KEEP if keep is None else keep
+        with FileLock(self.lock_file, stale_after=config.SNAPSHOT_LOCK_STALE):
+            snapshots = self.list()
+            for snap in snapshots[keep:]:
+                os.remove(os.path.join(self.manifests, f"{snap['id']}.json"))
+            live = set()
+            for snap in snapshots[:keep]:
+                manifest = self.load(snap["id"])
+                for entry in list(manifest["files"].values()) + list(manifest["external"].values()):
+                    live.update(entry["chunks"])
+            removed = 0
+            for root, _, names in os.walk(self.objects):
+                for name in names:
+                    digest = os.path.basename(root) + name
+                    if digest not in live:
+                        os.remove(os.path.join(root, name))
+                        removed += 1
+        return {"snapshots": max(0, len(snapshots) - keep), "chunks": removed}
+
+    def usage(self):
+        count, size = 0, 0
+        for root, _, names in os.walk(self.objects):
+            for name in names:
+                count += 1
+                size += os.path.getsize(os.path.join(root, name))
+        return {"snapshots": len(self.list()), "chunks": count, "bytes": size}
+
+#------------------------------------------------------
+# SCHEDULE - one background thread per shared folder per process
+#------------------------------------------------------
+# Every SNAPSHOT_INTERVAL seconds, if the journal moved since the latest
+# snapshot. Replicas skip the round while another one holds the snapshot lock.
+class SnapshotScheduler:
+    def __init__(self, backend, store, interval):
+        self.backend = backend
+        self.store = store
+        self.interval = interval
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.interval > 0 and (self._thread is None or not self._thread.is_alive()):
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="snapshot-scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def due(self):
+        latest = self.store.list()[:1]
+        if not latest:
+            return True
+        if time.time() - latest[0]["created"] < self.interval:
+            return False
+        return latest[0].get("journal_seq") != self.backend.journal.last_seq()
+
+    def run_once(self):
+        if not self.due():
+            return None
+        try:
+            manifest = self.store.take(self.backend, note="scheduled", lock_timeout=0)
+        except LockTimeout:
+            return None
+        self.store.prune()
+        return manifest
+
+    def _run(self):
+        while not self._stop.wait(min(self.interval, 60)):
+            try:
+                self.run_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e  # share temporarily unavailable - retry next round
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def get_snapshotter(backend, interval=None):
+    store = SnapshotStore(backend.shared_folder)
+    with _schedulers_lock:
+        scheduler = _schedulers.get(store.root)
+        if scheduler is None:
+            scheduler = _schedulers[store.root] = SnapshotScheduler(
+                backend, store, config.SNAPSHOT_INTERVAL if interval is None else interval)
+        return scheduler.start()
+
+#------------------------------------------------------
+# CLI
+#------------------------------------------------------
+def main(argv=None):
+    from relab.backends import build_backend
+
+    parser = argparse.ArgumentParser(description="Deduplicated point-in-time snapshots of the shared folder.")
+    parser.add_argument("--shared-folder", help="folder containing tests.json and TestProcedures/ (default: RELAB_SHARED_FOLDER)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    take = commands.add_parser("take", help="snapshot the catalog now")
+    take.add_argument("-m", "--note", default="", help="note stored with the snapshot")
+    commands.add_parser("list", help="list snapshots, newest first")
+    restore = commands.add_parser("restore", help="restore the catalog or one test")
+    restore.add_argument("snapshot", help="snapshot id from 'list'")
+    restore.add_argument("--test", help="only restore this test")
+    prune = commands.add_parser("prune", help="drop old snapshots and unused chunks")
+    prune.add_argument("--keep", type=int, default=config.SNAPSHOT_KEEP)
+    args = parser.parse_args(argv)
+
+    shared_folder = args.shared_folder or config.SHARED_FOLDER
+    backend = build_backend("local", shared_folder=shared_folder, cache_ttl=0, batch_delay=0)
+    store = SnapshotStore(shared_folder)
+    if args.command == "take":
+        start = time.perf_counter()
+        manifest = store.take(backend, args.note)
+        print(f"snapshot {manifest['id']}: {len(manifest['tests'])} tests in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    elif args.command == "list":
+        for snap in store.list():
+            print(f"{snap['id']}  {len(snap['tests']):5d} tests  {snap['size'] / 1e6:9.1f} MB  {snap['actor']}  {snap['note']}")
+        usage = store.usage()
+        print(f"{usage['snapshots']} snapshots, {usage['chunks']} chunks, {usage['bytes'] / 1e6:.1f} MB on disk", file=sys.stderr)
+    elif args.command == "restore":
+        stats = store.restore(backend, args.snapshot, args.test)
+        print(f"restored {stats['tests']} tests, {stats['procedures']} procedures, {stats['attachments']} attachments", file=sys.stderr)
+    else:
+        stats = store.prune(args.keep)
+        print(f"removed {stats['snapshots']} snapshots and {stats['chunks']} chunks", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import time
+from urllib.parse import urlsplit
+
+from relab import config, github_store
+from relab.backends import build_backend
+from relab.sharepoint import attachment_url
+
+#------------------------------------------------------
+# STATIC HTML SNAPSHOT - read-only site for viewers who never edit
+#------------------------------------------------------
+# python -m relab.static_site -o \\fileserver\relab-site --shared-folder "<SHARED_FOLDER>"
+# python -m relab.static_site -o site --github-repo PNRELAB/RE_LAB_PROCEDURE   (token in $GITHUB_TOKEN)
+#
+# Writes index.html (all tests + search box), one page per test under
+# tests/, and search-index.js, a client-side index loaded as a script so the
+# site also works straight from a file share. site.json remembers each
+# test's storage version: a rerun only re-renders the tests whose procedures
+# file changed, drops pages of deleted tests, and rebuilds the index from
+# the remembered entries. Run it from a scheduled task after edits.
+#
+# Links are user input: only http(s) and file URLs become links, anything
+# else (javascript:, data:, ...) is shown as plain text.
+
+SITE_FORMAT = 2  # bump when the page templates change to force a full render
+MANIFEST = "site.json"
+LINK_SCHEMES = ("http", "https", "file")
+_CONTROL = "".join(chr(c) for c in range(33))  # browsers ignore these before the scheme
+
+CSS = """body{font-family:Segoe UI,Arial,sans-serif;margin:0;background:#fafafa;color:#222}
+header{background:#4B8BBE;color:#fff;padding:12px 20px;font-size:24px;font-weight:bold}
+header a{color:#fff;text-decoration:none}main{padding:16px 20px;max-width:1100px}
+table{border-collapse:collapse;width:100%}td,th{padding:6px 10px;text-align:left;border-bottom:1px solid #e5e5e5}
+tr:nth-child(even){background:#f4f4f4}tr:hover{background:#f0f8ff}
+#q{width:100%;padding:8px;font-size:16px;margin-bottom:12px}.muted{color:#888;font-size:13px}
+#results li{margin:4px 0}mark{background:#fff176}
+"""
+
+SEARCH_JS = """(function(){
+var q=document.getElementById("q"),out=document.getElementById("results"),list=document.getElementById("tests");
+if(!q||!window.RELAB_INDEX)return;
+function esc(s){return s.replace(/[&<>"]/g,function(c){return{"&":"&amp;","<":"&lt;",">":"&gt;",'"':"&quot;"}[c]})}
+q.addEventListener("input",function(){
+  var terms=q.value.toLowerCase().split(/\\s+/).filter(Boolean);out.innerHTML="";
+  list.style.display=terms.length?"none":"";if(!terms.length)return;
+  var hits=0,html=[];
+  for(var i=0;i<RELAB_INDEX.length&&hits<200;i++){var e=RELAB_INDEX[i],hay=(e.t+" "+e.x).toLowerCase();
+    if(terms.every(function(t){return hay.indexOf(t)>=0})){hits++;
+      html.push('<li><a href="'+e.p+'">'+esc(e.t)+'</a> &mdash; '+esc(e.x)+'</li>')}}
+  out.innerHTML=html.length?html.join(""):'<li class="muted">No matches</li>'})})();
+"""
+
+def slug(test_name):
+    # Readable, filesystem-safe and unique even when names differ only in punctuation
+    base = re.sub(r"[^A-Za-z0-9_-]+", "-", test_name).strip("-")[:60] or "test"
+    return f"{base}-{hashlib.sha1(test_name.encode('utf-8')).hexdigest()[:8]}"
+
+def _write(path, text):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def _page(title, body, root=""):
+    return (f'<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+            f'<meta name="viewport" content="width=device-width,initial-scale=1">'
+            f'<link rel="stylesheet" href="{root}style.css"></head><body>'
+            f'<header><a href="{root}index.html">RE Lab Test Procedures</a></header><main>{body}</main></body></html>\n')
+
+def _anchor(url, label):
+    try:
+        scheme = urlsplit(url.lstrip(_CONTROL)).scheme.lower()
+    except ValueError:
+        scheme = ""
+    if scheme not in LINK_SCHEMES:
+        return f'<span class="muted">{html.escape(url)}</span>'
+    return f'<a href="{html.escape(url)}">{label}</a>'
+
+def _link_cell(proc):
+    if proc.attachment is not None:
+        att = proc.attachment
+        url = attachment_url(att)
+        target = url or "file:///" + att.path.replace("\\", "/").lstrip("/")
+        return _anchor(target, f'{"🔗 " if url else "📄 "}{html.escape(att.name or att.path)}')
+    if proc.url:
+        return _anchor(proc.url, "📎 Open Link")
+    return '<span class="muted">N/A</span>'
+
+def render_test(test_name, procedures, generated):
+    rows = "".join(f"<tr><td>{i + 1}</td><td>{html.escape(p.text)}</td><td>{_link_cell(p)}</td></tr>"
+                   for i, p in enumerate(procedures))
+    body = (f"<h2>{html.escape(test_name)}</h2>"
+            f'<p class="muted">{len(procedures)} procedures &middot; snapshot {html.escape(generated)}</p>'
+            + (f"<table><tr><th>#</th><th>Procedure</th><th>Link</th></tr>{rows}</table>" if rows
+               else "<p>No procedures available for this test.</p>"))
+    return _page(test_name, body, root="../")
+
+def render_index(tests, entries, generated):
+    rows = "".join(f'<tr><td><a href="tests/{entries[t]["page"]}">{html.escape(t)}</a></td>'
+                   f'<td>{len(entries[t]["texts"])}</td></tr>' for t in tests if t in entries)
+    body = ('<input id="q" type="search" placeholder="Search tests and procedures..." autofocus>'
+            '<ul id="results"></ul>'
+            f'<div id="tests"><p class="muted">{len(tests)} tests &middot; snapshot {html.escape(generated)}</p>'
+            f"<table><tr><th>Test</th><th>Procedures</th></tr>{rows}</table></div>"
+            '<script src="search-index.js"></script><script src="search.js"></script>')
+    return _page("RE Lab Test Procedures", body)
+
+def render_search_index(tests, entries):
+    items = [{"t": t, "p": f"tests/{entries[t]['page']}", "x": text}
+             for t in tests if t in entries for text in [""] + entries[t]["texts"]]
+    return "window.RELAB_INDEX=" + json.dumps(items, ensure_ascii=False, separators=(",", ":")) + ";\n"
+
+#------------------------------------------------------
+# INCREMENTAL BUILD
+#------------------------------------------------------
+def _version_key(version):
+    return json.loads(json.dumps(version))  # tuples -> lists, comparable with the manifest
+
+def build_site(backend, output, full=False):
+    os.makedirs(os.path.join(output, "tests"), exist_ok=True)
+    manifest_path = os.path.join(output, MANIFEST)
+    manifest = {}
+    if not full and os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    if manifest.get("format") != SITE_FORMAT:
+        manifest = {}
+    entries = manifest.get("tests", {})  # test -> {"version", "page", "texts"}
+
+    generated = time.strftime("%Y-%m-%d %H:%M")
+    tests = backend.list_tests()
+    versions = backend.versions()
+    stats = {"rendered": 0, "unchanged": 0, "removed": 0}
+    for test_name in tests:
+        version = _version_key(versions.get(test_name))
+        entry = entries.get(test_name)
+        page = slug(test_name) + ".html"
+        if entry is not None and entry["version"] == version and version is not None \
+                and os.path.exists(os.path.join(output, "tests", page)):
+            stats["unchanged"] += 1
+            continue
+        procedures = backend.get_procedures(test_name)
+        _write(os.path.join(output, "tests", page), render_test(test_name, procedures, generated))
+        entries[test_name] = {"version": version, "page": page, "texts": [p.text for p in procedures]}
+        stats["rendered"] += 1
+    for test_name in set(entries) - set(tests):
+        try:
+            os.remove(os.path.join(output, "tests", entries[test_name]["page"]))
+        except OSError:
+            pass
+        del entries[test_name]
+        stats["removed"] += 1
+
+    _write(os.path.join(output, "style.css"), CSS)
+    _write(os.path.join(output, "search.js"), SEARCH_JS)
+    _write(os.path.join(output, "search-index.js"), render_search_index(tests, entries))
+    _write(os.path.join(output, "index.html"), render_index(tests, entries, generated))
+    _write(manifest_path, json.dumps({"format": SITE_FORMAT, "generated": generated, "tests": entries}, ensure_ascii=False))
+    return stats
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the procedures as a static, searchable HTML site.")
+    parser.add_argument("-o", "--output", required=True, help="site folder (served by any static web server)")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--shared-folder", help="local folder containing tests.json and TestProcedures/ (default: RELAB_SHARED_FOLDER)")
+    where.add_argument("--github-repo", help="owner/name of the GitHub procedures repo")
+    parser.add_argument("--procedures-folder", default="TestProcedures", help="procedures folder inside the GitHub repo")
+    parser.add_argument("--full", action="store_true", help="re-render every test page")
+    args = parser.parse_args(argv)
+
+    if args.github_repo:
+        if not os.environ.get("GITHUB_TOKEN"):
+            sys.exit("GITHUB_TOKEN is not set")
+        github_store.configure(os.environ["GITHUB_TOKEN"], args.github_repo, args.procedures_folder)
+        backend = build_backend("github", cache_ttl=0, batch_delay=0)
+    else:
+        backend = build_backend("local", shared_folder=args.shared_folder or config.SHARED_FOLDER, cache_ttl=0, batch_delay=0)
+    start = time.perf_counter()
+    stats = build_site(backend, args.output, args.full)
+    print(f"site in {args.output}: {stats['rendered']} rendered, {stats['unchanged']} unchanged, "
+          f"{stats['removed']} removed in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
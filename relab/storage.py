@@ -0,0 +1,34 @@
+import os
+
+from relab import config
+from relab.codec import decode, encode
+from relab.instrument import timed
+from relab.sharepoint import local_to_sharepoint
+
+#--------------------------------------------------------
+# JSON READ/WRITE
+#------------------------------------------------------
+def read_json(file_path):
+    with timed("read_json", file_path):
+        if not os.path.exists(file_path):
+            return []
+        with open(file_path, "rb") as f:
+            return decode(f.read())
+
+def write_json(file_path, data):
+    with timed("write_json", file_path):
+        temp_file = file_path + ".tmp"
+        with open(temp_file, "wb") as f:
+            f.write(encode(data))
+        os.replace(temp_file, file_path)
+
+def ensure_folders():
+    os.makedirs(config.PROCEDURES_FOLDER, exist_ok=True)
+
+def save_upload(test_name, uploaded_file):
+    # Stores an uploaded attachment next to the procedures and returns the link to save
+    ensure_folders()
+    save_path = os.path.join(config.PROCEDURES_FOLDER, f"{test_name}_{uploaded_file.name}")
+    with open(save_path, "wb") as f:
+        f.write(uploaded_file.getbuffer())
+    return {"type": "file", "path": save_path, "name": uploaded_file.name, "url": local_to_sharepoint(save_path)}
@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import Counter
+
+#------------------------------------------------------
+# TAG INDEX - inverted index tag -> procedure ids, for facet filtering
+#------------------------------------------------------
+# Tags look like "facet:value" ("equipment:HAST-01", "stage:qual",
+# "rev:B"); a tag without a prefix belongs to the "tag" facet, and
+# records.normalize_tags stores "tag:urgent" as plain "urgent", so each tag
+# has one posting whichever way it was typed. A procedure
+# id is (test_name, position). Tests are indexed lazily, the first time a
+# query needs them: a per-test query loads only that test, a catalog-wide one
+# every test. Each test's entry remembers the backend version it was built
+# from and sync() compares it with the current one (backend.get_version for
+# one test, one backend.versions() listing for the catalog), so writes that
+# bypass the journal - older dashboards, hand edits, OneDrive - are picked up
+# too. Only tests whose version moved are re-indexed, adjusting the postings
+# and the cached facet counts by difference. Filtering is set algebra on the
+# postings, never a scan of the records.
+#
+#   index = get_tag_index(backend)
+#   ids = index.match({"equipment": {"HAST-01", "HAST-02"}, "stage": {"qual"}}, mode="all")
+#   index.counts(test_name)      -> {"equipment": {"HAST-01": 12, ...}, ...}
+
+DEFAULT_FACET = "tag"
+_UNSEEN = object()  # version of a test that was never indexed
+
+def split_tag(tag):
+    facet, sep, value = tag.partition(":")
+    return (facet, value) if sep else (DEFAULT_FACET, tag)
+
+def join_tag(facet, value):
+    # Inverse of split_tag: the stored (canonical) spelling
+    return value if facet == DEFAULT_FACET and ":" not in value else f"{facet}:{value}"
+
+class TagIndex:
+    def __init__(self, backend, interval=2.0):
+        self.backend = backend
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._postings = {}      # tag -> {(test, position)}
+        self._by_test = {}       # test -> {tag: {(test, position)}}, what to remove on re-index
+        self._totals = Counter()  # tag -> count across every test
+        self._versions = {}      # test -> backend version its postings were built from
+        self._checked = {}       # test, or None for the catalog -> monotonic time of the last check
+
+    #---------------- maintenance ----------------
+    def _index_test(self, test_name, procedures):
+        # Replaces test_name's postings; counts move by the difference only
+        old = self._by_test.pop(test_name, {})
+        for tag, ids in old.items():
+            posting = self._postings[tag]
+            posting -= ids
+            if not posting:
+                del self._postings[tag]
+        new = {}
+        for position, proc in enumerate(procedures):
+            for tag in proc.tags:
+                new.setdefault(tag, set()).add((test_name, position))
+        for tag, ids in new.items():
+            self._postings.setdefault(tag, set()).update(ids)
+        if new:
+            self._by_test[test_name] = new
+        self._totals.subtract({tag: len(ids) for tag, ids in old.items()})
+        self._totals.update({tag: len(ids) for tag, ids in new.items()})
+        self._totals = +self._totals  # drop zero counts
+
+    def _refresh(self, versions):
+        # versions: test -> current version (None: gone); re-indexes the
+        # tests whose version differs from the one they were built from
+        with self._lock:
+            stale = [t for t, v in versions.items() if self._versions.get(t, _UNSEEN) != v]
+        loaded = {t: self.backend.get_procedures(t) if versions[t] is not None else [] for t in stale}
+        with self._lock:
+            for test_name, procedures in loaded.items():
+                self._index_test(test_name, procedures)
+                if versions[test_name] is None:
+                    self._versions.pop(test_name, None)
+                else:
+                    self._versions[test_name] = versions[test_name]
+
+    def rebuild(self):
+        with self._lock:
+            self._postings, self._by_test, self._totals = {}, {}, Counter()
+            self._versions, self._checked = {}, {}
+        self.sync(force=True)
+
+    def sync(self, test_name=None, force=False):
+        # Brings test_name (or, with None, the whole catalog) up to date with
+        # the backend; checked at most once per interval
+        now = time.monotonic()
+        with self._lock:
+            checked = max(self._checked.get(test_name, float("-inf")), self._checked.get(None, float("-inf")))
+            if not force and now - checked < self.interval:
+                return None
+            self._checked[test_name] = now
+        if test_name is not None:
+            self._refresh({test_name: self.backend.get_version(test_name)})
+            return None
+        tests = self.backend.list_tests()
+        current = self.backend.versions()
+        versions = {t: current.get(t) for t in tests}
+        with self._lock:
+            versions.update((t, None) for t in self._versions if t not in versions)  # deleted since
+        self._refresh(versions)
+        return None
+
+    #---------------- queries ----------------
+    def ids(self, tag):
+        with self._lock:
+            return set(self._postings.get(tag, ()))
+
+    def match(self, selected, mode="all", test_name=None):
+        # selected: {facet: {values}}. Values of one facet are OR-ed; facets
+        # are AND-ed (mode="all") or OR-ed (mode="any"). -> {(test, position)}
+        self.sync(test_name)
+        groups = []
+        with self._lock:
+            postings = self._by_test.get(test_name, {}) if test_name is not None else self._postings
+            for facet, values in selected.items():
+                if not values:
+                    continue
+                group = set()
+                for value in values:
+                    tag = join_tag(facet, value)
+                    group |= postings.get(tag, set())
+                groups.append(group)
+        if not groups:
+            return None  # no filter
+        groups.sort(key=len)
+        result = set(groups[0])
+        for group in groups[1:]:
+            if mode == "all":
+                result &= group
+                if not result:
+                    break
+            else:
+                result |= group
+        return result
+
+    def counts(self, test_name=None):
+        # -> {facet: {value: count}} for one test or the whole catalog (cached)
+        self.sync(test_name)
+        with self._lock:
+            if test_name is not None:
+                source = {tag: len(ids) for tag, ids in self._by_test.get(test_name, {}).items()}
+            else:
+                source = self._totals
+            result = {}
+            for tag, count in source.items():
+                facet, value = split_tag(tag)
+                result.setdefault(facet, {})[value] = count
+        return {facet: dict(sorted(values.items())) for facet, values in sorted(result.items())}
+
+#------------------------------------------------------
+# ONE INDEX PER BACKEND PER PROCESS
+#------------------------------------------------------
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_tag_index(backend, interval=2.0):
+    with _indexes_lock:
+        index = _indexes.get(id(backend))
+        if index is None or index.backend is not backend:
+            index = _indexes[id(backend)] = TagIndex(backend, interval)
+        return index
@@ -0,0 +1,158 @@
+import atexit
+import hashlib
+import os
+import threading
+import time
+
+from relab import config
+from relab.codec import decode, encode
+from relab.instrument import timed
+from relab.records import dump_procedures, parse_procedures
+
+#------------------------------------------------------
+# WARM-START CACHE - parsed catalog data persisted in a per-user cache dir
+#------------------------------------------------------
+# After a restart every first view used to cold-read the share (or fetch
+# from GitHub) before the in-memory cache helped. The cache layer's parsed
+# entries are now written as JSON (the catalog's own codec and record
+# format, never pickle) to <WARM_CACHE_DIR>/<backend>-<hash>.json every
+# WARM_CACHE_INTERVAL seconds when they changed, and at exit. On start a
+# background thread loads the file and keeps only the entries whose version
+# still matches the store: one scandir + one stat for the local folder, the
+# folder listing (blob shas of the current commit) + tests.json sha for
+# GitHub. Anything that changed meanwhile is simply read cold as before.
+#
+# The file lives in the user's cache dir on the server's own disk; a file
+# that doesn't load (other format, other source, corrupt) is ignored and
+# replaced at the next save.
+
+FORMAT = 2
+
+def default_cache_dir():
+    # %LOCALAPPDATA%\relab on Windows, $XDG_CACHE_HOME/relab or ~/.cache/relab elsewhere
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "relab")
+
+def cache_source(backend):
+    # What the cached data was read from; a file for another source is ignored
+    if backend.name == "github":
+        return f"github:{config.GITHUB_API_URL}/{backend.repo.full_name}/{backend.procedures_folder}"
+    return f"{backend.name}:{os.path.abspath(backend.shared_folder)}"
+
+def cache_path(source, folder=None):
+    folder = folder or config.WARM_CACHE_DIR or default_cache_dir()
+    name = source.split(":", 1)[0]
+    return os.path.join(folder, f"{name}-{hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]}.json")
+
+def _dump_entries(entries):
+    # {key: (version, value)} -> [[key, version, value]]; key None is the
+    # tests list, any other key a test's procedures
+    return [[key, list(version) if isinstance(version, tuple) else version,
+             list(value) if key is None else dump_procedures(value)] for key, (version, value) in entries.items()]
+
+def _load_entries(items):
+    # Inverse of _dump_entries; local versions are (mtime_ns, size) tuples
+    return {key: (tuple(version) if isinstance(version, list) else version,
+                  list(value) if key is None else parse_procedures(value)) for key, version, value in items}
+
+class WarmCache:
+    def __init__(self, cache, path=None, interval=None):
+        self.cache = cache  # the CachingBackend layer
+        self.source = None  # resolved on the background thread (GitHub connects)
+        self.path = path
+        self.interval = config.WARM_CACHE_INTERVAL if interval is None else interval
+        self.loaded = None  # {"saved", "entries", "valid", "seconds"} of the last load
+        self.last_error = None
+        self._saved = None  # {key: version} as of the last save/load
+        self._stop = threading.Event()
+        self._thread = None
+
+    #---------------- load / save ----------------
+    def _resolve(self):
+        if self.source is None:
+            self.source = cache_source(self.cache.inner)
+            self.path = self.path or cache_path(self.source)
+
+    def load(self):
+        start = time.perf_counter()
+        self._resolve()
+        try:
+            with timed("warm_cache_load", self.path), open(self.path, "rb") as f:
+                data = decode(f.read())
+            if not isinstance(data, dict) or data.get("format") != FORMAT or data.get("source") != self.source:
+                return None
+            entries = _load_entries(data["entries"])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.last_error = e  # corrupt: start cold, overwrite at next save
+            return None
+        checked_at = time.monotonic()
+        inner = self.cache.inner
+        current = inner.versions()
+        current[None] = inner.get_version(None)
+        valid = {key: entry for key, entry in entries.items() if current.get(key) == entry[0]}
+        self.cache.preload(valid, checked_at)
+        self._saved = {key: entry[0] for key, entry in valid.items()}
+        self.loaded = {"saved": data["saved"], "entries": len(entries), "valid": len(valid),
+                       "seconds": time.perf_counter() - start}
+        return self.loaded
+
+    def save(self, force=False):
+        self._resolve()
+        entries = self.cache.export()
+        versions = {key: entry[0] for key, entry in entries.items()}
+        if not force and versions == self._saved:
+            return False
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_file = f"{self.path}.{os.getpid()}.tmp"
+        data = {"format": FORMAT, "source": self.source, "saved": time.time(), "entries": _dump_entries(entries)}
+        with timed("warm_cache_save", self.path), open(temp_file, "wb") as f:
+            f.write(encode(data, pretty=False))
+        os.replace(temp_file, self.path)
+        self._saved = versions
+        return True
+
+    #---------------- lifecycle ----------------
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="warm-cache", daemon=True)
+            self._thread.start()
+            atexit.register(self._save_quietly)
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _save_quietly(self):
+        try:
+            self.save()
+        except Exception as e:
+            self.last_error = e
+
+    def _run(self):
+        try:
+            self.load()
+        except Exception as e:
+            self.last_error = e  # share or GitHub unavailable - start cold
+        while self.interval > 0 and not self._stop.wait(self.interval):
+            self._save_quietly()
+
+#------------------------------------------------------
+# ONE WARM CACHE PER BACKEND PER PROCESS
+#------------------------------------------------------
+_warm_caches = {}
+_warm_caches_lock = threading.Lock()
+
+def start_warm_cache(backend, path=None, interval=None):
+    from relab.backends import CachingBackend, find_layer
+
+    cache = find_layer(backend, CachingBackend)
+    if cache is None or backend.name not in ("local", "github"):
+        return None  # nothing cached, or nothing worth keeping across restarts
+    with _warm_caches_lock:
+        warm = _warm_caches.get(id(cache))
+        if warm is None or warm.cache is not cache:
+            warm = _warm_caches[id(cache)] = WarmCache(cache, path, interval)
+        return warm.start()
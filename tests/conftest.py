@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from relab import config, github_store
+
+#------------------------------------------------------
+# SHARED FIXTURES - a throwaway SHARED_FOLDER per test
+#------------------------------------------------------
+@pytest.fixture
+def shared_folder(tmp_path, monkeypatch):
+    from relab.backends import reset_backends
+
+    previous = config.SHARED_FOLDER
+    config.set_shared_folder(str(tmp_path))
+    os.makedirs(config.PROCEDURES_FOLDER)
+    reset_backends()
+    yield str(tmp_path)
+    config.set_shared_folder(previous)
+    reset_backends()
+
+@pytest.fixture
+def fake_github(monkeypatch):
+    # benchmarks/fake_github.py on a free port, with the repo holding an empty tests.json
+    from fake_github import FakeGitHub
+
+    with FakeGitHub(files={"tests.json": b"[]"}) as fake:
+        monkeypatch.setattr(config, "GITHUB_API_URL", fake.base_url)
+        monkeypatch.setenv("GITHUB_TOKEN", "fake-token")
+        github_store.configure("fake-token", fake.repo.full_name, "TestProcedures")
+        yield fake
+        github_store.configure()
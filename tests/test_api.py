@@ -0,0 +1,59 @@
+import gzip
+import http.client
+import json
+import threading
+
+import pytest
+
+from relab.api import make_server
+from relab.backends import MemoryBackend
+from relab.records import Procedure
+
+@pytest.fixture
+def api():
+    backend = MemoryBackend(["My Test"], {"My Test": [Procedure(f"step {i} " + "x" * 40) for i in range(150)]})
+    server = make_server(backend, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+def _get(port, path, **headers):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", path, headers=headers)
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response, body
+
+def test_link_header_is_encoded_once_and_resolves(api):
+    response, body = _get(api, "/tests/My%20Test/procedures")
+    assert response.status == 200
+    link = response.getheader("Link")
+    assert link == '</tests/My%20Test/procedures?page=2&per_page=100>; rel="next"'
+    response, body = _get(api, link[1:link.index(">")])
+    assert response.status == 200
+    assert json.loads(body)["page"] == 2
+
+def test_etag_follows_the_content_encoding(api):
+    plain, plain_body = _get(api, "/tests/My%20Test/procedures")
+    zipped, zipped_body = _get(api, "/tests/My%20Test/procedures", **{"Accept-Encoding": "gzip"})
+    assert zipped.getheader("Content-Encoding") == "gzip"
+    assert json.loads(gzip.decompress(zipped_body)) == json.loads(plain_body)
+    assert zipped.getheader("ETag") == plain.getheader("ETag")[:-1] + '-gzip"'
+
+    cached, body = _get(api, "/tests/My%20Test/procedures",
+                        **{"Accept-Encoding": "gzip", "If-None-Match": zipped.getheader("ETag")})
+    assert (cached.status, body) == (304, b"")
+    assert cached.getheader("ETag") == zipped.getheader("ETag")
+
+    # a gzip tag doesn't validate the identity variant, and vice versa
+    fresh, _ = _get(api, "/tests/My%20Test/procedures", **{"If-None-Match": zipped.getheader("ETag")})
+    assert fresh.status == 200
+    fresh, _ = _get(api, "/tests/My%20Test/procedures",
+                    **{"Accept-Encoding": "gzip", "If-None-Match": plain.getheader("ETag")})
+    assert fresh.status == 200
+
+def test_unknown_test_and_bad_paging(api):
+    assert _get(api, "/tests/nope/procedures")[0].status == 404
+    assert _get(api, "/tests?page=0")[0].status == 400
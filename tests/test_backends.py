@@ -0,0 +1,179 @@
+import io
+import os
+
+import pytest
+
+from relab import config, github_store
+from relab.backends import (GitHubBackend, LocalBackend, MemoryBackend, action_done, action_nonce, add_procedure_op, add_test_op,
+                            apply_mutations, build_backend, delete_procedure_op, delete_test_op, edit_procedure_op)
+from relab.locking import LockTimeout, WriteConflict
+from relab.records import Procedure, dump_procedures
+from relab.storage import write_json
+
+#------------------------------------------------------
+# apply_mutations - pure
+#------------------------------------------------------
+def test_apply_mutations_returns_only_what_changed():
+    stored = {"A": [Procedure("a1"), Procedure("a2")], "B": [Procedure("b1")]}
+    loaded = []
+
+    def load(test_name):
+        loaded.append(test_name)
+        return list(stored[test_name])
+
+    tests, procedures, deleted, changes = apply_mutations(["A", "B"], load, [
+        add_procedure_op("A", "a3"),
+        edit_procedure_op("A", 0, "a1"),       # same text: no change
+        delete_procedure_op("A", 1),
+        add_test_op("C"),
+        delete_test_op("B"),
+        edit_procedure_op("A", 99, "out of range"),
+    ])
+    assert tests == ["A", "C"]
+    assert [p.text for p in procedures["A"]] == ["a1", "a3"]
+    assert procedures["C"] == []
+    assert deleted == {"B"}
+    assert [c["op"] for c in changes] == ["add_procedure", "delete_procedure", "add_test", "delete_test"]
+    assert loaded == ["A"]  # B was only deleted, never read
+
+def test_apply_mutations_skips_seen_keys_and_noops():
+    tests, procedures, deleted, changes = apply_mutations(["A"], lambda t: [], [
+        add_procedure_op("A", "x", key="k1"), add_test_op("A"), add_procedure_op("A", "")], seen_keys={"k1"})
+    assert (tests, procedures, deleted, changes) == (None, {}, set(), [])
+
+#------------------------------------------------------
+# conflicts and retries (local folder)
+#------------------------------------------------------
+def _interfere_once(backend, test_name, text):
+    # Another writer (e.g. an older dashboard) rewrites the file right after we read it
+    original = backend.get_procedures
+    state = {"done": False}
+
+    def get_procedures(name):
+        result = original(name)
+        if name == test_name and not state["done"]:
+            state["done"] = True
+            write_json(backend.proc_file(name), dump_procedures(result + [Procedure(text)]))
+        return result
+
+    backend.get_procedures = get_procedures
+    return state
+
+def test_commutative_batches_are_merged_on_conflict(shared_folder):
+    backend = LocalBackend(shared_folder)
+    backend.add_test("T")
+    backend.add_procedure("T", "first")
+    state = _interfere_once(backend, "T", "concurrent")
+    backend.add_procedure("T", "mine")
+    assert state["done"]
+    assert [p.text for p in LocalBackend(shared_folder).get_procedures("T")] == ["first", "concurrent", "mine"]
+
+def test_index_based_edits_surface_the_conflict(shared_folder):
+    backend = LocalBackend(shared_folder)
+    backend.add_test("T")
+    backend.add_procedure("T", "first")
+    _interfere_once(backend, "T", "concurrent")
+    with pytest.raises(WriteConflict):
+        backend.delete_procedure("T", 0)
+    assert [p.text for p in LocalBackend(shared_folder).get_procedures("T")] == ["first", "concurrent"]
+
+def test_held_lock_times_out(shared_folder, monkeypatch):
+    monkeypatch.setattr(config, "WRITE_LOCK_TIMEOUT", 0.2)
+    backend = LocalBackend(shared_folder)
+    with open(backend.lock_file, "w") as f:
+        f.write("other-host 1234 0\n")  # held by another process
+    with pytest.raises(LockTimeout):
+        backend.add_test("T")
+    assert not os.path.exists(backend.tests_file)  # nothing written
+
+def test_memory_backend_applies_in_order():
+    backend = MemoryBackend()
+    backend.apply([add_test_op("T"), add_procedure_op("T", "a"), add_procedure_op("T", "b"), delete_procedure_op("T", 0)])
+    assert backend.list_tests() == ["T"]
+    assert [p.text for p in backend.get_procedures("T")] == ["b"]
+
+#------------------------------------------------------
+# idempotency keys (dashboard buttons)
+#------------------------------------------------------
+def test_action_nonce_is_kept_until_the_write_is_done():
+    pending = {}
+    first = action_nonce(pending, "delete_procedure", "T", 0)
+    assert action_nonce(pending, "delete_procedure", "T", 0) == first  # retry of the same click
+    assert action_nonce(pending, "delete_procedure", "T", 1) != first
+    action_done(pending, "delete_procedure", "T", 0)
+    assert action_nonce(pending, "delete_procedure", "T", 0) != first  # the next click
+
+def _click(backend, pending, action, *args):
+    getattr(backend, action)(*args, key=action_nonce(pending, action, *args))
+    action_done(pending, action, *args)
+
+def test_repeated_actions_apply_but_retries_do_not(shared_folder):
+    backend = build_backend("local", cache_ttl=0, batch_delay=0)
+    pending = {}
+    _click(backend, pending, "add_test", "T")
+    for text in ("a", "b", "c"):
+        _click(backend, pending, "add_procedure", "T", text)
+    _click(backend, pending, "delete_procedure", "T", 0)
+    _click(backend, pending, "delete_procedure", "T", 0)
+    assert [p.text for p in backend.get_procedures("T")] == ["c"]
+    _click(backend, pending, "delete_test", "T")
+    _click(backend, pending, "add_test", "T")
+    assert backend.list_tests() == ["T"]
+
+    # a replayed rerun before the first one confirmed: same nonce, applied once
+    key = action_nonce(pending, "add_procedure", "T", "d")
+    backend.add_procedure("T", "d", key=key)
+    backend.add_procedure("T", "d", key=key)
+    assert [p.text for p in backend.get_procedures("T")] == ["d"]
+    # ... also from another process, through the journal
+    LocalBackend(shared_folder).add_procedure("T", "d", key=key)
+    assert [p.text for p in LocalBackend(shared_folder).get_procedures("T")] == ["d"]
+
+#------------------------------------------------------
+# GitHub attachments (benchmarks/fake_github.py)
+#------------------------------------------------------
+def _upload(name, data):
+    f = io.BytesIO(data)
+    f.name = name
+    return f
+
+def test_reuploaded_content_is_not_posted_again(fake_github):
+    backend = GitHubBackend()
+    backend.add_test("HAST")
+    backend.add_procedure("HAST", "spec", backend.stage_attachment("HAST", _upload("spec.pdf", b"%PDF-1")))
+    assert fake_github.call_count("POST", "/git/blobs") == 1
+    fake_github.reset_calls()
+    link = GitHubBackend().stage_attachment("HAST", _upload("copy.pdf", b"%PDF-1"))
+    assert link["path"] == "TestProcedures/HAST_copy.pdf"
+    assert fake_github.call_count("POST", "/git/blobs") == 0
+
+def test_oversized_upload_goes_to_the_external_store(fake_github, monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "GITHUB_ATTACHMENT_MAX_MB", 1 / 1024 / 1024)
+    monkeypatch.setattr(config, "EXTERNAL_STORE_DIR", "")
+    backend = GitHubBackend()
+    backend.add_test("HAST")
+    with pytest.raises(ValueError):
+        backend.stage_attachment("HAST", _upload("big.pdf", b"%PDF-big"))
+    assert backend._staged == {}
+
+    monkeypatch.setattr(config, "EXTERNAL_STORE_DIR", str(tmp_path / "store"))
+    link = backend.stage_attachment("HAST", _upload("big.pdf", b"%PDF-big"))
+    backend.add_procedure("HAST", "big", link)
+    pointer = fake_github.files()["TestProcedures/HAST_big.pdf"].decode()
+    assert pointer.startswith("version https://git-lfs.github.com/spec/v1")
+    assert os.path.exists(link["url"])
+    assert fake_github.call_count("POST", "/git/blobs") == 0
+
+def test_failed_write_drops_the_staged_upload(fake_github, monkeypatch):
+    backend = GitHubBackend()
+    backend.add_test("HAST")
+    link = backend.stage_attachment("HAST", _upload("spec.pdf", b"%PDF-1"))
+
+    def conflict(*args, **kwargs):
+        raise WriteConflict("main moved while writing")
+    monkeypatch.setattr(github_store, "commit_files", conflict)
+    with pytest.raises(WriteConflict):
+        backend.add_procedure("HAST", "spec", link)
+    assert link["path"] in backend._staged
+    backend.discard_attachment(link)
+    assert backend._staged == {}
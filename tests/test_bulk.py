@@ -0,0 +1,37 @@
+import csv
+import io
+
+from relab import bulk
+from relab.backends import build_backend
+
+ROWS = [
+    {"test": "HAST", "text": "Bake 96h", "link": "https://wiki/hast", "tags": "stage:qual"},
+    {"test": "HAST", "text": "Spec", "file_path": r"C:\Lab\TestProcedures\HAST_spec.pdf", "file_name": "HAST_spec.pdf"},
+    {"test": "TC", "text": "Cycle 500x"},
+    {"test": "", "text": "no test"},
+]
+
+def _csv(rows):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, bulk.CSV_FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue()
+
+def test_import_export_round_trip(shared_folder):
+    backend = build_backend("local", cache_ttl=0, batch_delay=0)
+    stats = bulk.import_rows(backend, bulk.read_rows(io.StringIO(_csv(ROWS)), "csv"), chunk_size=2)
+    assert (stats["imported"], stats["tests_created"], len(stats["rejected"])) == (3, 2, 1)
+    exported = list(bulk.export_rows(backend))
+    assert [(r["test"], r["text"]) for r in exported] == [("HAST", "Bake 96h"), ("HAST", "Spec"), ("TC", "Cycle 500x")]
+    assert exported[0]["tags"] == "stage:qual"
+    assert exported[1]["file_name"] == "HAST_spec.pdf"
+
+def test_cli_uses_the_configured_github_api(fake_github, tmp_path):
+    source = tmp_path / "rows.csv"
+    source.write_text(_csv(ROWS[:3]), encoding="utf-8")
+    assert bulk.main(["import", str(source), "--github-repo", fake_github.repo.full_name]) == 0
+    out = tmp_path / "out.jsonl"
+    assert bulk.main(["export", "-o", str(out), "--github-repo", fake_github.repo.full_name]) == 0
+    assert len(out.read_text(encoding="utf-8").splitlines()) == 3
+    assert fake_github.calls
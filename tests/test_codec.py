@@ -0,0 +1,35 @@
+import gzip
+import json
+
+import pytest
+
+from relab import codec
+from relab.codec import available_codecs, decode, encode
+
+DATA = [{"text": "Étape 1 - torque", "link": "https://wiki/x"}, {"text": "b", "link": {"type": "file", "path": "C:\\x.pdf", "name": "x.pdf", "url": ""}}]
+
+@pytest.mark.parametrize("name", available_codecs())
+def test_pretty_matches_what_the_dashboards_wrote(name):
+    assert encode(DATA, pretty=True, compress=False, codec=name) == json.dumps(DATA, indent=4).encode("utf-8")
+
+@pytest.mark.parametrize("name", available_codecs())
+def test_compact_round_trip(name):
+    raw = encode(DATA, pretty=False, compress=False, codec=name)
+    assert b"\n" not in raw
+    assert decode(raw, codec=name) == DATA
+
+def test_gzip_is_off_by_default():
+    assert codec.GZIP_THRESHOLD == 0
+    big = [{"text": "x" * 1000, "link": ""}] * 1000
+    assert encode(big)[:2] != codec.GZIP_MAGIC
+
+def test_decode_sniffs_gzip_and_bom(monkeypatch):
+    monkeypatch.setattr(codec, "GZIP_THRESHOLD", 10)
+    raw = encode(DATA)
+    assert raw[:2] == codec.GZIP_MAGIC
+    assert decode(raw) == DATA
+    assert decode(gzip.compress(json.dumps(DATA).encode("utf-8"))) == DATA
+    assert decode(codec.UTF8_BOM + json.dumps(DATA, indent=4).encode("utf-8")) == DATA
+
+def test_gzip_output_is_deterministic():
+    assert encode(DATA, compress=True) == encode(DATA, compress=True)
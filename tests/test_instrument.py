@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+from relab import instrument
+
+@pytest.fixture(autouse=True)
+def clean():
+    instrument.reset()
+    yield
+    instrument.reset()
+
+def test_observers_and_rerun_traces_see_timed_ops(monkeypatch):
+    monkeypatch.setattr(instrument, "_observers", [])
+    seen = []
+    instrument.add_observer(lambda kind, ms, session: seen.append((kind, session)))
+    trace = instrument.begin_rerun("s1")
+    with instrument.timed("read_json", "tests.json"):
+        time.sleep(0.01)
+    with instrument.timed("stat", "HAST.json", test="HAST"):
+        pass
+    instrument.end_rerun(trace)
+    with instrument.timed("read_json", "outside"):
+        pass
+
+    assert seen == [("read_json", "s1"), ("stat", "s1"), ("rerun", "s1"), ("read_json", None)]
+    assert [op[0] for op in trace.ops] == ["read_json", "stat"]  # nothing after end_rerun
+    assert trace.breakdown()["read_json"]["count"] == 1
+    assert list(trace.by_test()) == ["HAST"]
+    assert trace.slowest(1)[0][0] == "read_json"
+    assert trace.total_ms >= 10
+    assert instrument.last_rerun("s1") is trace
+    assert instrument.percentiles()["read_json"]["count"] == 2
+
+def test_trace_caps_the_ops_it_keeps(monkeypatch):
+    monkeypatch.setattr(instrument, "MAX_OPS_PER_RERUN", 3)
+    trace = instrument.begin_rerun("s2")
+    for _ in range(5):
+        instrument.record("stat", 1.0)
+    instrument.end_rerun(trace)
+    assert (len(trace.ops), trace.dropped) == (3, 2)
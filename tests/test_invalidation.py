@@ -0,0 +1,35 @@
+import time
+
+from relab import config
+from relab.backends import build_backend
+from relab.records import Procedure, dump_procedures
+from relab.storage import write_json
+
+def _replica():
+    return build_backend("local", batch_delay=0, idempotency_window=0, instrument=False)
+
+def test_other_replicas_writes_show_up_at_once(shared_folder, monkeypatch):
+    monkeypatch.setattr(config, "INVALIDATION_INTERVAL", 0)
+    monkeypatch.setitem(config.CACHE_TTL, "local", 60)
+    a, b = _replica(), _replica()
+    a.add_test("T")
+    assert b.list_tests() == ["T"]
+    a.add_procedure("T", "from a")
+    assert [p.text for p in b.get_procedures("T")] == ["from a"]
+
+def test_writes_that_skip_the_version_file_show_up_after_cache_ttl(shared_folder, monkeypatch):
+    monkeypatch.setitem(config.CACHE_TTL, "local", 0.2)
+    backend = _replica()
+    backend.add_test("T")
+    assert backend.get_procedures("T") == []
+    # e.g. the 3.0 dashboard or a OneDrive sync rewriting the file in place
+    write_json(backend.proc_file("T"), dump_procedures([Procedure("external")]))
+    time.sleep(0.3)
+    assert [p.text for p in backend.get_procedures("T")] == ["external"]
+
+def test_shared_cache_ttl_is_opt_in(shared_folder, monkeypatch):
+    from relab.backends import CachingBackend, find_layer
+
+    assert find_layer(_replica(), CachingBackend).ttl == config.CACHE_TTL["local"]
+    monkeypatch.setattr(config, "SHARED_CACHE_TTL", 30)
+    assert find_layer(_replica(), CachingBackend).ttl == 30
@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+
+from relab import migrate
+from relab.backends import LocalBackend, build_backend
+from relab.jobs import FINISHED, JobRunner
+from relab.locking import WriteConflict
+from relab.storage import read_json, write_json
+
+def _wait(runner, job_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = runner.get(job_id)
+        if job["status"] in FINISHED:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} still {job['status']}")
+
+#------------------------------------------------------
+# BACKUP JOBS
+#------------------------------------------------------
+def test_backup_and_restore_use_the_backends_folder(shared_folder, tmp_path):
+    # The job's backend is not on config.SHARED_FOLDER
+    other = tmp_path / "other"
+    os.makedirs(other / "TestProcedures")
+    backend = build_backend("local", shared_folder=str(other), cache_ttl=0, batch_delay=0)
+    backend.add_test("HAST")
+    backend.add_procedure("HAST", "Bake 96h")
+    runner = JobRunner(backend, root=str(tmp_path / "jobs"), workers=1)
+    job = _wait(runner, runner.submit("backup"))
+    assert job["status"] == "done"
+
+    backend.add_procedure("HAST", "Extra step")
+    restored = _wait(runner, runner.submit("restore", {"path": job["result"]["zip"]}))
+    assert restored["status"] == "done" and restored["result"]["tests"] == 1
+    assert [p.text for p in backend.get_procedures("HAST")] == ["Bake 96h"]
+    assert read_json(os.path.join(shared_folder, "tests.json")) == []
+    assert os.listdir(os.path.join(shared_folder, "TestProcedures")) == []
+
+#------------------------------------------------------
+# SNAPSHOT JOBS
+#------------------------------------------------------
+def test_snapshot_take_and_restore_run_as_jobs(shared_folder, tmp_path):
+    backend = build_backend("local", cache_ttl=0, batch_delay=0)
+    backend.add_test("HAST")
+    backend.add_procedure("HAST", "Bake 96h")
+    runner = JobRunner(backend, root=str(tmp_path / "jobs"), workers=1)
+    job = _wait(runner, runner.submit("snapshot", {"note": "manual"}))
+    assert job["status"] == "done" and job["result"]["tests"] == 1
+
+    backend.add_procedure("HAST", "Extra step")
+    restored = _wait(runner, runner.submit("snapshot_restore", {"snapshot": job["result"]["id"], "test": "HAST"}))
+    assert restored["status"] == "done"
+    assert [p.text for p in backend.get_procedures("HAST")] == ["Bake 96h"]
+
+    missing = _wait(runner, runner.submit("snapshot_restore", {"snapshot": job["result"]["id"], "test": "nope"}))
+    assert missing["status"] == "failed"
+
+#------------------------------------------------------
+# MIGRATE
+#------------------------------------------------------
+def _legacy_catalog(shared_folder):
+    backend = LocalBackend(shared_folder)
+    backend.add_test("OLD")
+    backend.add_test("NEW")
+    backend.add_procedure("NEW", "current")
+    write_json(backend.proc_file("OLD"), ["bare string"])
+    return backend
+
+def test_migrate_is_a_journaled_locked_write(shared_folder):
+    backend = _legacy_catalog(shared_folder)
+    seq = backend.journal.last_seq()
+    results = migrate.migrate_folder(backend, check_only=True)
+    names = {t: os.path.basename(backend.proc_file(t)) for t in ("OLD", "NEW")}
+    assert (results["migrated"], results["current"]) == ([names["OLD"]], [names["NEW"]])
+    assert read_json(backend.proc_file("OLD")) == ["bare string"]
+    assert backend.journal.last_seq() == seq
+
+    migrate.migrate_folder(backend)
+    assert read_json(backend.proc_file("OLD")) == [{"text": "bare string", "link": ""}]
+    assert [(e["op"], e["test"]) for e in backend.journal.since(seq)] == [("migrate", "OLD")]
+    assert migrate.migrate_folder(backend)["migrated"] == []
+
+def test_migrate_does_not_overwrite_a_concurrent_edit(shared_folder):
+    backend = _legacy_catalog(shared_folder)
+    original = backend._read
+
+    def read_then_interfere(path):
+        data = original(path)
+        if path == backend.proc_file("OLD"):
+            write_json(path, ["bare string", "added meanwhile"])
+        return data
+
+    backend._read = read_then_interfere
+    with pytest.raises(WriteConflict):
+        migrate.migrate_folder(backend)
+    assert read_json(backend.proc_file("OLD")) == ["bare string", "added meanwhile"]
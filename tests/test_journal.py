@@ -0,0 +1,118 @@
+import os
+
+from relab import journal as journal_module
+from relab.backends import GitHubBackend, LocalBackend
+from relab.journal import LocalJournal, MemoryJournal
+
+def _entries(n, start=0):
+    return [{"op": "add_procedure", "test": "T", "text": f"p{i}"} for i in range(start, start + n)]
+
+#------------------------------------------------------
+# LOCAL FOLDER
+#------------------------------------------------------
+def test_local_journal_since_and_limit(tmp_path):
+    journal = LocalJournal(str(tmp_path))
+    journal.append(_entries(3))
+    journal.append(_entries(2, start=3))
+    assert sorted(os.listdir(tmp_path)) == [".relab-journal.idx", ".relab-journal.jsonl"]
+    assert journal.last_seq() == 5
+    assert [e["seq"] for e in journal.since(0)] == [1, 2, 3, 4, 5]
+    assert [e["text"] for e in journal.since(3)] == ["p3", "p4"]
+    assert [e["seq"] for e in journal.since(1, limit=2)] == [2, 3]
+    assert journal.since(5) == []
+
+def test_local_journal_since_time(tmp_path, monkeypatch):
+    journal = LocalJournal(str(tmp_path))
+    for i, now in enumerate([100.0, 200.0, 200.0, 300.0]):
+        monkeypatch.setattr(journal_module.time, "time", lambda now=now: now)
+        journal.append(_entries(1, start=i))
+    assert [e["seq"] for e in journal.since_time(200.0)] == [2, 3, 4]
+    assert [e["seq"] for e in journal.since_time(250.0)] == [4]
+    assert journal.since_time(400.0) == []
+    assert len(LocalJournal(str(tmp_path)).since_time(0)) == 4
+
+def test_local_journal_recovers_from_a_torn_append(tmp_path):
+    journal = LocalJournal(str(tmp_path))
+    journal.append(_entries(2))
+    with open(journal.path, "ab") as f:
+        f.write(b'{"op":"add_proc')  # crash before the index was written
+    journal.append(_entries(1, start=2))
+    assert [e["text"] for e in journal.since(0)] == ["p0", "p1", "p2"]
+
+def test_local_journal_since_time_is_exact_within_a_minute(tmp_path, monkeypatch):
+    journal = LocalJournal(str(tmp_path))
+    for i, now in enumerate([600.0, 630.0, 650.0]):
+        monkeypatch.setattr(journal_module.time, "time", lambda now=now: now)
+        journal.append(_entries(1, start=i))
+    assert [e["seq"] for e in journal.since_time(600.0)] == [1, 2, 3]
+    assert [e["seq"] for e in journal.since_time(640.0)] == [3]  # same minute, later ts
+    assert [e["seq"] for e in journal.since_time(610.0)] == [2, 3]
+
+def test_local_journal_realigns_a_torn_index(tmp_path):
+    journal = LocalJournal(str(tmp_path))
+    journal.append(_entries(2))
+    with open(journal.index_path, "ab") as f:
+        f.write(b"\x01\x02\x03")  # crash in the middle of an offset
+    with open(journal.path, "ab") as f:
+        f.write(b'{"op":"add_procedure","test":"T","text":"torn"}\n')
+    journal.append(_entries(2, start=2))
+    assert [e["text"] for e in journal.since(0)] == ["p0", "p1", "p2", "p3"]
+    assert [e["seq"] for e in journal.since(3)] == [4]
+
+def test_memory_journal_since_time_spans_chunks(monkeypatch):
+    journal = MemoryJournal()
+    monkeypatch.setattr(journal_module.time, "time", lambda: 10.0)
+    journal.append(_entries(300))
+    monkeypatch.setattr(journal_module.time, "time", lambda: 20.0)
+    journal.append(_entries(400, start=300))
+    assert [e["seq"] for e in journal.since_time(20.0)] == list(range(301, 701))
+    assert len(journal.since_time(0)) == 700
+
+def test_local_backend_writes_are_journaled(shared_folder):
+    backend = LocalBackend(shared_folder)
+    backend.add_test("T")
+    backend.add_procedure("T", "first")
+    assert [(e["op"], e["test"]) for e in backend.journal.since(0)] == [("add_test", "T"), ("add_procedure", "T")]
+    assert os.path.exists(os.path.join(shared_folder, ".relab-journal.jsonl"))
+    assert not os.path.exists(os.path.join(shared_folder, "journal.jsonl"))
+
+#------------------------------------------------------
+# GITHUB REPO
+#------------------------------------------------------
+def test_repo_journal_rides_along_with_the_data_commit(fake_github):
+    backend = GitHubBackend()
+    backend.add_test("T")
+    fake_github.reset_calls()
+    backend.add_procedure("T", "first")
+    assert fake_github.call_count(contains="/contents/journal") == 0
+    assert [e["seq"] for e in backend.journal.since(0)] == [1, 2]
+
+def test_repo_journal_rereads_after_another_writer(fake_github, monkeypatch):
+    monkeypatch.setattr(journal_module, "BLOCK", 2)
+    backend = GitHubBackend()
+    backend.add_test("T")
+    other = GitHubBackend()
+    other.add_test("U")
+    other.add_test("V")  # rolls over into journal/000001.jsonl
+    fake_github.reset_calls()
+    backend.add_procedure("T", "first")
+    assert fake_github.call_count(contains="/contents/journal") > 0
+    assert [e["seq"] for e in backend.journal.since(0)] == [1, 2, 3, 4]
+    assert sorted(p for p in fake_github.files() if p.startswith("journal/")) == ["journal/000000.jsonl", "journal/000001.jsonl"]
+
+def test_idempotency_check_sees_keys_other_servers_just_committed(fake_github):
+    mine, other = GitHubBackend(), GitHubBackend()
+    mine.add_test("T")
+    assert mine.journal.since_time(0) != []  # highlights warmed the TTL cache
+    other.add_procedure("T", "once", key="nonce-1")
+    mine.add_procedure("T", "once", key="nonce-1")  # a replay that landed on another server
+    assert [p.text for p in mine.get_procedures("T")] == ["once"]
+
+def test_idempotency_check_on_our_own_commit_costs_no_reads(fake_github):
+    backend = GitHubBackend()
+    backend.add_test("T", key="nonce-1")
+    fake_github.reset_calls()
+    backend.add_procedure("T", "a", key="nonce-2")
+    backend.add_procedure("T", "a", key="nonce-2")
+    assert fake_github.call_count(contains="/contents/journal") == 0
+    assert [p.text for p in backend.get_procedures("T")] == ["a"]
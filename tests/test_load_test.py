@@ -0,0 +1,22 @@
+import argparse
+
+import load_test
+from datasets import populate
+from relab import config, instrument
+from relab.backends import build_backend
+from relab.scrubber import stop_scrubbers
+
+def test_run_step_loses_no_updates(shared_folder, monkeypatch):
+    monkeypatch.setattr(config, "WARM_CACHE", False)
+    names = populate(build_backend("local", cache_ttl=0, batch_delay=0), 3, 5,
+                     attachments=True, attachment_dir=config.PROCEDURES_FOLDER)
+    args = argparse.Namespace(mode="backend", duration=1.0, refresh=0.1, write_prob=0.5, workdir=shared_folder)
+    counter = load_test.OpCounter()
+    instrument.add_observer(counter)
+    try:
+        result = load_test.run_step(3, names, args, counter)
+    finally:
+        stop_scrubbers()
+    assert result["reruns"] > 0 and result["writes"] > 0
+    assert (result["errors"], result["lost_updates"]) == (0, 0)
+    assert result["storage_ops"]
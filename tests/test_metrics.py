@@ -0,0 +1,40 @@
+import socket
+import urllib.request
+
+from relab import metrics
+from relab.instrument import timed
+
+def _busy_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    sock.listen()
+    return sock, sock.getsockname()[1]
+
+def test_replicas_take_the_next_free_port(monkeypatch, caplog):
+    sock, port = _busy_port()
+    monkeypatch.setattr(metrics, "_server", None)
+    try:
+        with caplog.at_level("INFO", logger="relab.metrics"):
+            server = metrics.start_metrics_server("127.0.0.1", port, port_range=20)
+        assert server
+        bound = server.server_address[1]
+        assert port < bound < port + 20
+        assert f":{bound}/metrics" in caplog.text
+        with timed("read_json", "x"):
+            pass
+        body = urllib.request.urlopen(f"http://127.0.0.1:{bound}/metrics", timeout=5).read().decode("utf-8")
+        assert "relab_" in body
+        server.shutdown()
+        server.server_close()
+    finally:
+        sock.close()
+
+def test_busy_range_is_logged_not_raised(monkeypatch, caplog):
+    sock, port = _busy_port()
+    monkeypatch.setattr(metrics, "_server", None)
+    try:
+        with caplog.at_level("WARNING", logger="relab.metrics"):
+            assert metrics.start_metrics_server("127.0.0.1", port, port_range=1) is None
+        assert "busy" in caplog.text
+    finally:
+        sock.close()
@@ -0,0 +1,46 @@
+import pytest
+
+from relab import overview
+from relab.backends import GitHubBackend, LocalBackend
+from relab.overview import backend_overview, filter_rows, format_change
+
+@pytest.fixture(autouse=True)
+def fresh_overview():
+    # rows are cached per process and backend name
+    overview._rows.clear()
+    overview._snapshots.clear()
+
+def _file(path):
+    return {"type": "file", "path": path, "name": path.rsplit("/", 1)[-1], "url": ""}
+
+def test_local_rows_and_recent_changes_from_the_journal(shared_folder, tmp_path):
+    spec = tmp_path / "spec.pdf"
+    spec.write_bytes(b"%PDF")
+    backend = LocalBackend(shared_folder)
+    backend.add_test("HAST")
+    backend.add_procedure("HAST", "spec", _file(str(spec)))
+    backend.add_procedure("HAST", "gone", _file(str(tmp_path / "gone.pdf")))
+    backend.add_procedure("HAST", "typo")
+    backend.edit_procedure("HAST", 2, "fixed")
+    backend.delete_procedure("HAST", 1)
+    backend.add_test("TC")
+
+    rows = {r["test"]: r for r in backend_overview(backend, backend.list_tests())}
+    assert (rows["HAST"]["procedures"], rows["HAST"]["attachments"], rows["HAST"]["missing_files"]) == (2, 1, 0)
+    assert (rows["HAST"]["added"], rows["HAST"]["edited"], rows["HAST"]["removed"]) == (3, 1, 1)
+    assert format_change(rows["HAST"]) == "+3 / ~1 / -1"
+    assert [r["test"] for r in filter_rows(rows.values(), changed_only=True)] == ["HAST"]
+
+    # another process' writes show up too: they are in the shared journal
+    LocalBackend(shared_folder).add_procedure("TC", "cycle")
+    rows = {r["test"]: r for r in backend_overview(backend, backend.list_tests())}
+    assert rows["TC"]["added"] == 1
+
+def test_github_attachments_are_checked_in_the_repo(fake_github):
+    fake_github.repo.commit_change("attachment", put={"TestProcedures/HAST_spec.pdf": fake_github.repo.put_blob(b"%PDF")})
+    backend = GitHubBackend()
+    backend.add_test("HAST")
+    backend.add_procedure("HAST", "spec", _file("TestProcedures/HAST_spec.pdf"))
+    backend.add_procedure("HAST", "gone", _file("TestProcedures/HAST_gone.pdf"))
+    rows = backend_overview(backend, ["HAST"])
+    assert (rows[0]["attachments"], rows[0]["missing_files"]) == (2, 1)
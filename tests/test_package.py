@@ -0,0 +1,32 @@
+import io
+import os
+import subprocess
+import sys
+
+from relab import config
+from relab.storage import read_json, save_upload, write_json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_core_modules_import_without_streamlit_or_github():
+    code = ("import sys\n"
+            "import relab.backends, relab.storage, relab.records, relab.overview, relab.sharepoint, relab.api\n"
+            "print(sorted(m for m in ('streamlit', 'github') if m in sys.modules))\n")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
+
+def test_json_files_round_trip(tmp_path):
+    path = str(tmp_path / "tests.json")
+    assert read_json(path) == []  # missing file reads as empty
+    write_json(path, ["HAST", "TC"])
+    assert read_json(path) == ["HAST", "TC"]
+    assert os.listdir(tmp_path) == ["tests.json"]  # no temp file left behind
+
+class _Upload(io.BytesIO):
+    name = "spec.pdf"
+
+def test_save_upload_stores_next_to_the_procedures(shared_folder):
+    link = save_upload("HAST", _Upload(b"%PDF"))
+    assert link["path"] == os.path.join(config.PROCEDURES_FOLDER, "HAST_spec.pdf")
+    with open(link["path"], "rb") as f:
+        assert f.read() == b"%PDF"
@@ -0,0 +1,26 @@
+from relab import config, profiler
+
+def _work():
+    return sum(i * i for i in range(20000))
+
+def test_profiles_are_saved_rotated_and_summarized(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "PROFILE_KEEP", 2)
+    paths = []
+    for _ in range(3):
+        profile = profiler.start()
+        assert profile is not None
+        _work()
+        paths.append(profiler.stop(profile, session="abcdef123456"))
+    assert profiler.saved_profiles() == paths[1:]  # oldest rotated away
+    assert all("abcdef12" in p for p in paths)
+
+    rows = profiler.summarize(last=2, top=50)
+    assert any(row["function"] == "_work" for row in rows)
+    assert profiler.summarize(last=2, top=50) is rows  # cached until the files change
+
+def test_stop_without_a_profile_is_a_no_op(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "PROFILE_DIR", str(tmp_path))
+    assert profiler.stop(None) is None
+    assert profiler.saved_profiles() == []
+    assert profiler.summarize() == []
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from relab.records import (Attachment, Procedure, RecordError, SCHEMA_VERSION, dump_procedures,
+                           parse_procedures, schema_of)
+
+LINK = {"type": "file", "path": r"C:\Lab\TestProcedures\HAST_spec.pdf", "name": "HAST_spec.pdf", "url": "https://sp/HAST_spec.pdf"}
+
+def test_round_trip():
+    procedures = [Procedure("plain"), Procedure("url", "https://wiki/x"),
+                  Procedure.from_link("file", LINK, tags="stage:qual, equipment:HAST-01")]
+    data = json.loads(json.dumps(dump_procedures(procedures)))
+    assert parse_procedures(data) == procedures
+    assert schema_of(data) == SCHEMA_VERSION
+
+def test_dump_stays_a_list_the_older_dashboards_can_append_to():
+    data = dump_procedures([Procedure("a", "https://x")])
+    assert isinstance(data, list)
+    data.append({"text": "added by 3.0", "link": ""})
+    assert [p.text for p in parse_procedures(data)] == ["a", "added by 3.0"]
+
+def test_legacy_and_wrapped_layouts_load_and_need_migration():
+    legacy = ["bare string", {"text": "dict", "link": LINK}]
+    wrapped = {"schema": 2, "procedures": [{"text": "dict", "link": "https://x"}]}
+    assert [p.text for p in parse_procedures(legacy)] == ["bare string", "dict"]
+    assert parse_procedures(legacy)[1].attachment == Attachment.from_dict(LINK)
+    assert parse_procedures(wrapped) == [Procedure("dict", "https://x")]
+    assert schema_of(legacy) == 1
+    assert schema_of(wrapped) == 1
+
+def test_invalid_records_are_rejected():
+    with pytest.raises(RecordError, match="procedure #2"):
+        parse_procedures([{"text": "ok", "link": ""}, {"text": 5, "link": ""}])
+    with pytest.raises(RecordError):
+        parse_procedures([{"text": "x", "link": {"type": "file"}}])
+    with pytest.raises(RecordError):
+        parse_procedures({"schema": 99, "procedures": []})
+
+def test_tags_are_only_written_when_present():
+    assert dump_procedures([Procedure("a")]) == [{"text": "a", "link": ""}]
+    assert dump_procedures([Procedure("a", tags=["Stage: qual"])]) == [{"text": "a", "link": "", "tags": ["stage:qual"]}]
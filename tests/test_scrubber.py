@@ -0,0 +1,22 @@
+import os
+
+from relab.backends import LocalBackend
+from relab.scrubber import AttachmentScrubber
+
+def test_file_deleted_after_a_scrub_renders_as_missing(shared_folder):
+    backend = LocalBackend(shared_folder)
+    path = os.path.join(backend.procedures_folder, "HAST_spec.pdf")
+    with open(path, "wb") as f:
+        f.write(b"%PDF")
+    backend.add_test("HAST")
+    backend.add_procedure("HAST", "spec", {"type": "file", "path": path, "name": "HAST_spec.pdf", "url": ""})
+    scrubber = AttachmentScrubber(backend)
+    scrubber.scrub_once()
+    with scrubber.open(path) as f:
+        assert f.read() == b"%PDF"
+
+    os.remove(path)
+    assert scrubber.exists(path)  # cached until the next scrub...
+    assert scrubber.open(path) is None  # ...but rendering the row doesn't crash
+    assert not scrubber.exists(path)
+    assert scrubber.missing_by_test() == {"HAST": 1}
@@ -0,0 +1,41 @@
+from relab import config, sharepoint
+from relab.backends import LocalBackend
+from relab.sharepoint import path_map, rewrite_links, url_map
+
+RULES = [
+    (r"C:\Users\jdoe\OneDrive - Lab\RE Lab", "https://lab.sharepoint.com/sites/RE/Shared%20Documents?web=1"),
+    (r"C:\Users\jdoe\OneDrive - Lab", "https://lab-my.sharepoint.com/personal/jdoe/Documents"),
+]
+
+def test_longest_prefix_wins_case_and_separator_insensitive():
+    links = url_map(RULES)
+    assert links.map(r"c:/users/JDOE/OneDrive - Lab/RE Lab/TestProcedures/HAST spec.pdf") == \
+        "https://lab.sharepoint.com/sites/RE/Shared%20Documents/TestProcedures/HAST%20spec.pdf?web=1"
+    assert links.map(r"C:\Users\jdoe\OneDrive - Lab\notes.txt") == \
+        "https://lab-my.sharepoint.com/personal/jdoe/Documents/notes.txt"
+    assert links.map(r"C:\Users\jdoe\OneDrive - Lab Old\notes.txt") is None  # components, not characters
+    assert links.map("") is None
+
+def test_first_rule_wins_on_the_same_prefix():
+    paths = path_map([("/srv/share", r"D:\Share"), ("/srv/share/", "/mnt/other")])
+    assert paths.map("/srv/share/a/b.pdf") == r"D:\Share\a\b.pdf"
+
+def test_rewrite_moves_paths_and_refreshes_urls(shared_folder, monkeypatch):
+    monkeypatch.setattr(config, "SHAREPOINT_BASE_LOCAL", "/new/share")
+    monkeypatch.setattr(config, "SHAREPOINT_BASE_URL", "https://sp/docs")
+    monkeypatch.setattr(config, "SHAREPOINT_MAP_FILE", "")
+    sharepoint._link_maps.clear()
+    backend = LocalBackend(shared_folder)
+    backend.add_test("T")
+    link = {"type": "file", "path": "/old/share/spec.pdf", "name": "spec.pdf", "url": "https://old/spec.pdf"}
+    backend.add_procedure("T", "spec", link)
+    backend.add_procedure("T", "plain")
+
+    assert rewrite_links(backend, [("/old/share", "/new/share")], check_only=True)["rewritten"] == 1
+    assert backend.get_procedures("T")[0].attachment.path == "/old/share/spec.pdf"
+    stats = rewrite_links(backend, [("/old/share", "/new/share")])
+    assert (stats["tests"], stats["attachments"], stats["rewritten"]) == (1, 1, 1)
+    attachment = backend.get_procedures("T")[0].attachment
+    assert (attachment.path, attachment.url) == ("/new/share/spec.pdf", "https://sp/docs/spec.pdf")
+    assert backend.journal.since(0)[-1]["op"] == "relink"
+    assert rewrite_links(backend, [("/old/share", "/new/share")])["rewritten"] == 0
@@ -0,0 +1,52 @@
+import os
+
+from relab.backends import LocalBackend
+from relab.snapshots import SnapshotStore
+
+def _catalog(shared_folder):
+    backend = LocalBackend(shared_folder)
+    backend.add_test("HAST")
+    backend.add_procedure("HAST", "Bake 96h")
+    backend.add_test("TC")
+    backend.add_procedure("TC", "Cycle 500x")
+    return backend
+
+def test_take_and_restore(shared_folder):
+    backend = _catalog(shared_folder)
+    store = SnapshotStore(shared_folder)
+    first = store.take(backend, note="before")
+    backend.add_procedure("HAST", "Extra step")
+    backend.delete_test("TC")
+    second = store.take(backend)
+    assert second["tests"] == ["HAST"]
+    assert second["files"]["tests.json"] != first["files"]["tests.json"]
+
+    store.restore(backend, first["id"], test_name="HAST")
+    assert [p.text for p in backend.get_procedures("HAST")] == ["Bake 96h"]
+    assert backend.list_tests() == ["HAST"]
+    store.restore(backend, first["id"])
+    assert backend.list_tests() == ["HAST", "TC"]
+    assert [p.text for p in backend.get_procedures("TC")] == ["Cycle 500x"]
+    assert backend.journal.since(0)[-1]["op"] == "restore"
+
+def test_unchanged_files_are_not_read_again(shared_folder, monkeypatch):
+    backend = _catalog(shared_folder)
+    store = SnapshotStore(shared_folder)
+    first = store.take(backend)
+    backend.add_procedure("TC", "Inspect")
+    stored = []
+    original = store._store_bytes
+    monkeypatch.setattr(store, "_store_bytes", lambda data, info: stored.append(data) or original(data, info))
+    second = store.take(backend)
+    key = f"TestProcedures/{os.path.basename(backend.proc_file('HAST'))}"
+    assert second["files"][key] == first["files"][key]
+    assert len(stored) == 1  # only TC's procedures file (tests.json did not change)
+
+def test_chunks_are_written_after_the_write_lock_is_released(shared_folder, monkeypatch):
+    backend = _catalog(shared_folder)
+    store = SnapshotStore(shared_folder)
+    held = []
+    original = store._put_chunk
+    monkeypatch.setattr(store, "_put_chunk", lambda data: held.append(os.path.exists(backend.lock_file)) or original(data))
+    store.take(backend)
+    assert held and not any(held)
@@ -0,0 +1,38 @@
+import os
+
+from relab.backends import LocalBackend
+from relab.records import Procedure
+from relab.static_site import _link_cell, build_site, slug
+
+def test_only_web_and_file_urls_become_links():
+    assert _link_cell(Procedure("a", "https://wiki/hast?a=1&b=2")) == '<a href="https://wiki/hast?a=1&amp;b=2">📎 Open Link</a>'
+    for url in ("javascript:alert(document.cookie)", " JavaScript:alert(1)", "java\tscript:alert(1)",
+                "data:text/html,<script>alert(1)</script>", "vbscript:x"):
+        cell = _link_cell(Procedure("a", url))
+        assert "<a " not in cell and "<script>" not in cell
+
+def test_colliding_names_get_unique_pages():
+    assert slug("HAST 1") != slug("HAST-1")
+    assert slug("HAST 1").startswith("HAST-1-")
+
+def test_incremental_rebuild(shared_folder, tmp_path):
+    out = str(tmp_path / "site")
+    backend = LocalBackend(shared_folder)
+    for name in ("HAST 1", "HAST-1", "TC"):
+        backend.add_test(name)
+        backend.add_procedure(name, f"{name} step")
+    assert build_site(backend, out) == {"rendered": 3, "unchanged": 0, "removed": 0}
+    pages = {name: os.path.join(out, "tests", slug(name) + ".html") for name in ("HAST 1", "HAST-1", "TC")}
+    mtimes = {name: os.stat(path).st_mtime_ns for name, path in pages.items()}
+
+    backend.add_procedure("TC", "second step")
+    backend.delete_test("HAST-1")
+    assert build_site(backend, out) == {"rendered": 1, "unchanged": 1, "removed": 1}
+    assert os.stat(pages["HAST 1"]).st_mtime_ns == mtimes["HAST 1"]  # not rewritten
+    assert not os.path.exists(pages["HAST-1"])
+    with open(pages["TC"], encoding="utf-8") as f:
+        assert "second step" in f.read()
+    with open(os.path.join(out, "search-index.js"), encoding="utf-8") as f:
+        index = f.read()
+    assert "second step" in index and "HAST-1 step" not in index
+    assert build_site(backend, out, full=True)["rendered"] == 2
@@ -0,0 +1,71 @@
+import os
+
+from relab.backends import LocalBackend, MemoryBackend
+from relab.records import Procedure, dump_procedures, normalize_tags
+from relab.storage import write_json
+from relab.tags import TagIndex, join_tag, split_tag
+
+def _index():
+    backend = MemoryBackend(["HAST", "TC"], {
+        "HAST": [Procedure("bake", tags="equipment:HAST-01, stage:qual, urgent"),
+                 Procedure("spec", tags="tag:urgent, equipment:HAST-02")],
+        "TC": [Procedure("cycle", tags="stage:qual")],
+    })
+    return backend, TagIndex(backend, interval=0)
+
+def test_default_facet_has_one_spelling():
+    assert normalize_tags("Tag: urgent, urgent") == ("urgent",)
+    assert normalize_tags("tag:a:b") == ("tag:a:b",)
+    for tag in ("urgent", "stage:qual", "tag:a:b"):
+        assert join_tag(*split_tag(tag)) == tag
+
+def test_counts_and_match_agree():
+    _, index = _index()
+    counts = index.counts()
+    assert counts == {"equipment": {"HAST-01": 1, "HAST-02": 1}, "stage": {"qual": 2}, "tag": {"urgent": 2}}
+    for facet, values in counts.items():
+        for value, count in values.items():
+            assert len(index.match({facet: {value}})) == count
+    assert index.match({"tag": {"urgent"}}) == {("HAST", 0), ("HAST", 1)}
+
+def test_match_modes_and_per_test():
+    _, index = _index()
+    selected = {"stage": {"qual"}, "equipment": {"HAST-01", "HAST-02"}}
+    assert index.match(selected, mode="all") == {("HAST", 0)}
+    assert index.match(selected, mode="any") == {("HAST", 0), ("HAST", 1), ("TC", 0)}
+    assert index.match(selected, test_name="TC") == set()
+    assert index.counts("TC") == {"stage": {"qual": 1}}
+    assert index.match({"stage": set()}) is None
+
+def test_sync_follows_the_journal():
+    backend, index = _index()
+    index.counts()
+    backend.edit_procedure("HAST", 0, new_tags=["stage:rel"])
+    backend.delete_test("TC")
+    backend.add_procedure("HAST", "extra", tags="Tag:urgent")
+    assert index.counts() == {"equipment": {"HAST-02": 1}, "stage": {"rel": 1}, "tag": {"urgent": 2}}
+    assert index.match({"tag": {"urgent"}}) == {("HAST", 1), ("HAST", 2)}
+
+def test_per_test_queries_load_only_that_test(monkeypatch):
+    backend, index = _index()
+    loaded = []
+    get_procedures = backend.get_procedures
+    monkeypatch.setattr(backend, "get_procedures", lambda t: loaded.append(t) or get_procedures(t))
+    assert index.counts("TC") == {"stage": {"qual": 1}}
+    assert index.match({"stage": {"qual"}}, test_name="TC") == {("TC", 0)}
+    assert loaded == ["TC"]
+    index.counts()
+    assert loaded == ["TC", "HAST"]
+
+def test_writes_that_bypass_the_journal_are_picked_up(shared_folder):
+    backend = LocalBackend()
+    backend.add_test("HAST")
+    backend.add_procedure("HAST", "bake", tags="stage:qual")
+    index = TagIndex(backend, interval=0)
+    assert index.counts("HAST") == {"stage": {"qual": 1}}
+    # an older dashboard or a hand edit rewrites the file, no journal entry
+    write_json(backend.proc_file("HAST"), dump_procedures([Procedure("bake", tags="stage:rel"), Procedure("spec")]))
+    assert index.counts("HAST") == {"stage": {"rel": 1}}
+    assert index.counts() == {"stage": {"rel": 1}}
+    os.remove(backend.proc_file("HAST"))
+    assert index.counts("HAST") == {}
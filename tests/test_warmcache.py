@@ -0,0 +1,57 @@
+import os
+
+from relab import config
+from relab.backends import CachingBackend, LocalBackend, build_backend, find_layer
+from relab.codec import encode
+from relab.records import Procedure, dump_procedures
+from relab.storage import write_json
+from relab.warmcache import FORMAT, WarmCache, cache_path, cache_source
+
+def _read_all(backend):
+    return {t: backend.get_procedures(t) for t in backend.list_tests()}
+
+def _warm(tmp_path):
+    backend = build_backend("local", cache_ttl=60, batch_delay=0)
+    cache = find_layer(backend, CachingBackend)
+    return backend, cache, WarmCache(cache, path=str(tmp_path / "warm.json"), interval=0)
+
+def test_restart_keeps_only_entries_that_still_match(shared_folder, tmp_path):
+    writer = LocalBackend(shared_folder)
+    for name in ("A", "B"):
+        writer.add_test(name)
+        writer.add_procedure(name, f"{name} step")
+    backend, cache, warm = _warm(tmp_path)
+    _read_all(backend)
+    assert warm.save() is True
+    assert warm.save() is False  # nothing changed since
+
+    write_json(writer.proc_file("B"), dump_procedures([Procedure("B edited elsewhere")]))
+    backend, cache, warm = _warm(tmp_path)
+    loaded = warm.load()
+    assert (loaded["entries"], loaded["valid"]) == (3, 2)  # tests list + A still valid, B changed
+    misses = cache.misses
+    assert [p.text for p in backend.get_procedures("A")] == ["A step"]
+    assert cache.misses == misses
+    assert [p.text for p in backend.get_procedures("B")] == ["B edited elsewhere"]
+
+def test_foreign_or_corrupt_files_start_cold(shared_folder, tmp_path):
+    backend, cache, warm = _warm(tmp_path)
+    with open(warm.path, "wb") as f:
+        f.write(encode({"format": FORMAT, "source": "local:/elsewhere", "saved": 0, "entries": []}))
+    assert warm.load() is None
+    with open(warm.path, "wb") as f:
+        f.write(b"\x80\x04not json")  # e.g. a pickle from an older version: never unpickled
+    assert warm.load() is None and warm.last_error is not None
+
+def test_cache_path_is_per_source(shared_folder, tmp_path):
+    source = cache_source(LocalBackend(shared_folder))
+    assert source.startswith("local:")
+    assert cache_path(source, str(tmp_path)) != cache_path("local:/other", str(tmp_path))
+
+def test_default_cache_dir_is_per_user(shared_folder, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "WARM_CACHE_DIR", "")
+    monkeypatch.delenv("LOCALAPPDATA", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    path = cache_path(cache_source(LocalBackend(shared_folder)))
+    assert os.path.dirname(path) == os.path.join(str(tmp_path / "cache"), "relab")
+    assert path.endswith(".json")